@@ -0,0 +1,67 @@
+# 同步轮次开销基准：比较跟随 6 个币种与 200+ 个币种时 sync_coins 每轮的耗时。
+#
+#   python bench_cycle.py --coins 6,250 --cycles 200
+#
+# 我方账户由 paper_exchange.CountingExchange 模拟 (订单真实签名但不发送)。首轮建立全部仓位，
+# 之后每轮目标只随机调整 --changes-per-cycle 个币种的仓位，其余币种只有中间价小幅波动，接近实盘中的稳定状态。
+
+import time
+import random
+import logging
+import argparse
+import statistics
+
+import ds_copier_v2
+import fixtures
+import snapshot
+from paper_exchange import CountingExchange
+
+
+def make_universe(count):
+    return snapshot.AssetIndex({"universe": [{"name": f"COIN{i}", "szDecimals": i % 6} for i in range(count)]})
+
+
+def run(coin_count, cycles, changes_per_cycle):
+    """返回首轮之后每轮 sync_coins 的耗时 (毫秒) 列表"""
+    rng = random.Random(coin_count)
+    asset_index = make_universe(coin_count)
+    coins = list(asset_index.by_coin)
+    mids = {coin: 10 ** rng.uniform(-1, 5) for coin in coins}
+    positions = {coin: (rng.uniform(20000, 200000) / mids[coin] * rng.choice((1, -1)), rng.choice((3, 5, 10))) for coin in coins}
+    exchange = CountingExchange(asset_index)
+
+    samples = []
+    for cycle in range(cycles + 1):
+        if cycle:
+            for coin in rng.sample(coins, changes_per_cycle):
+                szi, leverage = positions[coin]
+                positions[coin] = (szi * rng.uniform(0.5, 1.5), leverage)
+            for coin in coins:
+                mids[coin] *= 1 + rng.uniform(-0.0005, 0.0005)
+        all_mids = {coin: str(mid) for coin, mid in mids.items()}
+        exchange.set_mids(all_mids)
+        target_user_state, my_user_state = fixtures.user_state(positions), exchange.user_state()
+        started = time.perf_counter()
+        ds_copier_v2.sync_coins(exchange, all_mids, target_user_state, my_user_state, coins, asset_index)
+        if cycle:
+            samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-cycle sync_coins cost versus universe size.")
+    parser.add_argument("--coins", default="6,250")
+    parser.add_argument("--cycles", type=int, default=200)
+    parser.add_argument("--changes-per-cycle", type=int, default=2)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.ERROR)
+    ds_copier_v2.DRY_RUN = False
+    print(f"{'coins':>6}{'median ms':>12}{'p90 ms':>10}")
+    for coin_count in (int(c) for c in args.coins.split(",")):
+        samples = sorted(run(coin_count, args.cycles, args.changes_per_cycle))
+        print(f"{coin_count:>6}{statistics.median(samples):>12.2f}{samples[int(len(samples) * 0.9)]:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
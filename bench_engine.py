@@ -0,0 +1,94 @@
+# 策略引擎基准：N 个跟单策略 (同一个目标、各自不同的币种) 每个 tick 的 /info 请求数与耗时，
+# 比较共享一个 engine.MarketDataHub 与每个策略各自轮询 (相当于各自运行一个进程)。
+#
+#   python bench_engine.py --strategies 1,2,4,8 --ticks 20 --latency-ms 50
+#
+# 以模拟模式运行，不签名、不发送订单；状态查询按 --latency-ms 模拟往返时间。
+
+import time
+import random
+import logging
+import argparse
+import statistics
+
+import ds_copier_v2
+import engine
+import fixtures
+import followers
+import snapshot
+
+COINS = [f"COIN{i}" for i in range(32)]
+ASSET_INDEX = snapshot.AssetIndex({"universe": [{"name": coin, "szDecimals": 2} for coin in COINS]})
+MIDS = {coin: "100" for coin in COINS}
+
+
+class CountingInfo:
+    """替身 Info：统计请求数，每次请求等待 latency_seconds"""
+
+    def __init__(self, states, latency_seconds):
+        self.states = states
+        self.latency_seconds = latency_seconds
+        self.request_count = 0
+
+    def all_mids(self):
+        self.request_count += 1
+        time.sleep(self.latency_seconds)
+        return dict(MIDS)
+
+    def user_state(self, address):
+        self.request_count += 1
+        time.sleep(self.latency_seconds)
+        return self.states.get(address.lower(), {"assetPositions": []})
+
+
+def make_strategies(info, count):
+    """count 个跟单策略，平分 COINS，使用同一个账户与同一个目标"""
+    my_address = "0x" + "11" * 20
+    chunk = len(COINS) // count
+    return [
+        ds_copier_v2.CopierStrategy(
+            info, None, my_address, COINS[i * chunk:(i + 1) * chunk], ASSET_INDEX,
+            [followers.Follower(my_address, None, ds_copier_v2.COPY_NOTIONAL_RATIO, name=f"s{i}")],
+        )
+        for i in range(count)
+    ]
+
+
+def run(count, ticks, latency_seconds, shared):
+    """返回 (每个 tick 的耗时 (毫秒) 列表, 每个 tick 的平均请求数)"""
+    rng = random.Random(count)
+    target = next(iter(ds_copier_v2.TARGET_WEIGHTS)).lower()
+    states = {}
+    info = CountingInfo(states, latency_seconds)
+    strategies = make_strategies(info, count)
+    engines = [engine.StrategyEngine(engine.MarketDataHub(info), strategies)] if shared else [
+        engine.StrategyEngine(engine.MarketDataHub(info), [strategy]) for strategy in strategies
+    ]
+    samples = []
+    for _ in range(ticks):
+        states[target] = fixtures.user_state({coin: (rng.uniform(1000, 5000), 5) for coin in COINS})
+        started = time.perf_counter()
+        for strategy_engine in engines:
+            strategy_engine.tick()
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples, info.request_count / ticks
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark /info requests per tick: shared data hub versus one loop per strategy.")
+    parser.add_argument("--strategies", default="1,2,4,8")
+    parser.add_argument("--ticks", type=int, default=20)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.ERROR)
+    ds_copier_v2.DRY_RUN = True
+    print(f"{'strategies':>11}{'data source':>14}{'requests/tick':>15}{'median ms':>12}")
+    for count in (int(n) for n in args.strategies.split(",")):
+        for shared in (False, True):
+            samples, requests = run(count, args.ticks, args.latency_ms / 1000, shared)
+            print(f"{count:>11}{'shared hub' if shared else 'per strategy':>14}{requests:>15.0f}{statistics.median(samples):>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+# 扇出模式基准：一个目标、N 个跟随账户时每轮同步的耗时，比较在线程中签名与在 orders.SigningPool 子进程中签名。
+# 与 ds_copier_v2.py --fan-out 相同，每轮由 engine.StrategyEngine 驱动一个带跟随账户列表的 CopierStrategy。
+#
+#   python bench_fanout.py --followers 1,5,10,30 --cycles 20 --latency-ms 50
+#
+# 每个跟随账户是一个 paper_exchange.CountingExchange (订单真实签名，请求按 --latency-ms 模拟往返时间后在本地成交)，
+# 状态查询同样带有模拟延迟。每轮目标随机调整 --changes-per-cycle 个币种，使每个跟随账户每轮都要签名并发送订单。
+# 子进程签名的收益取决于 CPU 核数；单核机器上子进程签名反而更慢 (30 个跟随账户时中位数约 361 ms 对线程的 329 ms)，
+# 因此 ds_copier_v2.py 只在指定 --sign-workers 时才使用子进程。
+
+import os
+import time
+import random
+import logging
+import argparse
+import statistics
+
+import ds_copier_v2
+import engine
+import fixtures
+import followers
+import orders
+import snapshot
+from paper_exchange import CountingExchange
+
+COINS = ["XRP", "DOGE", "BTC", "ETH", "SOL", "BNB"]
+ASSET_INDEX = snapshot.AssetIndex({"universe": [{"name": coin, "szDecimals": d} for coin, d in zip(COINS, (0, 0, 5, 4, 2, 3))]})
+MIDS = {"XRP": "2.5", "DOGE": "0.2", "BTC": "100000", "ETH": "3500", "SOL": "150", "BNB": "650"}
+
+
+class SlowInfo:
+    """替身 Info：返回目标与各跟随账户的状态，每次请求等待 latency_seconds，并统计请求数"""
+
+    def __init__(self, target_address, exchanges, latency_seconds):
+        self.target_address = target_address.lower()
+        # engine.MarketDataHub 以小写地址请求
+        self.exchanges = {exchange.wallet.address.lower(): exchange for exchange in exchanges}
+        self.latency_seconds = latency_seconds
+        self.target_state = None
+        self.request_count = 0
+
+    def all_mids(self):
+        self.request_count += 1
+        time.sleep(self.latency_seconds)
+        return dict(MIDS)
+
+    def user_state(self, address):
+        self.request_count += 1
+        time.sleep(self.latency_seconds)
+        if address.lower() == self.target_address:
+            return self.target_state
+        return self.exchanges[address.lower()].user_state()
+
+
+def run(follower_count, cycles, changes_per_cycle, latency_seconds, signing_pool):
+    """返回 (首轮之后每个 tick 的耗时 (毫秒) 列表, 每个 tick 的 /info 请求数)"""
+    rng = random.Random(follower_count)
+    target_address = next(iter(ds_copier_v2.TARGET_WEIGHTS))
+    exchanges = [CountingExchange(ASSET_INDEX, latency_seconds) for _ in range(follower_count)]
+    for exchange in exchanges:
+        exchange.set_mids(MIDS)
+    follower_list = [
+        followers.Follower(exchange.wallet.address, exchange, ds_copier_v2.COPY_NOTIONAL_RATIO * (1 + i / follower_count))
+        for i, exchange in enumerate(exchanges)
+    ]
+    info = SlowInfo(target_address, exchanges, latency_seconds)
+    copier = ds_copier_v2.CopierStrategy(info, None, None, COINS, ASSET_INDEX, follower_list)
+    strategy_engine = engine.StrategyEngine(engine.MarketDataHub(info), [copier])
+    positions = {coin: (rng.uniform(20000, 200000) / float(MIDS[coin]), 5) for coin in COINS}
+    if signing_pool is not None:
+        signing_pool = orders.SigningPool([exchange.wallet for exchange in exchanges], signing_pool)
+        orders.set_signing_pool(signing_pool)
+
+    samples = []
+    try:
+        for cycle in range(cycles + 1):
+            if cycle:
+                for coin in rng.sample(COINS, changes_per_cycle):
+                    szi, leverage = positions[coin]
+                    positions[coin] = (szi * rng.choice((0.5, 1.5)), leverage)
+            info.target_state = fixtures.user_state(positions)
+            info.request_count = 0
+            started = time.perf_counter()
+            strategy_engine.tick()
+            if cycle:
+                samples.append((time.perf_counter() - started) * 1000)
+    finally:
+        if signing_pool is not None:
+            orders.set_signing_pool(None)
+            signing_pool.shutdown()
+    return samples, info.request_count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark fan-out cycle time versus number of follower accounts.")
+    parser.add_argument("--followers", default="1,5,10,30")
+    parser.add_argument("--cycles", type=int, default=20)
+    parser.add_argument("--changes-per-cycle", type=int, default=2)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--sign-workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.ERROR)
+    ds_copier_v2.DRY_RUN = False
+    print(f"Simulated round trip {args.latency_ms:.0f} ms, {os.cpu_count()} CPUs, {args.sign_workers} signing processes")
+    print(f"{'followers':>10}{'signing':>10}{'median ms':>12}{'p90 ms':>10}{'info requests':>15}")
+    for follower_count in (int(n) for n in args.followers.split(",")):
+        for label, workers in (("thread", None), ("process", args.sign_workers)):
+            samples, requests = run(follower_count, args.cycles, args.changes_per_cycle, args.latency_ms / 1000, workers)
+            samples.sort()
+            print(f"{follower_count:>10}{label:>10}{statistics.median(samples):>12.1f}{samples[int(len(samples) * 0.9)]:>10.1f}{requests:>15}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+# 日志开销基准：测量一轮同步 (规划 + 模拟执行) 中日志带来的额外延迟。
+#
+#   python bench_logging.py --cycles 2000
+#
+# 以模拟模式运行 sync_coins (不签名、不发送请求)，目标每轮都改变全部币种的仓位，使每个币种都产生完整的决策日志。
+# 轮与轮之间 sleep --gap-ms 毫秒，模拟实盘中等待网络响应的时间 (后台日志线程在这段时间里写盘)。
+# 分别在三种配置下测量每轮耗时：关闭日志、同步写文件与控制台 (原先 main 中的 FileHandler + StreamHandler)、
+# 以及 tradelog.setup_logging 的队列日志 (另外写入交易日志)。控制台输出重定向到 /dev/null。
+
+import os
+import time
+import random
+import logging
+import argparse
+import tempfile
+import statistics
+
+import ds_copier_v2
+import fixtures
+import snapshot
+import tradelog
+
+COINS = ["XRP", "DOGE", "BTC", "ETH", "SOL", "BNB"]
+ASSET_INDEX = snapshot.AssetIndex({"universe": [{"name": coin, "szDecimals": d} for coin, d in zip(COINS, (0, 0, 5, 4, 2, 3))]})
+MIDS = {"XRP": "2.5", "DOGE": "0.2", "BTC": "100000", "ETH": "3500", "SOL": "150", "BNB": "650"}
+
+
+def run_cycles(cycles, gap_seconds):
+    """返回每轮 sync_coins 的耗时 (微秒)。我方仓位每轮与目标方向相反，保证每个币种都要平仓"""
+    rng = random.Random(0)
+    samples = []
+    for _ in range(cycles):
+        target = {coin: (rng.uniform(20000, 200000) / float(MIDS[coin]), 5) for coin in COINS}
+        mine = {coin: (-round(szi * ds_copier_v2.COPY_NOTIONAL_RATIO, 4), 5) for coin, (szi, _) in target.items()}
+        started = time.perf_counter()
+        ds_copier_v2.sync_coins(None, MIDS, fixtures.user_state(target), fixtures.user_state(mine), COINS, ASSET_INDEX)
+        samples.append((time.perf_counter() - started) * 1e6)
+        time.sleep(gap_seconds)
+    return sorted(samples)
+
+
+def synchronous_handlers(log_path, devnull):
+    formatter = logging.Formatter(tradelog.LOG_FORMAT, datefmt=tradelog.LOG_DATE_FORMAT)
+    file_handler = logging.FileHandler(log_path, mode="a")
+    console_handler = logging.StreamHandler(devnull)
+    for handler in (file_handler, console_handler):
+        handler.setFormatter(formatter)
+    root = logging.getLogger()
+    root.handlers.clear()
+    root.setLevel(logging.INFO)
+    root.addHandler(file_handler)
+    root.addHandler(console_handler)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-cycle latency added by logging.")
+    parser.add_argument("--cycles", type=int, default=2000)
+    parser.add_argument("--gap-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    ds_copier_v2.DRY_RUN = True
+    directory = tempfile.mkdtemp(prefix="bench_logging_")
+    devnull = open(os.devnull, "w")
+    results = {}
+
+    logging.disable(logging.CRITICAL)
+    results["logging disabled"] = run_cycles(args.cycles, args.gap_ms / 1000)
+    logging.disable(logging.NOTSET)
+
+    synchronous_handlers(os.path.join(directory, "sync.log"), devnull)
+    results["synchronous handlers"] = run_cycles(args.cycles, args.gap_ms / 1000)
+
+    tradelog.setup_logging(os.path.join(directory, "queued.log"), os.path.join(directory, "trades.jsonl"), stream=devnull)
+    results["queue + trade log"] = run_cycles(args.cycles, args.gap_ms / 1000)
+
+    baseline = statistics.median(results["logging disabled"])
+    print(f"{args.cycles} cycles, {len(COINS)} coins with actions per cycle")
+    print(f"{'configuration':<24}{'median us':>11}{'p99 us':>10}{'added us':>10}")
+    for label, samples in results.items():
+        median = statistics.median(samples)
+        print(f"{label:<24}{median:>11.0f}{samples[int(len(samples) * 0.99)]:>10.0f}{median - baseline:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
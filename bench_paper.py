@@ -0,0 +1,116 @@
+# 纸面交易浸泡测试：用合成行情在 paper_exchange.PaperExchange 上连续运行 ds_copier_v2.sync_coins，测量每秒能模拟的订单数。
+#
+#   python bench_paper.py --cycles 17280 --coins 6 --cycle-seconds 5
+#
+# 每轮中间价随机游走，并为每个币种生成新的 20 档 L2 盘口；目标每轮随机调整 --changes-per-cycle 个币种 (加减仓、反向、
+# 改杠杆或平仓)。与 ds_copier_v2.py --paper 相同，纸面账户的状态作为下一轮的 my_user_state。--cycle-seconds 只用于
+# 把轮数换算为模拟的市场时间。作为对照，最后用订单真实签名的 CountingExchange 跑 --signed-cycles 轮。
+
+import time
+import random
+import logging
+import argparse
+
+import ds_copier_v2
+import fixtures
+import snapshot
+from paper_exchange import CountingExchange, PaperExchange
+
+BASE_COINS = {"XRP": (0, 2.5), "DOGE": (0, 0.2), "BTC": (5, 100000.0), "ETH": (4, 3500.0), "SOL": (2, 150.0), "BNB": (3, 650.0)}
+BOOK_LEVELS = 20
+
+
+def make_universe(coin_count):
+    """返回 (AssetIndex, {coin: 初始中间价})；超过 6 个币种时补充合成币种"""
+    coins = dict(list(BASE_COINS.items())[:coin_count])
+    for i in range(len(coins), coin_count):
+        coins[f"SYN{i}"] = (2, 10.0 + i)
+    meta = {"universe": [{"name": coin, "szDecimals": sz_decimals} for coin, (sz_decimals, _) in coins.items()]}
+    return snapshot.AssetIndex(meta), {coin: mid for coin, (_, mid) in coins.items()}
+
+
+def make_book(coin, mid, sz_decimals, rng):
+    """围绕中间价的 l2Book 响应：档位间隔 1 个基点，每档名义价值 $2k-$20k"""
+    levels = []
+    for sign in (-1, 1):
+        levels.append([
+            {"px": f"{mid * (1 + sign * 0.0001 * i):.6g}", "sz": str(round(rng.uniform(2000, 20000) / mid, sz_decimals) or 10 ** -sz_decimals), "n": 1}
+            for i in range(1, BOOK_LEVELS + 1)
+        ])
+    return {"coin": coin, "levels": levels}
+
+
+def change_target(positions, mids, coins, changes, rng):
+    for coin in rng.sample(coins, changes):
+        szi, leverage = positions.get(coin, (0.0, 5))
+        roll = rng.random()
+        if szi == 0 or roll < 0.1:
+            positions[coin] = (rng.choice((-1, 1)) * rng.uniform(20000, 200000) / mids[coin], leverage)
+        elif roll < 0.7:
+            positions[coin] = (szi * rng.uniform(0.5, 1.5), leverage)
+        elif roll < 0.8:
+            positions[coin] = (-szi, leverage)
+        elif roll < 0.9:
+            positions[coin] = (szi, rng.choice((3, 5, 10)))
+        else:
+            positions.pop(coin)
+
+
+def run(exchange, asset_index, initial_mids, cycles, changes_per_cycle, with_books, seed=0):
+    """返回 (在 set_market / user_state / sync_coins 中花费的秒数, 轮数)；盘口与目标的生成不计入耗时"""
+    rng = random.Random(seed)
+    coins = list(initial_mids)
+    mids = dict(initial_mids)
+    positions = {}
+    elapsed = 0.0
+    for _ in range(cycles):
+        for coin in coins:
+            mids[coin] *= 1 + rng.gauss(0, 0.001)
+        all_mids = {coin: str(mid) for coin, mid in mids.items()}
+        change_target(positions, mids, coins, changes_per_cycle, rng)
+        target_user_state = fixtures.user_state(positions)
+        books = {coin: make_book(coin, mids[coin], asset_index.get(coin).sz_decimals, rng) for coin in coins} if with_books else None
+        started = time.perf_counter()
+        if with_books:
+            exchange.set_market(all_mids, books)
+        else:
+            exchange.set_mids(all_mids)
+        ds_copier_v2.sync_coins(exchange, all_mids, target_user_state, exchange.user_state(), coins, asset_index)
+        elapsed += time.perf_counter() - started
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Soak-test the copier against the in-process paper exchange.")
+    parser.add_argument("--cycles", type=int, default=17280, help="Sync cycles to simulate (17280 five-second cycles is one day).")
+    parser.add_argument("--coins", type=int, default=6)
+    parser.add_argument("--changes-per-cycle", type=int, default=2)
+    parser.add_argument("--cycle-seconds", type=float, default=5.0, help="Market time represented by one cycle.")
+    parser.add_argument("--equity", type=float, default=ds_copier_v2.PAPER_EQUITY_USD)
+    parser.add_argument("--signed-cycles", type=int, default=300, help="Cycles for the signed CountingExchange baseline (0 skips it).")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.CRITICAL)
+    ds_copier_v2.DRY_RUN = False
+    asset_index, initial_mids = make_universe(args.coins)
+    changes = min(args.changes_per_cycle, args.coins)
+
+    exchange = PaperExchange(asset_index, args.equity)
+    elapsed = run(exchange, asset_index, initial_mids, args.cycles, changes, with_books=True)
+    stats = exchange.stats()
+    market_hours = args.cycles * args.cycle_seconds / 3600
+    print(f"Paper: {args.cycles} cycles ({market_hours:.1f}h of market time at {args.cycle_seconds:g}s/cycle) on {args.coins} coins in {elapsed:.2f}s "
+          f"-> {args.cycles / elapsed:,.0f} cycles/s, {stats['orders'] / elapsed:,.0f} orders/s")
+    print(f"  {stats['fills']}/{stats['orders']} orders filled ({stats['rejected']} rejected), {exchange.leverage_update_count} leverage updates, "
+          f"traded ${stats['notional']:,.2f}")
+    print(f"  fees ${stats['fees']:,.2f}, slippage ${stats['slippage']:,.2f}, realized ${stats['realized_pnl']:,.2f}, "
+          f"equity ${stats['account_value']:,.2f} (pnl ${stats['pnl']:+,.2f}), margin used ${stats['margin_used']:,.2f}")
+
+    if args.signed_cycles:
+        baseline = CountingExchange(asset_index)
+        elapsed = run(baseline, asset_index, initial_mids, args.signed_cycles, changes, with_books=False)
+        print(f"Signed CountingExchange baseline: {args.signed_cycles} cycles in {elapsed:.2f}s -> {baseline.order_count / elapsed:,.0f} orders/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+# 崩溃恢复基准：让实盘模式的 ds_copier_v2 在下单路径上 kill -9 自己，然后立即重启，测量从重启到完成第一轮同步的时间，
+# 并检查订单是否被重复发送。
+#
+#   python bench_recovery.py --trials 20 --latency-ms 50
+#
+# 会在本地启动 local_server.py 作为替身 API (订单按中间价成交并按 cloid 记账)，机器人使用临时目录中的 journal。
+# 每次试验先通过 POST /target 把目标的 BTC 仓位调整 TARGET_CHANGE 范围内的比例 (方向与杠杆不变，恰好需要一笔订单)，
+# 再用 journal.crash_point 钩子 (DS_COPIER_CRASH_AT) 启动机器人，让它在 intent 持久化之后、订单发出之前，
+# 或在交易所返回结果之后、写入 ack 之前崩溃，这两处正是重启后可能丢单或重复下单的窗口。
+# 全部试验结束后，交易所收到的订单数应等于目标变化次数，我方仓位应与目标按 COPY_NOTIONAL_RATIO 缩放后一致。
+# 需要 config.json 中配置一个私钥 (只会向本地替身服务器发送订单)。
+
+import os
+import sys
+import json
+import time
+import random
+import signal
+import argparse
+import tempfile
+import threading
+import statistics
+import subprocess
+import urllib.request
+
+import ds_copier_v2
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+COIN = "BTC"
+TARGET_LEVERAGE = 5
+# 目标仓位的名义价值区间与每次试验的调整比例区间
+TARGET_NOTIONAL = (50000, 100000)
+TARGET_CHANGE = (0.2, 0.5)
+CRASH_POINTS = ("intent", "sent")
+
+
+class BotProcess:
+    """在后台线程中按行读取机器人日志，记录每行的到达时间。crash_at 为 journal.crash_point 的名称"""
+
+    def __init__(self, base_url, journal_path, crash_at=None):
+        cmd = [
+            sys.executable, os.path.join(HERE, "ds_copier_v2.py"), "--live", "--fast-start",
+            "--floor", "0.5", "--ceiling", "2", "--journal", journal_path, "--base-url", base_url,
+        ]
+        env = dict(os.environ)
+        env.pop("DS_COPIER_CRASH_AT", None)
+        if crash_at is not None:
+            env["DS_COPIER_CRASH_AT"] = crash_at
+        self.started = time.perf_counter()
+        self.proc = subprocess.Popen(cmd, cwd=HERE, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+        self.lines = []
+        self.first_cycle_at = None
+        self.first_cycle = threading.Event()
+        threading.Thread(target=self._read, daemon=True).start()
+
+    def _read(self):
+        for line in self.proc.stderr:
+            self.lines.append(line)
+            if "Next cycle in" in line and not self.first_cycle.is_set():
+                self.first_cycle_at = time.perf_counter()
+                self.first_cycle.set()
+
+    def time_to_first_cycle(self, timeout=30):
+        if not self.first_cycle.wait(timeout):
+            raise RuntimeError("ds_copier_v2 did not finish its first cycle:\n" + "".join(self.lines[-20:]))
+        return self.first_cycle_at - self.started
+
+    def wait_for_crash(self, timeout=30):
+        try:
+            self.proc.wait(timeout)
+        except subprocess.TimeoutExpired:
+            raise RuntimeError("ds_copier_v2 did not reach its crash point:\n" + "".join(self.lines[-20:]))
+        if self.proc.returncode != -signal.SIGKILL:
+            raise RuntimeError(f"ds_copier_v2 exited with {self.proc.returncode} before its crash point:\n" + "".join(self.lines[-20:]))
+
+    def kill(self):
+        self.proc.send_signal(signal.SIGKILL)
+        self.proc.wait()
+
+    def count(self, text):
+        return sum(text in line for line in self.lines)
+
+
+def post(base_url, path, body=None):
+    request = urllib.request.Request(base_url + path, data=json.dumps(body or {}).encode(), headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(request) as response:
+        return json.load(response)
+
+
+def get_stats(base_url):
+    with urllib.request.urlopen(base_url + "/stats") as response:
+        return json.load(response)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark restart time after kill -9 inside the order path.")
+    parser.add_argument("--port", type=int, default=8767)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--trials", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    base_url = f"http://127.0.0.1:{args.port}"
+    server = subprocess.Popen(
+        [sys.executable, os.path.join(HERE, "local_server.py"), "--port", str(args.port), "--latency-ms", str(args.latency_ms), "--fill-every", "0"],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    journal_path = os.path.join(tempfile.mkdtemp(prefix="bench_recovery_"), "ds_copier.journal")
+    recovery_ms, landed, lost = [], 0, 0
+    crashes = {point: 0 for point in CRASH_POINTS}
+    try:
+        time.sleep(1.0)
+        mid = float(post(base_url, "/info", {"type": "allMids"})[COIN])
+        target_szi = rng.uniform(*TARGET_NOTIONAL) / mid
+        # 第一次启动时目标没有仓位，只用于预热元数据缓存
+        bot = BotProcess(base_url, journal_path)
+        bot.time_to_first_cycle()
+        for _ in range(args.trials):
+            bot.kill()
+            # 在区间中点以上时减仓，否则加仓，名义价值保持在区间附近
+            direction = -1 if target_szi * mid > sum(TARGET_NOTIONAL) / 2 else 1
+            target_szi *= 1 + direction * rng.uniform(*TARGET_CHANGE)
+            post(base_url, "/target", {"coin": COIN, "szi": round(target_szi, 5), "leverage": TARGET_LEVERAGE})
+            crash_at = rng.choice(CRASH_POINTS)
+            BotProcess(base_url, journal_path, crash_at).wait_for_crash()
+            crashes[crash_at] += 1
+            bot = BotProcess(base_url, journal_path)
+            recovery_ms.append(bot.time_to_first_cycle() * 1000)
+            landed += bot.count("landed:")
+            lost += bot.count("never reached the exchange")
+        bot.kill()
+        stats = get_stats(base_url)
+    finally:
+        server.terminate()
+        server.wait()
+
+    # 除了目标之外只有机器人的账户会下单
+    positions = next(iter(stats["positions"].values()), {})
+    my_szi = positions.get(COIN, 0.0)
+    expected_szi = round(round(target_szi, 5) * ds_copier_v2.COPY_NOTIONAL_RATIO, 5)
+    print(f"Simulated REST round trip: {args.latency_ms:.0f} ms, kill -9 trials: {args.trials} "
+          f"({crashes['intent']} after the intent fsync, {crashes['sent']} after the exchange replied but before the ack)")
+    print(f"Restart to first completed cycle: median {statistics.median(recovery_ms):.0f} ms, max {max(recovery_ms):.0f} ms")
+    print(f"Unacknowledged orders found on restart: {landed} had landed, {lost} never reached the exchange")
+    print(f"Orders received by the exchange: {stats['orders']} for {args.trials} target changes")
+    print(f"Final {COIN} position: {my_szi} (expected {expected_szi} = target {round(target_szi, 5)} x {ds_copier_v2.COPY_NOTIONAL_RATIO})")
+    if stats["orders"] != args.trials:
+        sys.exit(f"FAIL: expected exactly one order per target change, the exchange received {stats['orders']}")
+    if abs(my_szi - expected_szi) > expected_szi * ds_copier_v2.SZI_TOLERANCE_RATIO:
+        sys.exit(f"FAIL: final position {my_szi} is outside the sync tolerance of {expected_szi}")
+    print("OK: every target change produced exactly one order across the crashes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+# 启动基准：测量从进程启动到第一轮 sync_coins 拿到全部状态、开始规划订单 (即第一条 "--- Processing N of M coins" 日志) 的时间。
+#
+#   python bench_startup.py --latency-ms 150 --runs 5
+#
+# 会在本地启动 local_server.py 作为替身 API (每个 REST 请求增加 --latency-ms 延迟，模拟到主网的往返)，
+# 然后以模拟模式分别运行默认启动和 --fast-start，各自在冷缓存 (无元数据缓存) 与热缓存下测量。
+# 总耗时大部分是解释器启动与模块导入，各种启动方式都一样；因此另外报告从 main() 的第一条日志
+# ("--- DS Copier Bot V2 Initializing ---"，导入与日志设置已经完成) 到首轮 sync_coins 的时间，快速启动的收益体现在这一段。
+# 元数据缓存通过 DS_COPIER_META_CACHE 放在临时目录中，不会改动工作目录中的 meta_cache.json。
+# 需要 config.json 中配置一个私钥 (不会发送任何真实交易)。
+
+import os
+import sys
+import time
+import argparse
+import statistics
+import tempfile
+import subprocess
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def time_to_first_sync_cycle(base_url, extra_args, meta_cache_path):
+    """启动一次 ds_copier_v2 模拟运行，返回 (进程启动到首轮 sync_coins 的毫秒数, main() 第一条日志到首轮 sync_coins 的毫秒数)"""
+    cmd = [sys.executable, os.path.join(HERE, "ds_copier_v2.py"), "--base-url", base_url] + extra_args
+    env = dict(os.environ, DS_COPIER_META_CACHE=meta_cache_path)
+    started = time.perf_counter()
+    proc = subprocess.Popen(cmd, cwd=HERE, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    initialized = None
+    try:
+        for line in proc.stderr:
+            if initialized is None and "Initializing ---" in line:
+                initialized = time.perf_counter()
+            if "--- Processing" in line and " coins (" in line:
+                now = time.perf_counter()
+                return (now - started) * 1000, (now - initialized) * 1000
+        raise RuntimeError(f"ds_copier_v2 exited before its first sync_coins cycle (exit code {proc.wait()})")
+    finally:
+        proc.kill()
+        proc.wait()
+
+
+def time_sdk_import():
+    started = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "import hyperliquid.exchange"], check=True)
+    return (time.perf_counter() - started) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark time from process launch to the first sync_coins cycle.")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--latency-ms", type=float, default=150.0)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    base_url = f"http://127.0.0.1:{args.port}"
+    server = subprocess.Popen(
+        [sys.executable, os.path.join(HERE, "local_server.py"), "--port", str(args.port), "--latency-ms", str(args.latency_ms), "--fill-every", "0"],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    meta_cache_path = os.path.join(tempfile.mkdtemp(prefix="bench_startup_"), "meta_cache.json")
+    try:
+        time.sleep(1.0)
+        print(f"Simulated REST round trip: {args.latency_ms:.0f} ms, runs per case: {args.runs}")
+        print(f"Interpreter + SDK import alone: {time_sdk_import():.0f} ms")
+        print(f"{'case':<28}{'launch median':>15}{'launch min':>12}{'main() median':>15}{'main() min':>12}")
+        for label, extra_args in (("default", []), ("--fast-start", ["--fast-start"])):
+            for cache in ("cold", "warm"):
+                launch, after_import = [], []
+                for _ in range(args.runs):
+                    if cache == "cold" and os.path.exists(meta_cache_path):
+                        os.remove(meta_cache_path)
+                    total_ms, main_ms = time_to_first_sync_cycle(base_url, extra_args, meta_cache_path)
+                    launch.append(total_ms)
+                    after_import.append(main_ms)
+                print(f"{label + ' / ' + cache + ' cache':<28}{statistics.median(launch):>15.0f}{min(launch):>12.0f}"
+                      f"{statistics.median(after_import):>15.0f}{min(after_import):>12.0f}")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,10 @@
 import time
 import json
 import example_utils
+import snapshot
+import scheduler
+import engine
+import orders
 from hyperliquid.utils import constants
 
 # --- 核心配置参数 ---
@@ -8,16 +12,112 @@ TARGET_USER_ADDRESS = "0xc20ac4dc4188660cbf555448af52694ca62b0734" # 您要跟
 MY_INVESTMENT_USD = 14.0  # 每次跟单的初始投入金额 (USD)
 TAKE_PROFIT_USD = 21.0    # 止盈目标 (USD)
 COIN = "BTC"              # 只跟单这个币种
-LOOP_SLEEP_SECONDS = 30   # 每次循环之间的等待时间
+LOOP_SLEEP_SECONDS = 30   # 首轮之后的初始等待时间
+LOOP_FLOOR_SECONDS = 5    # 目标调整 BTC 仓位或价格剧烈波动后的最短等待时间
+LOOP_CEILING_SECONDS = 120  # 目标长时间不动时逐步延长到的最长等待时间
+OPEN_SLIPPAGE = 0.01      # 市价开仓的滑点 (与原先 market_open(..., 0.01) 一致)
+CLOSE_SLIPPAGE = 0.05     # 市价平仓的滑点 (与 SDK market_close 的默认值一致)
+
+class BtcFollowStrategy(engine.Strategy):
+    """单币种定额跟单的策略引擎插件：目标开仓后以固定美元价值跟随，达到止盈目标后平仓并结束
+
+    下单走 orders 的快速路径：价格与仓位直接取自本轮快照，asset_index 提供资产编号与取整规则，每个操作只发送一个签名请求。
+    """
+
+    name = "btc_follow"
+
+    def __init__(self, exchange, my_address, asset_index, target_address=TARGET_USER_ADDRESS, coin=COIN,
+                 investment_usd=MY_INVESTMENT_USD, take_profit_usd=TAKE_PROFIT_USD):
+        self.exchange = exchange
+        self.my_address = my_address
+        self.asset_index = asset_index
+        self.asset_info = asset_index.get(coin)
+        self.target_address = target_address
+        self.coin = coin
+        self.coins = [coin]
+        self.investment_usd = investment_usd
+        self.take_profit_usd = take_profit_usd
+        self.last_signature = None
+
+    def addresses(self):
+        return {self.target_address: "target", self.my_address: "self"}
+
+    def on_snapshot(self, data):
+        print(f"\n----- {time.strftime('%Y-%m-%d %H:%M:%S')} -----")
+        # --- a. 数据采集 (由共享的数据中心完成) ---
+        all_mids = data.all_mids
+        target_user_state = data.user_state(self.target_address)
+        my_user_state = data.user_state(self.my_address)
+
+        signature = snapshot.position_signature(target_user_state, [self.coin])
+        target_changed = self.last_signature is not None and signature != self.last_signature
+        self.last_signature = signature
+
+        btc_price = float(all_mids.get(self.coin, 0))
+        if btc_price == 0:
+            print(f"❌ 警告: 无法获取 {self.coin} 的价格，跳过本轮循环。")
+            return target_changed
+
+        target_btc_position = snapshot.index_positions(target_user_state).get(self.coin)
+        my_btc_position = snapshot.index_positions(my_user_state).get(self.coin)
+
+        # --- b. 目标有效性检查 ---
+        if not target_btc_position:
+            print(f"🟡 目标当前未持有 {self.coin} 仓位。继续等待...")
+            if my_btc_position:
+                print(f"❗️ 警告: 目标已平仓，但我仍持有 {self.coin} 仓位。为安全起见，执行平仓！")
+                close_result = self.close(my_btc_position, btc_price)
+                print(f"平仓结果: {json.dumps(close_result)}")
+            return target_changed
+
+        # --- c. 我的状态评估 ---
+        target_direction_is_buy = float(target_btc_position["szi"]) > 0
+        target_leverage = int(target_btc_position["leverage"]["value"])
+
+        if my_btc_position is None:
+            # --- 情况一：我没有BTC仓位 -> 跟单开仓 ---
+            print(f"✅ 发现目标持有 {self.coin} {'多单' if target_direction_is_buy else '空单'} (杠杆: {target_leverage}x)。")
+            print(f"执行跟单，开立价值 ${self.investment_usd} 的仓位...")
+
+            sz = round(self.investment_usd / btc_price, self.asset_info.sz_decimals)
+            
+            # 设置与目标一致的杠杆 (与 SDK update_leverage 的默认值一样使用全仓)
+            orders.update_leverage(self.exchange, self.coin, target_leverage, is_cross=True, asset_index=self.asset_index)
+            # 执行开仓
+            order_result = orders.market_order(self.exchange, self.asset_info, target_direction_is_buy, sz, btc_price, OPEN_SLIPPAGE)
+            print(f"开仓结果: {json.dumps(order_result)}")
+        
+        else:
+            # --- 情况二：我有BTC仓位 -> 监控或调整 ---
+            my_direction_is_buy = float(my_btc_position["szi"]) > 0
+            my_leverage = int(my_btc_position["leverage"]["value"])
+            
+            # 一致性检查
+            if my_direction_is_buy == target_direction_is_buy and my_leverage == target_leverage:
+                # ✅ 一致 -> 监控盈利
+                my_position_size = abs(float(my_btc_position["szi"]))
+                my_position_value = my_position_size * btc_price
+                print(f"🟢 持仓正常，与目标一致。当前仓位价值: ${my_position_value:.2f}")
+
+                if my_position_value >= self.take_profit_usd:
+                    print(f"🎉 达到止盈目标! (${my_position_value:.2f} >= ${self.take_profit_usd})，执行市价平仓！")
+                    close_result = self.close(my_btc_position, btc_price)
+                    print(f"平仓结果: {json.dumps(close_result)}")
+                    print("任务完成，机器人退出。")
+                    self.done = True # 策略结束，引擎不再调用
+                
+            else:
+                # ❌ 不一致 -> 平掉现有仓位
+                print(f"❗️ 仓位不一致！(我: {'多' if my_direction_is_buy else '空'}{my_leverage}x, "
+                      f"目标: {'多' if target_direction_is_buy else '空'}{target_leverage}x)")
+                print("为同步策略，执行平仓...")
+                close_result = self.close(my_btc_position, btc_price)
+                print(f"平仓结果: {json.dumps(close_result)}")
+        return target_changed
+
+    def close(self, my_position, mid_price):
+        return orders.market_close(self.exchange, self.asset_info, float(my_position["szi"]), mid_price, CLOSE_SLIPPAGE)
 
-# --- 辅助函数：从用户状态中提取特定币种的持仓信息 ---
-def get_position_info(user_state, coin_name):
-    """从完整的用户状态中，查找并返回指定币种的持仓详情，如果不存在则返回None"""
-    asset_positions = user_state.get("assetPositions", [])
-    for position in asset_positions:
-        if position.get("position", {}).get("coin") == coin_name:
-            return position["position"]
-    return None
 
 def main():
     # --- 1. 初始化 ---
@@ -28,83 +128,13 @@ def main():
     print(f"策略: 跟随目标的 {COIN} 仓位，投入 ${MY_INVESTMENT_USD}，目标盈利 ${TAKE_PROFIT_USD}。")
     print("-------------------------------------------------------")
 
-    try:
-        # --- 2. 进入主循环 ---
-        while True:
-            print(f"\n----- {time.strftime('%Y-%m-%d %H:%M:%S')} -----")
-            # --- a. 数据采集 ---
-            print("正在获取最新数据...")
-            all_mids = info.all_mids()
-            target_user_state = info.user_state(TARGET_USER_ADDRESS)
-            my_user_state = info.user_state(my_address)
-            
-            btc_price = float(all_mids.get(COIN, 0))
-            if btc_price == 0:
-                print(f"❌ 警告: 无法获取 {COIN} 的价格，跳过本轮循环。")
-                time.sleep(LOOP_SLEEP_SECONDS)
-                continue
-
-            target_btc_position = get_position_info(target_user_state, COIN)
-            my_btc_position = get_position_info(my_user_state, COIN)
-
-            # --- b. 目标有效性检查 ---
-            if not target_btc_position:
-                print(f"🟡 目标当前未持有 {COIN} 仓位。继续等待...")
-                if my_btc_position:
-                    print(f"❗️ 警告: 目标已平仓，但我仍持有 {COIN} 仓位。为安全起见，执行平仓！")
-                    close_result = exchange.market_close(COIN)
-                    print(f"平仓结果: {json.dumps(close_result)}")
-                time.sleep(LOOP_SLEEP_SECONDS)
-                continue
-
-            # --- c. 我的状态评估 ---
-            target_direction_is_buy = float(target_btc_position["szi"]) > 0
-            target_leverage = int(target_btc_position["leverage"]["value"])
-
-            if my_btc_position is None:
-                # --- 情况一：我没有BTC仓位 -> 跟单开仓 ---
-                print(f"✅ 发现目标持有 {COIN} {'多单' if target_direction_is_buy else '空单'} (杠杆: {target_leverage}x)。")
-                print(f"执行跟单，开立价值 ${MY_INVESTMENT_USD} 的仓位...")
-
-                sz = round(MY_INVESTMENT_USD / btc_price, 5)
-                
-                # 设置与目标一致的杠杆
-                exchange.update_leverage(target_leverage, COIN)
-                # 执行开仓
-                order_result = exchange.market_open(COIN, target_direction_is_buy, sz, None, 0.01)
-                print(f"开仓结果: {json.dumps(order_result)}")
-            
-            else:
-                # --- 情况二：我有BTC仓位 -> 监控或调整 ---
-                my_direction_is_buy = float(my_btc_position["szi"]) > 0
-                my_leverage = int(my_btc_position["leverage"]["value"])
-                
-                # 一致性检查
-                if my_direction_is_buy == target_direction_is_buy and my_leverage == target_leverage:
-                    # ✅ 一致 -> 监控盈利
-                    my_position_size = abs(float(my_btc_position["szi"]))
-                    my_position_value = my_position_size * btc_price
-                    print(f"🟢 持仓正常，与目标一致。当前仓位价值: ${my_position_value:.2f}")
-
-                    if my_position_value >= TAKE_PROFIT_USD:
-                        print(f"🎉 达到止盈目标! (${my_position_value:.2f} >= ${TAKE_PROFIT_USD})，执行市价平仓！")
-                        close_result = exchange.market_close(COIN)
-                        print(f"平仓结果: {json.dumps(close_result)}")
-                        print("任务完成，机器人退出。")
-                        break # 退出 while 循环，结束脚本
-                    
-                else:
-                    # ❌ 不一致 -> 平掉现有仓位
-                    print(f"❗️ 仓位不一致！(我: {'多' if my_direction_is_buy else '空'}{my_leverage}x, "
-                          f"目标: {'多' if target_direction_is_buy else '空'}{target_leverage}x)")
-                    print("为同步策略，执行平仓...")
-                    close_result = exchange.market_close(COIN)
-                    print(f"平仓结果: {json.dumps(close_result)}")
-            
-            # --- d. 休眠 ---
-            print(f"等待 {LOOP_SLEEP_SECONDS} 秒后进入下一轮...")
-            time.sleep(LOOP_SLEEP_SECONDS)
+    cycle_scheduler = scheduler.AdaptiveScheduler(LOOP_FLOOR_SECONDS, LOOP_CEILING_SECONDS, LOOP_SLEEP_SECONDS, coins=[COIN])
+    # 资产编号与取整规则只在启动时获取一次
+    strategy = BtcFollowStrategy(exchange, my_address, snapshot.AssetIndex(info.meta()))
 
+    try:
+        # --- 2. 由策略引擎驱动主循环：每轮获取数据、调用插件、按自适应间隔休眠，止盈后退出 ---
+        engine.StrategyEngine(engine.MarketDataHub(info), [strategy], cycle_scheduler).run()
     except KeyboardInterrupt:
         print("\n检测到手动中断 (Ctrl+C)，机器人正在关闭...")
     except Exception as e:
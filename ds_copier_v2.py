@@ -24,13 +24,31 @@ import json
 import math
 import logging
 import argparse
+import numpy as np
 import example_utils
+import ds_stream
+import orders
+import metrics
+import portfolio
+import snapshot
+import transport
+import scheduler
+import journal
+import tradelog
+import followers
+import engine
+import paper_exchange
+from concurrent.futures import ThreadPoolExecutor
 from hyperliquid.utils import constants
 
 # --- 核心配置参数 ---
 
 TARGET_USER_ADDRESS = "0xc20ac4dc4188660cbf555448af52694ca62b0734" # 您要跟单的目标地址 (DS)
 
+# 同时跟随多个目标地址时的 {地址: 权重}。各目标的 szi 乘以权重后按币种净额合并，
+# 再按 COPY_NOTIONAL_RATIO 缩放。也可以用 --targets 指定一个同样格式的 JSON 文件。
+TARGET_WEIGHTS = {TARGET_USER_ADDRESS: 1.0}
+
 # 我方仓位名义价值将是目标名义价值的该比例。
 # 基于目标当前最小仓位 (BNB, ~$6.62k) 和我方最小开仓名义价值 ($10) 计算：
 # 10 / 6620 ≈ 0.00151。为增加缓冲，设定为 0.0018
@@ -39,216 +57,757 @@ COPY_NOTIONAL_RATIO = 0.0018
 # 仓位 SZI 大小同步的容忍度。
 SZI_TOLERANCE_RATIO = 0.05
 
-# 跟单的币种列表
+# 我方仓位的最小名义价值 (美元)，低于该值的目标仓位不跟单
+MIN_NOTIONAL_VALUE = 10
+
+# 仓位大小偏离超出容忍度时的处理方式：
+#   "delta" - 只按 szi 差额下一笔加仓或 reduce-only 减仓单 (默认)
+#   "close" - 先全部平仓，下一轮再按正确大小重新开仓 (旧行为)
+# 方向或杠杆不一致时两种模式都会全部平仓。
+REBALANCE_MODE = "delta"
+
+# 跟单的币种列表。设为 None (或使用 --all-coins) 时跟随目标持有的全部币种
 TARGET_COINS = ["XRP", "DOGE", "BTC", "ETH", "SOL", "BNB"]
 
+# screen_coins 在边界附近留出的相对余量，边界附近的币种交给 plan_coin 精确判断
+SCREEN_EPSILON = 1e-9
+
 LOOP_SLEEP_SECONDS = 30
 
+# 轮询模式的自适应间隔：目标仓位变化或中间价波动超过 MID_MOVE_THRESHOLD 后回到 LOOP_FLOOR_SECONDS，
+# 行情平静时每轮加倍，最长 LOOP_CEILING_SECONDS。首轮之后的初始间隔为 LOOP_SLEEP_SECONDS。
+LOOP_FLOOR_SECONDS = 5
+LOOP_CEILING_SECONDS = 120
+MID_MOVE_THRESHOLD = 0.005
+
+# 流式模式 (--stream) 下，即使没有收到成交事件，也每隔该秒数用 REST 全量对账一次
+RECONCILE_SECONDS = 300
+
+# 紧凑 JSONL 交易日志 (每个规划、杠杆更新与订单结果一行)，与 ds_copier.log 一样按大小轮转
+TRADE_LOG_PATH = "trades.jsonl"
+
+# --metrics-file 写入延迟统计的间隔
+METRICS_FLUSH_SECONDS = 60
+
+# 市价开仓 / 平仓使用的滑点 (与原先 market_open(..., 0.01) 和 market_close 的默认值一致)
+OPEN_SLIPPAGE = 0.01
+CLOSE_SLIPPAGE = 0.05
+
+# 扇出模式 (--fan-out) 下同时同步的跟随账户数上限
+FOLLOWER_WORKERS = 32
+
+# 并发更新杠杆使用的线程池 (扇出模式下由所有跟随账户共享)
+_executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="leverage")
+_follower_executor = ThreadPoolExecutor(max_workers=FOLLOWER_WORKERS, thread_name_prefix="follower")
+
+# --paper 模式下纸面账户的初始资金 (USD)
+PAPER_EQUITY_USD = 10000
+
 # 全局变量，由命令行参数决定
 DRY_RUN = True
-
-def get_position_info(user_state, coin_name):
-    """从完整的用户状态中，查找并返回指定币种的持仓详情，如果不存在则返回None"""
-    asset_positions = user_state.get("assetPositions", [])
-    for position in asset_positions:
-        if position.get("position", {}).get("coin") == coin_name:
-            if float(position["position"]["szi"]) != 0:
-                return position["position"]
-    return None
+PAPER = False
+_equity_check_pending = False
+_recorder = None
+_record_books = False
+_transport = None
+_journal = None
 
 def execute_action(action_msg, function, *args, **kwargs):
-    """根据 DRY_RUN 模式决定是打印模拟操作还是真实执行"""
-    if DRY_RUN:
+    """根据 DRY_RUN 模式决定是打印模拟操作还是真实执行；PAPER 模式下 exchange 是纸面交易所，操作照常执行"""
+    if DRY_RUN and not PAPER:
         logging.info(f"[DRY RUN] {action_msg}")
         return {"status": "ok", "response": {"type": "dry_run", "data": "simulated success"}}
     else:
-        logging.info(f"[LIVE] {action_msg}")
-        return function(*args, **kwargs)
+        logging.info(f"[{'PAPER' if PAPER else 'LIVE'}] {action_msg}")
+        with metrics.span(f"execute_action.{function.__name__}"):
+            return function(*args, **kwargs)
+
+def close_order(coin, my_position, mid_price, sz_decimals, msg):
+    """构造平掉现有仓位的 reduce-only IOC 订单 (等价于 market_close，但不再重新请求 user_state 和 mids)"""
+    my_szi = float(my_position["szi"])
+    is_buy = my_szi < 0
+    return {
+        "type": "order",
+        "coin": coin,
+        "is_buy": is_buy,
+        "sz": abs(my_szi),
+        "limit_px": orders.slippage_price(mid_price, is_buy, CLOSE_SLIPPAGE, sz_decimals),
+        "reduce_only": True,
+        "msg": msg,
+    }
+
+def delta_order(coin, direction_is_buy, my_szi_abs, target_szi_abs, mid_price, sz_decimals):
+    """方向与杠杆一致但大小偏离时，只对 szi 差额下单：加仓为普通 IOC，减仓为 reduce-only IOC"""
+    delta = round(target_szi_abs - my_szi_abs, sz_decimals)
+    if delta == 0:
+        logging.info(f"{coin} size delta rounds to 0 at {sz_decimals} decimals, nothing to do.")
+        return []
+    increase = delta > 0
+    delta_abs = abs(delta)
+    if increase and delta_abs * mid_price < MIN_NOTIONAL_VALUE:
+        logging.warning(f"{coin} increase of {delta_abs} (${delta_abs * mid_price:,.2f}) is below the minimum order value of ${MIN_NOTIONAL_VALUE}. Waiting for a larger drift.")
+        return []
+    is_buy = direction_is_buy if increase else not direction_is_buy
+    return [{
+        "type": "order",
+        "coin": coin,
+        "is_buy": is_buy,
+        "sz": delta_abs,
+        "limit_px": orders.slippage_price(mid_price, is_buy, OPEN_SLIPPAGE if increase else CLOSE_SLIPPAGE, sz_decimals),
+        "reduce_only": not increase,
+        "msg": f"{'Increase' if increase else 'Reduce'} {coin} by {delta_abs} ({my_szi_abs} -> {target_szi_abs})",
+    }]
+
+def plan_coin(all_mids, target_positions, my_positions, coin, asset_index, copy_ratio=None):
+    """计算单个币种需要执行的操作，不发送任何请求。返回 action 列表 (type 为 "leverage" 或 "order")
 
-def process_coin(exchange, info, all_mids, my_address, target_user_state, my_user_state, coin, meta_data):
-    """处理单个币种的跟单逻辑"""
+    target_positions / my_positions 为 snapshot.index_positions 构建的 {coin: position}，每个币种只做 O(1) 查找。
+    copy_ratio 缺省为 COPY_NOTIONAL_RATIO。
+    """
     logging.info(f"--- Processing {coin} ---")
+    if copy_ratio is None:
+        copy_ratio = COPY_NOTIONAL_RATIO
     
     mid_price = float(all_mids.get(coin, 0))
     if mid_price == 0:
         logging.warning(f"Could not get mid price for {coin}, skipping.")
-        return
+        return []
 
-    asset_info = next((item for item in meta_data["universe"] if item["name"] == coin), None)
+    asset_info = asset_index.get(coin)
     if not asset_info:
         logging.warning(f"Could not find metadata for {coin}, skipping.")
-        return
-    sz_decimals = asset_info["szDecimals"]
+        return []
+    sz_decimals = asset_info.sz_decimals
 
-    target_position = get_position_info(target_user_state, coin)
-    my_position = get_position_info(my_user_state, coin)
+    target_position = target_positions.get(coin)
+    my_position = my_positions.get(coin)
 
     if not target_position:
         logging.info(f"Target does not have a position in {coin}.")
         if my_position:
-            action_msg = f"Closing {coin} position to match target."
-            close_result = execute_action(action_msg, exchange.market_close, coin)
-            logging.info(f"Close result: {json.dumps(close_result)}")
-        return
+            return [close_order(coin, my_position, mid_price, sz_decimals, f"Closing {coin} position to match target.")]
+        return []
 
     target_direction_is_buy = float(target_position["szi"]) > 0
     target_leverage = int(target_position["leverage"]["value"])
     target_szi_abs = abs(float(target_position["szi"]))
     target_notional_value = target_szi_abs * mid_price
     
-    my_target_szi_abs = target_szi_abs * COPY_NOTIONAL_RATIO
+    my_target_szi_abs = target_szi_abs * copy_ratio
     my_target_notional_value = my_target_szi_abs * mid_price
     
-    MIN_NOTIONAL_VALUE = 10 
     if my_target_notional_value < MIN_NOTIONAL_VALUE:
         logging.warning(f"Target {coin} position scaled value is ${my_target_notional_value:,.2f}, which is below the minimum of ${MIN_NOTIONAL_VALUE}. Skipping.")
         if my_position:
-            action_msg = f"Closing {coin} because target's scaled position is too small to copy."
-            close_result = execute_action(action_msg, exchange.market_close, coin)
-            logging.info(f"Close result: {json.dumps(close_result)}")
-        return
+            return [close_order(coin, my_position, mid_price, sz_decimals, f"Closing {coin} because target's scaled position is too small to copy.")]
+        return []
 
     rounded_my_target_szi_abs = round(my_target_szi_abs, sz_decimals)
     
     if rounded_my_target_szi_abs == 0:
         logging.warning(f"Calculated {coin} position size is 0 after rounding (from: {my_target_szi_abs}). Cannot open position, skipping.")
-        return
+        return []
         
     if my_position is None:
         logging.info(f"Target has {'Long' if target_direction_is_buy else 'Short'} {coin} ({target_leverage}x). We have no position. Opening new position.")
-        logging.info(f"  Target Notional: ${target_notional_value:,.2f}, My Target Notional: ${my_target_notional_value:,.2f}")
-        logging.info(f"  Calculated SZI: {my_target_szi_abs:.8f} -> Rounded to {sz_decimals} decimals: {rounded_my_target_szi_abs}")
-        
+        if logging.getLogger().isEnabledFor(logging.DEBUG):
+            logging.debug(f"  Target Notional: ${target_notional_value:,.2f}, My Target Notional: ${my_target_notional_value:,.2f}")
+            logging.debug(f"  Calculated SZI: {my_target_szi_abs:.8f} -> Rounded to {sz_decimals} decimals: {rounded_my_target_szi_abs}")
+        return [
+            {
+                "type": "leverage",
+                "coin": coin,
+                "leverage": target_leverage,
+                "msg": f"Updating {coin} leverage to {target_leverage}x (Isolated)",
+            },
+            {
+                "type": "order",
+                "coin": coin,
+                "is_buy": target_direction_is_buy,
+                "sz": rounded_my_target_szi_abs,
+                "limit_px": orders.slippage_price(mid_price, target_direction_is_buy, OPEN_SLIPPAGE, sz_decimals),
+                "reduce_only": False,
+                "msg": f"Market {'Buy' if target_direction_is_buy else 'Sell'} {rounded_my_target_szi_abs} {coin}",
+            },
+        ]
+
+    my_direction_is_buy = float(my_position["szi"]) > 0
+    my_leverage = int(my_position["leverage"]["value"])
+    my_szi_abs = abs(float(my_position["szi"]))
+
+    if my_direction_is_buy == target_direction_is_buy and my_leverage == target_leverage:
+        szi_diff = abs(my_szi_abs - rounded_my_target_szi_abs)
+        szi_tolerance = rounded_my_target_szi_abs * SZI_TOLERANCE_RATIO
+
+        if szi_diff <= szi_tolerance:
+            my_position_value = my_szi_abs * mid_price
+            logging.info(f"{coin} position is in sync with target. My notional value: ${my_position_value:,.2f}")
+            return []
+        logging.warning(f"{coin} position size mismatch! (My: {my_szi_abs:.5f}, Target should be: {rounded_my_target_szi_abs:.5f}). Re-syncing.")
+        if REBALANCE_MODE == "close":
+            return [close_order(coin, my_position, mid_price, sz_decimals, f"Closing {coin} to re-sync position size.")]
+        return delta_order(coin, target_direction_is_buy, my_szi_abs, rounded_my_target_szi_abs, mid_price, sz_decimals)
+
+    policy_mismatches = []
+    if my_direction_is_buy != target_direction_is_buy:
+        policy_mismatches.append(f"direction (Me: {'Long' if my_direction_is_buy else 'Short'}, Target: {'Long' if target_direction_is_buy else 'Short'})")
+    if my_leverage != target_leverage:
+        policy_mismatches.append(f"leverage (Me: {my_leverage}x, Target: {target_leverage}x)")
+    
+    logging.warning(f"{coin} position policy mismatch! Mismatches: {', '.join(policy_mismatches)}. Re-syncing.")
+    return [close_order(coin, my_position, mid_price, sz_decimals, f"Closing {coin} to re-sync position policy.")]
+
+def log_order_event(action, status, sz=None, px=None, msg=None):
+    """把一个订单的结果写入交易日志；sz / px 为成交数量与均价，缺省时使用下单数量与限价"""
+    cloid = action.get("cloid")
+    tradelog.event(
+        "order", action["coin"], "B" if action["is_buy"] else "A",
+        action["sz"] if sz is None else float(sz), action["limit_px"] if px is None else float(px),
+        action["reduce_only"], status, cloid.to_raw() if cloid is not None else None, msg,
+    )
+
+def execute_plan(exchange, actions, order_journal=None, asset_index=None):
+    """执行一轮同步的全部操作：先并发更新杠杆，再把所有订单合并为一个 bulk order 请求发送。order_journal 为该账户的日志
+
+    传入 asset_index 时订单与杠杆更新直接用预先计算的资产表构造，执行期间不会产生任何 /info 请求。
+    返回订单被交易所确认 (成交或挂单) 的币种集合；模拟运行或请求失败时为空。
+    """
+    leverage_actions = [a for a in actions if a["type"] == "leverage"]
+    order_actions = [a for a in actions if a["type"] == "order"]
+    if order_journal is not None and actions:
+        order_journal.record_intents(actions)
+        if order_actions:
+            journal.crash_point("intent")
+
+    futures = {
+        a["coin"]: _executor.submit(execute_action, a["msg"], orders.update_leverage, exchange, a["coin"], a["leverage"], is_cross=False, asset_index=asset_index)
+        for a in leverage_actions
+    }
+    failed_coins = set()
+    for coin, future in futures.items():
         try:
-            leverage_msg = f"Updating {coin} leverage to {target_leverage}x (Isolated)"
-            execute_action(leverage_msg, exchange.update_leverage, target_leverage, coin, is_cross=False)
-            
-            order_msg = f"Market {'Buy' if target_direction_is_buy else 'Sell'} {rounded_my_target_szi_abs} {coin}"
-            order_result = execute_action(order_msg, exchange.market_open, coin, target_direction_is_buy, rounded_my_target_szi_abs, None, 0.01)
-            logging.info(f"Open result: {json.dumps(order_result)}")
+            result = future.result()
+            if result.get("status") != "ok":
+                raise RuntimeError(json.dumps(result))
+            tradelog.event("leverage", coin, status="ok")
         except Exception as e:
-            logging.error(f"Failed to open position for {coin}: {e}", exc_info=True)
-            
+            logging.error(f"Failed to update leverage for {coin}, skipping its order: {e}", exc_info=True)
+            tradelog.event("leverage", coin, status="error", msg=str(e))
+            failed_coins.add(coin)
+
+    if order_journal is not None:
+        order_journal.record_skipped([a for a in order_actions if a["coin"] in failed_coins])
+    order_actions = [a for a in order_actions if a["coin"] not in failed_coins]
+    if not order_actions:
+        return set()
+
+    order_requests = [
+        {
+            "coin": a["coin"],
+            "is_buy": a["is_buy"],
+            "sz": a["sz"],
+            "limit_px": a["limit_px"],
+            "order_type": orders.IOC_ORDER_TYPE,
+            "reduce_only": a["reduce_only"],
+            "cloid": a.get("cloid"),
+        }
+        for a in order_actions
+    ]
+    action_msg = f"Bulk order ({len(order_requests)}): " + "; ".join(a["msg"] for a in order_actions)
+    try:
+        result = execute_action(action_msg, orders.bulk_orders, exchange, order_requests, asset_index)
+    except Exception as e:
+        logging.error(f"Failed to send bulk order: {e}", exc_info=True)
+        for a in order_actions:
+            log_order_event(a, "exception", msg=str(e))
+        return set()
+    response = result.get("response") if isinstance(result.get("response"), dict) else {}
+    statuses = response["data"].get("statuses", []) if isinstance(response.get("data"), dict) else []
+    acked_coins = set()
+    filled = resting = rejected = 0
+    for i, a in enumerate(order_actions):
+        status = statuses[i] if i < len(statuses) and isinstance(statuses[i], dict) else {}
+        if "filled" in status:
+            log_order_event(a, "filled", status["filled"].get("totalSz"), status["filled"].get("avgPx"))
+            acked_coins.add(a["coin"])
+            filled += 1
+        elif "resting" in status:
+            log_order_event(a, "resting")
+            acked_coins.add(a["coin"])
+            resting += 1
+        elif "error" in status:
+            log_order_event(a, "error", msg=status["error"])
+            rejected += 1
+        else:
+            # 模拟模式或整个请求被拒绝
+            log_order_event(a, response.get("type") or result.get("status", "unknown"), msg=None if response else str(result.get("response")))
+    # 每个订单的完整结果已写入交易日志，这里只记录标量摘要，格式化留给后台日志线程
+    logging.info("Bulk order result: %s, %d filled, %d resting, %d rejected", result.get("status"), filled, resting, rejected)
+    if order_journal is not None:
+        journal.crash_point("sent")
+        order_journal.record_acks(order_actions, result)
+    return acked_coins
+
+def screen_coins(coins, all_mids, target_positions, my_positions, asset_index, copy_ratio=None):
+    """用一次 NumPy 计算筛掉确定不需要任何操作的币种，其余交给 plan_coin
+
+    可以跳过的币种：双方方向、杠杆一致且大小在容忍度内，或目标没有需要跟随的仓位且我方也没有仓位。
+    判断与 plan_coin 相同，但在边界附近留有 SCREEN_EPSILON 的余量，宁可多交给 plan_coin 也不漏掉需要操作的币种。
+    """
+    if not coins:
+        return []
+    if copy_ratio is None:
+        copy_ratio = COPY_NOTIONAL_RATIO
+    rows = []
+    for coin in coins:
+        target_position = target_positions.get(coin)
+        my_position = my_positions.get(coin)
+        asset_info = asset_index.get(coin)
+        rows.append((
+            float(all_mids.get(coin, 0)),
+            float(target_position["szi"]) if target_position else 0.0,
+            int(target_position["leverage"]["value"]) if target_position else 0,
+            float(my_position["szi"]) if my_position else 0.0,
+            int(my_position["leverage"]["value"]) if my_position else 0,
+            asset_info.sz_decimals if asset_info else -1,
+        ))
+    mid, target_szi, target_leverage, my_szi, my_leverage, sz_decimals = np.array(rows).T
+
+    my_target_notional = np.abs(target_szi) * copy_ratio * mid
+    follow = (target_szi != 0) & (my_target_notional >= MIN_NOTIONAL_VALUE * (1 + SCREEN_EPSILON))
+    ignore = (target_szi == 0) | (my_target_notional < MIN_NOTIONAL_VALUE * (1 - SCREEN_EPSILON))
+    scale = 10.0 ** np.maximum(sz_decimals, 0)
+    rounded = np.round(np.abs(target_szi) * copy_ratio * scale) / scale
+    in_sync = (
+        follow
+        & (rounded > 0)
+        & (np.sign(my_szi) == np.sign(target_szi))
+        & (my_leverage == target_leverage)
+        & (np.abs(np.abs(my_szi) - rounded) <= rounded * SZI_TOLERANCE_RATIO * (1 - SCREEN_EPSILON))
+    )
+    flat = ignore & (my_szi == 0)
+    skip = (mid > 0) & (sz_decimals >= 0) & (in_sync | flat)
+    return [coin for coin, skipped in zip(coins, skip.tolist()) if not skipped]
+
+def sync_coins(exchange, all_mids, target_user_state, my_user_state, coins, asset_index, follower=None):
+    """对一组币种先统一规划，再一次性执行。每个 user_state 只建立一次 coin -> position 索引
+
+    coins 为 None 时处理任一方持有仓位的全部币种。screen_coins 一次筛掉已经同步的币种，只有剩下的币种进入 plan_coin。
+    扇出模式下 follower 提供该账户的跟单比例与日志，否则使用全局设置。返回 execute_plan 确认的币种集合。
+    """
+    if follower is not None:
+        copy_ratio, order_journal = follower.copy_ratio, follower.journal
+        prefix = f"[{follower.label}] "
     else:
-        my_direction_is_buy = float(my_position["szi"]) > 0
-        my_leverage = int(my_position["leverage"]["value"])
-        my_szi_abs = abs(float(my_position["szi"]))
+        copy_ratio, order_journal = COPY_NOTIONAL_RATIO, _journal
+        prefix = ""
+    if order_journal is not None:
+        order_journal.record_snapshot(snapshot.position_signature(target_user_state, coins))
+    with metrics.span("plan"):
+        target_positions = snapshot.index_positions(target_user_state)
+        my_positions = snapshot.index_positions(my_user_state)
+        if coins is None:
+            coins = sorted(set(target_positions) | set(my_positions))
+        if order_journal is not None and order_journal.unresolved_coins:
+            logging.warning(f"{prefix}Skipping {sorted(order_journal.unresolved_coins)} this cycle: journaled orders with unknown outcome")
+            coins = [coin for coin in coins if coin not in order_journal.unresolved_coins]
+        active = screen_coins(coins, all_mids, target_positions, my_positions, asset_index, copy_ratio)
+        logging.info(f"--- {prefix}Processing {len(active)} of {len(coins)} coins ({len(coins) - len(active)} in sync) ---")
+        actions = []
+        for coin in active:
+            actions.extend(plan_coin(all_mids, target_positions, my_positions, coin, asset_index, copy_ratio))
+    for action in actions:
+        if action["type"] == "order":
+            tradelog.event("plan", action["coin"], "B" if action["is_buy"] else "A", action["sz"], action["limit_px"], action["reduce_only"], msg=action["msg"])
+        else:
+            tradelog.event("plan", action["coin"], msg=action["msg"])
+    with metrics.span("execute"):
+        return execute_plan(exchange, actions, order_journal, asset_index)
 
-        if my_direction_is_buy == target_direction_is_buy and my_leverage == target_leverage:
-            szi_diff = abs(my_szi_abs - rounded_my_target_szi_abs)
-            szi_tolerance = rounded_my_target_szi_abs * SZI_TOLERANCE_RATIO
+def fetch_cycle_states(info, my_address, all_mids=None):
+    """并发获取中间价、所有目标地址与我方账户的状态，返回 (all_mids, 按权重合并后的目标状态, 我方状态)
 
-            if szi_diff <= szi_tolerance:
-                my_position_value = my_szi_abs * mid_price
-                logging.info(f"{coin} position is in sync with target. My notional value: ${my_position_value:,.2f}")
+    传入 all_mids 时 (流式模式已有中间价) 不再请求中间价。开启 --record 时本轮快照会被追加到记录中。
+    日志中有尚未确认的订单 (例如崩溃重启后) 时，同时按 cloid 查询它们是否已经成交。
+    """
+    portfolio.reserve_workers(len(TARGET_WEIGHTS) + 2 + (len(_journal.pending) if _journal is not None else 0))
+    pending_futures = _journal.submit_pending_queries(info, portfolio.submit) if _journal is not None else None
+    mids_future = portfolio.submit(metrics.timed("all_mids", info.all_mids)) if all_mids is None else None
+    addresses = list(TARGET_WEIGHTS)
+    target_futures = [portfolio.submit(metrics.timed("user_state.target", info.user_state), a) for a in addresses]
+    my_future = portfolio.submit(metrics.timed("user_state.self", info.user_state), my_address)
+    target_states = [future.result() for future in target_futures]
+    my_user_state = my_future.result()
+    target_user_state = portfolio.blend_target_states(target_states, [TARGET_WEIGHTS[a] for a in addresses])
+    if mids_future is not None:
+        all_mids = mids_future.result()
+    if _recorder is not None:
+        _recorder.record_cycle(all_mids, dict(zip(addresses + [my_address], target_states + [my_user_state])))
+    if pending_futures:
+        _journal.resolve_pending(pending_futures)
+    return all_mids, target_user_state, my_user_state
+
+def sync_follower(follower, all_mids, target_user_state, my_user_state, coins, asset_index):
+    tradelog.set_account(follower.address)
+    try:
+        return sync_coins(follower.exchange, all_mids, target_user_state, my_user_state, coins, asset_index, follower)
+    finally:
+        tradelog.set_account(None)
+
+def run_followers(follower_list, all_mids, target_user_state, my_states, coins, asset_index):
+    """用已获取的状态同时同步所有跟随账户，单个账户出错不影响其他账户"""
+    futures = [
+        _follower_executor.submit(sync_follower, follower, all_mids, target_user_state, my_user_state, coins, asset_index)
+        for follower, my_user_state in zip(follower_list, my_states)
+    ]
+    for follower, future in zip(follower_list, futures):
+        try:
+            future.result()
+        except Exception as e:
+            logging.error(f"[{follower.label}] Sync failed: {e}", exc_info=True)
+
+def check_equity_after_first_sync(info, *addresses):
+    """--fast-start 时推迟到首轮同步之后执行的账户权益检查 (多个账户并发检查)，检查失败时抛出异常终止机器人"""
+    global _equity_check_pending
+    if not _equity_check_pending:
+        return
+    _equity_check_pending = False
+    logging.info("Running deferred account equity check...")
+    for future in [portfolio.submit(example_utils.check_equity, info, address) for address in addresses]:
+        future.result()
+
+class CopierStrategy(engine.Strategy):
+    """跟单逻辑的策略引擎插件：目标与我方账户的状态来自共享的 engine.MarketDataHub，插件本身不请求这些状态
+
+    follower_list 为 None 时同步 exchange / my_address 这一个账户 (使用 COPY_NOTIONAL_RATIO 与 _journal)，
+    否则同步每个跟随账户。target_weights 缺省为 TARGET_WEIGHTS；last_signature 为上一次的目标仓位签名 (例如从日志恢复)。
+    """
+
+    name = "ds_copier"
+
+    def __init__(self, info, exchange, my_address, coins, asset_index, follower_list=None, target_weights=None, last_signature=None):
+        self.info = info
+        self.exchange = exchange
+        self.my_address = my_address
+        self.coins = coins
+        self.asset_index = asset_index
+        self.follower_list = follower_list
+        self.target_weights = dict(target_weights or TARGET_WEIGHTS)
+        self.last_signature = last_signature
+        self._pending_queries = []
+
+    def account_addresses(self):
+        return [self.my_address] if self.follower_list is None else [f.address for f in self.follower_list]
+
+    def addresses(self):
+        roles = {address: "target" for address in self.target_weights}
+        roles.update((address, "self") for address in self.account_addresses())
+        return roles
+
+    def before_fetch(self):
+        # 只有崩溃重启后日志中才会有未确认的订单；按 cloid 查询与本轮状态请求并发执行，结果在 _sync 中处理
+        journals = [_journal] if self.follower_list is None else [f.journal for f in self.follower_list]
+        self._pending_queries = [
+            (order_journal, order_journal.submit_pending_queries(self.info, portfolio.submit))
+            for order_journal in journals if order_journal is not None and order_journal.pending
+        ]
+
+    def on_snapshot(self, data):
+        try:
+            return self._sync(data)
+        finally:
+            self._check_equity()
+
+    def _sync(self, data):
+        pending_queries, self._pending_queries = self._pending_queries, []
+        for order_journal, futures in pending_queries:
+            order_journal.resolve_pending(futures)
+        target_addresses = list(self.target_weights)
+        target_user_state = portfolio.blend_target_states(
+            [data.user_state(a) for a in target_addresses], [self.target_weights[a] for a in target_addresses],
+        )
+        book_futures = {}
+        if _recorder is not None and _record_books:
+            # 盘口与本轮同步并发获取，同步结束后与快照一起记录
+            book_coins = self.coins if self.coins is not None else sorted(snapshot.index_positions(target_user_state))
+            book_futures = {coin: portfolio.submit(metrics.timed("l2_book", self.info.l2_snapshot), coin) for coin in book_coins}
+        elif _recorder is not None:
+            _recorder.record_cycle(data.all_mids, {a: data.user_state(a) for a in self.addresses()})
+        signature = snapshot.position_signature(target_user_state, self.coins)
+        target_changed = self.last_signature is not None and signature != self.last_signature
+        self.last_signature = signature
+        try:
+            if self.follower_list is None:
+                sync_coins(self.exchange, data.all_mids, target_user_state, data.user_state(self.my_address), self.coins, self.asset_index)
             else:
-                logging.warning(f"{coin} position size mismatch! (My: {my_szi_abs:.5f}, Target should be: {rounded_my_target_szi_abs:.5f}). Re-syncing.")
-                action_msg = f"Closing {coin} to re-sync position size."
-                close_result = execute_action(action_msg, exchange.market_close, coin)
-                logging.info(f"Close result: {json.dumps(close_result)}")
+                my_states = [data.user_state(f.address) for f in self.follower_list]
+                run_followers(self.follower_list, data.all_mids, target_user_state, my_states, self.coins, self.asset_index)
+        finally:
+            if book_futures:
+                books = {coin: future.result() for coin, future in book_futures.items()}
+                _recorder.record_cycle(data.all_mids, {a: data.user_state(a) for a in self.addresses()}, books=books)
+        return target_changed
+
+    def _check_equity(self):
+        try:
+            check_equity_after_first_sync(self.info, *self.account_addresses())
+        except Exception as e:
+            logging.critical(f"Deferred account equity check failed, stopping {self.name}: {e}")
+            self.done = True
+
+def run_stream_loop(exchange, info, my_address, asset_index):
+    """事件驱动的同步循环：只在目标成交后处理发生变化的币种，并定期用 REST 全量对账
+
+    WebSocket 超过 ds_stream.STALE_SECONDS 没有消息时视为断开：尝试重连，并在恢复之前按轮询模式的自适应间隔做 REST 全量同步。
+    """
+    stream = ds_stream.TargetStream(info, list(TARGET_WEIGHTS), TARGET_COINS)
+    stream.start()
+    logging.info(f"Subscribed to target fills and mids. Full REST reconcile every {RECONCILE_SECONDS} seconds.")
+
+    last_reconcile = 0.0
+    consecutive_errors = 0
+    # 流断开期间的轮询调度器，只使用它的间隔
+    fallback = None
+    last_signature = None
+    while True:
+        silent = stream.silent_seconds()
+        if silent > ds_stream.STALE_SECONDS:
+            if fallback is None:
+                logging.warning(f"No WebSocket message for {silent:.0f}s, polling over REST until the stream recovers")
+                fallback = scheduler.AdaptiveScheduler(
+                    LOOP_FLOOR_SECONDS, LOOP_CEILING_SECONDS, mid_move_threshold=MID_MOVE_THRESHOLD, coins=TARGET_COINS, transport=_transport,
+                )
+                last_reconcile = 0.0
+            if stream.reconnect():
+                logging.warning("Reconnecting the WebSocket stream")
+        elif fallback is not None:
+            logging.info("WebSocket stream recovered, back to event-driven sync")
+            fallback = None
+        interval = RECONCILE_SECONDS if fallback is None else fallback.interval
+        # 至少每 HEALTH_CHECK_SECONDS 醒来一次检查连接状态
+        timeout = min(max(0.0, last_reconcile + interval - time.time()), ds_stream.HEALTH_CHECK_SECONDS)
+        changed = stream.wait_for_changes(timeout)
+        reconcile = time.time() - last_reconcile >= interval
+        if reconcile:
+            coins = TARGET_COINS
         else:
-            policy_mismatches = []
-            if my_direction_is_buy != target_direction_is_buy:
-                policy_mismatches.append(f"direction (Me: {'Long' if my_direction_is_buy else 'Short'}, Target: {'Long' if target_direction_is_buy else 'Short'})")
-            if my_leverage != target_leverage:
-                policy_mismatches.append(f"leverage (Me: {my_leverage}x, Target: {target_leverage}x)")
-            
-            logging.warning(f"{coin} position policy mismatch! Mismatches: {', '.join(policy_mismatches)}. Re-syncing.")
-            action_msg = f"Closing {coin} to re-sync position policy."
-            close_result = execute_action(action_msg, exchange.market_close, coin)
-            logging.info(f"Close result: {json.dumps(close_result)}")
+            coins = [coin for coin in (changed if TARGET_COINS is None else TARGET_COINS) if coin in changed]
+            if not coins:
+                continue
+
+        if reconcile:
+            logging.info(f"----- {time.strftime('%Y-%m-%d %H:%M:%S')} - Starting REST {'reconcile' if fallback is None else 'poll (stream silent)'} -----")
+        else:
+            logging.info(f"----- {time.strftime('%Y-%m-%d %H:%M:%S')} - Target fills on {coins} -----")
+        try:
+            stream_mids = stream.mids_snapshot()
+            if reconcile or any(coin not in stream_mids for coin in coins):
+                stream_mids = None
+            with metrics.span("cycle"):
+                with metrics.span("fetch"):
+                    all_mids, target_user_state, my_user_state = fetch_cycle_states(info, my_address, stream_mids)
+                acked_coins = sync_coins(exchange, all_mids, target_user_state, my_user_state, coins, asset_index)
+            # 只统计本轮确实发出并被确认了订单的币种，仓位已在容差内或低于最小名义价值的信号不计入延迟
+            for coin, signal in changed.items():
+                if coin in acked_coins:
+                    ds_stream.log_signal_latency(coin, signal)
+            if reconcile:
+                last_reconcile = time.time()
+                signature = snapshot.position_signature(target_user_state, TARGET_COINS)
+                if fallback is not None:
+                    fallback.observe(last_signature is not None and signature != last_signature, all_mids)
+                last_signature = signature
+            consecutive_errors = 0
+        except Exception as e:
+            # REST 不可用时按指数退避等待，避免空转耗尽请求额度；恢复后先做一次全量对账，补上本轮丢失的信号
+            consecutive_errors += 1
+            delay = min(LOOP_FLOOR_SECONDS * 2 ** (consecutive_errors - 1), LOOP_CEILING_SECONDS)
+            logging.error(f"An error occurred during the sync cycle, retrying in {delay:.0f}s: {e}", exc_info=True)
+            time.sleep(delay)
+            last_reconcile = 0.0
+        check_equity_after_first_sync(info, my_address)
 
 def main():
-    global DRY_RUN
+    global DRY_RUN, PAPER, TARGET_WEIGHTS, TARGET_COINS, REBALANCE_MODE, _equity_check_pending, _recorder, _record_books, _transport, _journal
     
     parser = argparse.ArgumentParser(description="A simple copy trading bot for Hyperliquid.")
     parser.add_argument('--live', action='store_true', help='Run the bot in live trading mode. Default is dry run.')
+    parser.add_argument('--paper', action='store_true', help='Keep running without trading: orders fill against live L2 books on an in-process paper account whose state feeds the next cycle.')
+    parser.add_argument('--paper-equity', type=float, default=PAPER_EQUITY_USD, help='Starting equity of the paper account in USD.')
+    parser.add_argument('--stream', action='store_true', help='Follow the target through WebSocket fills instead of polling on the adaptive schedule.')
+    parser.add_argument('--floor', type=float, default=LOOP_FLOOR_SECONDS, help='Shortest polling interval in seconds, used right after the target trades or mids move sharply.')
+    parser.add_argument('--ceiling', type=float, default=LOOP_CEILING_SECONDS, help='Longest polling interval in seconds, reached by backing off while the target is idle.')
+    parser.add_argument('--rebalance', choices=['delta', 'close'], default=REBALANCE_MODE, help='How to fix a size mismatch: order only the delta, or close and reopen next cycle.')
+    parser.add_argument('--all-coins', action='store_true', help='Follow every coin the target holds instead of TARGET_COINS.')
+    parser.add_argument('--targets', help='JSON file of {address: weight} to follow several targets at once. Default is TARGET_WEIGHTS.')
+    parser.add_argument('--fan-out', action='store_true', help='Also copy into every account under "followers" in config.json, fetching the target once per cycle.')
+    parser.add_argument('--sign-workers', type=int, help='Sign fan-out orders in this many worker processes instead of in threads. Only pays off on multi-core machines; see bench_fanout.py.')
+    parser.add_argument('--fast-start', action='store_true', help='Defer the account equity check until after the first sync to shorten time-to-first-order.')
+    parser.add_argument('--record', metavar='DIR', help='Append every fetched all_mids/user_state snapshot to a columnar recording for replay.py.')
+    parser.add_argument('--record-books', action='store_true', help='With --record in polling mode, also record the L2 book of every followed coin each cycle so replay.py --paper can fill against it.')
+    parser.add_argument('--journal', default=journal.JOURNAL_PATH, help='Crash-safe journal of target snapshots and order intents used to resume after a restart (live mode only).')
+    parser.add_argument('--trade-log', default=TRADE_LOG_PATH, help='Compact JSONL log of every planned action, leverage update and order result.')
+    parser.add_argument('--debug', action='store_true', help='Also log per-coin sizing details at DEBUG level.')
+    parser.add_argument('--metrics-port', type=int, help='Serve Prometheus-style latency metrics on http://127.0.0.1:PORT/metrics.')
+    parser.add_argument('--metrics-file', help='Append a JSONL latency snapshot to this file every METRICS_FLUSH_SECONDS.')
+    parser.add_argument('--base-url', default=constants.MAINNET_API_URL, help='API base URL, e.g. a local stand-in server started with local_server.py.')
     args = parser.parse_args()
+    if args.fan_out and args.stream:
+        parser.error("--fan-out is only supported in polling mode")
+    if args.record_books and (not args.record or args.stream):
+        parser.error("--record-books needs --record and polling mode")
+    if args.paper and (args.live or args.stream or args.fan_out):
+        parser.error("--paper cannot be combined with --live, --stream or --fan-out")
 
     DRY_RUN = not args.live
+    PAPER = args.paper
+    REBALANCE_MODE = args.rebalance
+    if args.all_coins:
+        TARGET_COINS = None
+    # 纸面账户不需要真实权益
+    _equity_check_pending = args.fast_start and not PAPER
 
     # --- Logging Setup ---
-    logger = logging.getLogger()
-    logger.setLevel(logging.INFO)
-    
-    if logger.hasHandlers():
-        logger.handlers.clear()
-        
-    fh = logging.FileHandler('ds_copier.log', mode='a')
-    fh.setLevel(logging.INFO)
-    
-    ch = logging.StreamHandler()
-    ch.setLevel(logging.INFO)
-    
-    formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
-    fh.setFormatter(formatter)
-    ch.setFormatter(formatter)
-    
-    logger.addHandler(fh)
-    logger.addHandler(ch)
+    # 日志经队列交给后台线程格式化与写盘，ds_copier.log 与交易日志都按大小轮转
+    tradelog.setup_logging('ds_copier.log', args.trade_log, level=logging.DEBUG if args.debug else logging.INFO)
 
     logging.info("--- DS Copier Bot V2 Initializing ---")
-    if DRY_RUN:
+    if args.metrics_port:
+        metrics.start_http_server(args.metrics_port)
+        logging.info(f"Serving latency metrics on http://127.0.0.1:{args.metrics_port}/metrics")
+    if args.metrics_file:
+        metrics.start_jsonl_writer(args.metrics_file, METRICS_FLUSH_SECONDS)
+        logging.info(f"Writing latency metrics to {args.metrics_file} every {METRICS_FLUSH_SECONDS} seconds")
+    if PAPER:
+        logging.warning(f"--- Bot is running in [PAPER] mode on a simulated ${args.paper_equity:,.2f} account. No real trades will be executed. ---")
+    elif DRY_RUN:
         logging.warning("--- Bot is running in [DRY RUN] mode. No real trades will be executed. ---")
         logging.warning("--- To run in live mode, use the --live flag: python ds_copier_v2.py --live ---")
     else:
         logging.critical("--- ‼️ BOT IS RUNNING IN [LIVE] MODE. REAL TRADES WILL BE EXECUTED. ‼️ ---")
     
+    # 启动时的 meta / spotMeta / 权益检查请求也经过传输层，瞬时错误会被重试并计入请求权重预算
+    _transport = transport.Transport()
     try:
-        my_address, info, exchange = example_utils.setup(base_url=constants.MAINNET_API_URL)
+        cached_meta, cached_spot_meta = snapshot.read_meta_cache(args.base_url, TARGET_COINS or ())
+        my_address, info, exchange, meta_data, spot_meta = example_utils.fast_setup(
+            base_url=args.base_url,
+            skip_ws=not args.stream,
+            meta=cached_meta,
+            spot_meta=cached_spot_meta,
+            defer_equity_check=args.fast_start or PAPER,
+            transport=_transport,
+        )
     except Exception as e:
         logging.error(f"Failed to setup connection: {e}", exc_info=True)
         return
     
     logging.info(f"My Account Address: {my_address}")
-    logging.info(f"Target Account Address: {TARGET_USER_ADDRESS}")
+    if args.targets:
+        try:
+            TARGET_WEIGHTS = portfolio.load_target_weights(args.targets)
+        except Exception as e:
+            logging.error(f"Failed to load targets file: {e}", exc_info=True)
+            return
+    logging.info(f"Target Accounts ({len(TARGET_WEIGHTS)}):")
+    for address, weight in TARGET_WEIGHTS.items():
+        logging.info(f"  - {address} (weight {weight})")
     logging.info(f"Copy Ratio: {COPY_NOTIONAL_RATIO*100:.4f}% of target's notional value.")
     logging.info(f"SZI Tolerance: {SZI_TOLERANCE_RATIO*100}%")
-    logging.info(f"Monitored Coins: {TARGET_COINS}")
+    logging.info(f"Rebalance Mode: {REBALANCE_MODE}")
+    logging.info(f"Monitored Coins: {'all coins the target holds' if TARGET_COINS is None else TARGET_COINS}")
     
     try:
-        logging.info("Fetching exchange metadata...")
-        meta_data = info.meta()
+        if cached_meta is not None:
+            logging.info(f"Loaded exchange metadata from cache {snapshot.META_CACHE_PATH}")
+        else:
+            snapshot.write_meta_cache(args.base_url, meta_data, spot_meta)
+        asset_index = snapshot.AssetIndex(meta_data)
+        if not DRY_RUN:
+            _journal = journal.Journal(args.journal, my_address)
+            logging.info(f"Journal {args.journal}: batch {_journal.seq}, {len(_journal.pending)} unacknowledged orders to check")
+        if args.record:
+            import recorder
+            _recorder = recorder.SnapshotRecorder(args.record, meta_data, TARGET_WEIGHTS)
+            _record_books = args.record_books
+            logging.info(f"Recording snapshots{' and L2 books' if _record_books else ''} to {args.record}")
         logging.info("Target coin size decimals (szDecimals) check:")
-        for coin in TARGET_COINS:
-            asset_info = next((item for item in meta_data["universe"] if item["name"] == coin), None)
+        for coin in TARGET_COINS or []:
+            asset_info = asset_index.get(coin)
             if asset_info:
-                logging.info(f"  - {coin}: {asset_info['szDecimals']} decimals")
+                logging.info(f"  - {coin}: {asset_info.sz_decimals} decimals")
             else:
                 logging.warning(f"  - {coin}: Could not find metadata!")
     except Exception as e:
         logging.error(f"Failed to fetch metadata: {e}", exc_info=True)
         return
 
+    follower_list = None
+    signing_pool = None
+    if args.fan_out:
+        try:
+            follower_list = [followers.Follower(my_address, exchange, COPY_NOTIONAL_RATIO, _journal)]
+            follower_list += followers.load_followers(args.base_url, meta_data, spot_meta, COPY_NOTIONAL_RATIO)
+            for follower in follower_list[1:]:
+                _transport.install(follower.exchange, follower.exchange.info)
+                if not DRY_RUN:
+                    follower.journal = journal.Journal(journal.account_path(args.journal, follower.address), follower.address)
+            if not args.fast_start:
+                for future in [portfolio.submit(example_utils.check_equity, info, f.address) for f in follower_list[1:]]:
+                    future.result()
+            if not DRY_RUN and len(follower_list) > 1 and args.sign_workers:
+                signing_pool = orders.SigningPool([f.exchange.wallet for f in follower_list], args.sign_workers)
+                orders.set_signing_pool(signing_pool)
+        except Exception as e:
+            logging.error(f"Failed to set up follower accounts: {e}", exc_info=True)
+            return
+        logging.info(f"Fan-out to {len(follower_list)} follower accounts:")
+        for follower in follower_list:
+            logging.info(f"  - {follower.address} (copy ratio {follower.copy_ratio*100:.4f}%)")
+
     try:
-        if DRY_RUN:
-            logging.info(f"----- {time.strftime('%Y-%m-%d %H:%M:%S')} - Starting single simulation run -----")
-            all_mids = info.all_mids()
-            target_user_state = info.user_state(TARGET_USER_ADDRESS)
-            my_user_state = info.user_state(my_address)
-            for coin in TARGET_COINS:
-                process_coin(exchange, info, all_mids, my_address, target_user_state, my_user_state, coin, meta_data)
-            logging.info("----- Simulation run finished. -----")
+        if args.stream:
+            run_stream_loop(exchange, info, my_address, asset_index)
         else:
-            while True:
-                logging.info(f"----- {time.strftime('%Y-%m-%d %H:%M:%S')} - Starting new synchronization cycle -----")
-                try:
-                    all_mids = info.all_mids()
-                    target_user_state = info.user_state(TARGET_USER_ADDRESS)
-                    my_user_state = info.user_state(my_address)
-                    for coin in TARGET_COINS:
-                        process_coin(exchange, info, all_mids, my_address, target_user_state, my_user_state, coin, meta_data)
-                except Exception as e:
-                    logging.error(f"An error occurred during the sync cycle: {e}", exc_info=True)
-                
-                logging.info(f"Cycle finished. Waiting for {LOOP_SLEEP_SECONDS} seconds...")
-                time.sleep(LOOP_SLEEP_SECONDS)
+            if PAPER:
+                # 纸面账户替代真实账户：订单在本进程内按实时 L2 盘口成交，其状态作为下一轮的 my_user_state
+                exchange = paper_exchange.PaperExchange(asset_index, args.paper_equity, metrics.timed("l2_book", info.l2_snapshot))
+                hub = paper_exchange.PaperHub(info, {my_address: exchange})
+            else:
+                hub = engine.MarketDataHub(info)
+            copier = CopierStrategy(
+                info, exchange, my_address, TARGET_COINS, asset_index, follower_list,
+                last_signature=_journal.last_target if _journal is not None else None,
+            )
+            if DRY_RUN and not PAPER:
+                logging.info(f"----- {time.strftime('%Y-%m-%d %H:%M:%S')} - Starting single simulation run -----")
+                engine.StrategyEngine(hub, [copier]).tick()
+                logging.info("----- Simulation run finished. -----")
+            else:
+                cycle_scheduler = scheduler.AdaptiveScheduler(
+                    args.floor, args.ceiling, LOOP_SLEEP_SECONDS,
+                    mid_move_threshold=MID_MOVE_THRESHOLD, coins=TARGET_COINS, transport=_transport,
+                )
+                engine.StrategyEngine(hub, [copier], cycle_scheduler).run()
 
     except KeyboardInterrupt:
         logging.info("KeyboardInterrupt detected. Shutting down bot.")
     except Exception as e:
         logging.error(f"An unexpected critical error occurred: {e}", exc_info=True)
     finally:
+        if info.ws_manager is not None:
+            info.disconnect_websocket()
+        if _recorder is not None:
+            _recorder.close()
+        if _journal is not None:
+            _journal.close()
+        for follower in (follower_list or [])[1:]:
+            if follower.journal is not None:
+                follower.journal.close()
+        if signing_pool is not None:
+            signing_pool.shutdown()
+        if PAPER and isinstance(exchange, paper_exchange.PaperExchange):
+            paper_exchange.log_stats(exchange, my_address)
         logging.info("--- Bot has been terminated. ---")
 
 
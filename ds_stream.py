@@ -0,0 +1,144 @@
+import time
+import logging
+import threading
+from collections import deque
+
+from hyperliquid.websocket_manager import WebsocketManager
+
+import metrics
+
+# 去重用的最近成交 tid 数量 (userFills 与 userEvents 会推送同一笔成交)
+SEEN_FILLS_LIMIT = 1000
+
+# allMids 大约每秒推送一次；超过该秒数没有收到任何消息即认为连接已经断开。重连的最短间隔也是该值
+STALE_SECONDS = 30
+# 调用方检查连接状态的间隔
+HEALTH_CHECK_SECONDS = 5
+
+
+class TargetStream:
+    """通过 Info 的 WebSocket 订阅目标地址的成交事件与全市场中间价，记录仓位发生变化的币种 (coins 为 None 时不限币种)
+
+    SDK 的 WebsocketManager 在连接断开后不会重连，也不会通知调用方；silent_seconds() 返回距离上一条消息的秒数，
+    由调用方判断连接是否已经失效并调用 reconnect()。
+    """
+
+    def __init__(self, info, target_addresses, coins):
+        self.info = info
+        self.target_addresses = list(target_addresses)
+        self.coins = None if coins is None else set(coins)
+        self.all_mids = {}
+        self._lock = threading.Lock()
+        self._changed = {}
+        self._wakeup = threading.Event()
+        self._seen_tids = set()
+        self._seen_order = deque()
+        self._last_message_at = time.monotonic()
+        self._connected_at = time.monotonic()
+
+    def start(self):
+        """注册订阅。Info 必须以 skip_ws=False 创建"""
+        if self.info.ws_manager is None:
+            raise RuntimeError("Streaming mode requires an Info client created with skip_ws=False")
+        self._last_message_at = self._connected_at = time.monotonic()
+        self._subscribe()
+
+    def silent_seconds(self):
+        """距离上一条 allMids / 成交消息的秒数"""
+        return time.monotonic() - self._last_message_at
+
+    def reconnect(self):
+        """关闭当前连接，新建一个 WebsocketManager 并重新订阅。距离上次连接不足 STALE_SECONDS 时不做任何事，返回 False"""
+        now = time.monotonic()
+        if now - self._connected_at < STALE_SECONDS:
+            return False
+        self._connected_at = now
+        try:
+            self.info.ws_manager.stop()
+        except Exception as e:
+            logging.debug(f"Closing the stale WebSocket failed: {e}")
+        self.info.ws_manager = WebsocketManager(self.info.base_url)
+        self.info.ws_manager.start()
+        # 订阅在连接建立后由 WebsocketManager 发送
+        self._subscribe()
+        return True
+
+    def _subscribe(self):
+        self.info.subscribe({"type": "allMids"}, self._on_all_mids)
+        for address in self.target_addresses:
+            self.info.subscribe({"type": "userFills", "user": address}, self._on_user_fills)
+        # SDK 只允许订阅一次 userEvents，多目标时仅依赖 userFills
+        if len(self.target_addresses) == 1:
+            self.info.subscribe({"type": "userEvents", "user": self.target_addresses[0]}, self._on_user_events)
+
+    def _on_all_mids(self, msg):
+        mids = msg["data"]["mids"]
+        with self._lock:
+            self.all_mids.update(mids)
+            self._last_message_at = time.monotonic()
+
+    def _on_user_fills(self, msg):
+        self._last_message_at = time.monotonic()
+        data = msg["data"]
+        # 订阅建立时推送的是历史成交快照，与当前仓位变化无关
+        if data.get("isSnapshot"):
+            return
+        self._mark_fills(data.get("fills", []))
+
+    def _on_user_events(self, msg):
+        self._last_message_at = time.monotonic()
+        self._mark_fills(msg["data"].get("fills", []))
+
+    def _mark_fills(self, fills):
+        received_at = time.perf_counter()
+        marked = False
+        with self._lock:
+            for fill in fills:
+                coin = fill.get("coin")
+                if (self.coins is not None and coin not in self.coins) or not self._remember(fill.get("tid")):
+                    continue
+                fill_time_ms = int(fill.get("time", 0))
+                previous = self._changed.get(coin)
+                # 同一币种多笔成交只保留最早的一笔，延迟统计以最早的信号为准
+                if previous is None or fill_time_ms < previous["fill_time_ms"]:
+                    self._changed[coin] = {"fill_time_ms": fill_time_ms, "received_at": received_at}
+                marked = True
+        if marked:
+            self._wakeup.set()
+
+    def _remember(self, tid):
+        """记录成交 tid，已见过则返回 False"""
+        if tid is None:
+            return True
+        if tid in self._seen_tids:
+            return False
+        self._seen_tids.add(tid)
+        self._seen_order.append(tid)
+        if len(self._seen_order) > SEEN_FILLS_LIMIT:
+            self._seen_tids.discard(self._seen_order.popleft())
+        return True
+
+    def mids_snapshot(self):
+        """返回当前中间价的副本"""
+        with self._lock:
+            return dict(self.all_mids)
+
+    def wait_for_changes(self, timeout):
+        """阻塞直到目标有成交或超时，返回 {coin: signal} 并清空已记录的变化"""
+        self._wakeup.wait(timeout)
+        with self._lock:
+            changed = self._changed
+            self._changed = {}
+            self._wakeup.clear()
+        return changed
+
+
+def log_signal_latency(coin, signal):
+    """记录从目标成交 (交易所时间戳) 到我方订单被确认的延迟 (毫秒)，同时写入 metrics"""
+    now_ms = int(time.time() * 1000)
+    fill_to_order_ms = now_ms - signal["fill_time_ms"] if signal["fill_time_ms"] else float("nan")
+    receive_to_order_ms = (time.perf_counter() - signal["received_at"]) * 1000
+    if signal["fill_time_ms"]:
+        metrics.observe("target_fill_to_ack", fill_to_order_ms)
+    metrics.observe("ws_receive_to_ack", receive_to_order_ms)
+    logging.info(f"[LATENCY] {coin}: target fill -> order done {fill_to_order_ms:.0f} ms (ws receive -> order done {receive_to_order_ms:.1f} ms)")
@@ -0,0 +1,144 @@
+# 策略引擎：多个策略插件共享一个行情数据中心 (MarketDataHub)，在同一个进程中运行。
+#
+# 每个 tick 中心并发请求一次 allMids，以及所有策略关注的地址的 user_state (每个不同的地址只请求一次)，
+# 然后把同一个 Snapshot 交给每个策略的 on_snapshot。请求量只随不同地址的数量增长，与策略数量无关。
+# 轮询间隔由一个共享的 scheduler.AdaptiveScheduler 决定：任一策略报告目标仓位变化时回到最短间隔。
+
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+import metrics
+import portfolio
+
+# 同时执行 on_snapshot 的最大策略数
+MAX_STRATEGY_WORKERS = 8
+
+_executor = ThreadPoolExecutor(max_workers=MAX_STRATEGY_WORKERS, thread_name_prefix="strategy")
+
+
+class Snapshot:
+    """一个 tick 的行情快照：中间价与各地址的 user_state (地址不区分大小写)"""
+
+    def __init__(self, tick, fetched_at, all_mids, user_states):
+        self.tick = tick
+        self.fetched_at = fetched_at
+        self.all_mids = all_mids
+        self._user_states = user_states
+
+    def user_state(self, address):
+        return self._user_states[address.lower()]
+
+    def set_user_state(self, address, user_state):
+        self._user_states[address.lower()] = user_state
+
+
+class Strategy:
+    """策略插件基类
+
+    addresses() 返回策略需要的 {地址: 角色}，角色为 "target" (跟随的目标) 或 "self" (自己的账户)，
+    各角色的请求耗时分别记入 user_state.<角色>；coins 为关注的币种 (None 表示全部)，用于判断中间价波动。
+    before_fetch() 在数据中心请求本轮状态之前被调用，可以提交需要与状态请求并发执行的请求。
+    on_snapshot(snapshot) 在每个 tick 被调用，返回 True 表示目标仓位发生了变化。把 done 设为 True 后策略不再被调用。
+    """
+
+    name = "strategy"
+    coins = None
+    done = False
+
+    def addresses(self):
+        raise NotImplementedError
+
+    def before_fetch(self):
+        pass
+
+    def on_snapshot(self, snapshot):
+        raise NotImplementedError
+
+
+class MarketDataHub:
+    """每个 tick 对 allMids 与每个不同的地址各请求一次"""
+
+    def __init__(self, info):
+        self.info = info
+        self.tick = 0
+        self.requests_last_tick = 0
+
+    def fetch(self, addresses):
+        """addresses 为 {地址: 角色}；同一地址可能以不同大小写出现在多个策略中，只请求一次并沿用第一次出现时的角色"""
+        roles = {}
+        for address, role in addresses.items():
+            roles.setdefault(address.lower(), role)
+        unique = list(roles)
+        portfolio.reserve_workers(len(unique) + 1)
+        mids_future = portfolio.submit(metrics.timed("all_mids", self.info.all_mids))
+        state_futures = [portfolio.submit(metrics.timed(f"user_state.{roles[address]}", self.info.user_state), address) for address in unique]
+        user_states = {address: future.result() for address, future in zip(unique, state_futures)}
+        self.tick += 1
+        self.requests_last_tick = len(unique) + 1
+        return Snapshot(self.tick, time.time(), mids_future.result(), user_states)
+
+
+class StrategyEngine:
+    """用共享的数据中心与调度器驱动一组策略，直到所有策略都结束"""
+
+    def __init__(self, hub, strategies, cycle_scheduler=None):
+        self.hub = hub
+        self.strategies = list(strategies)
+        self.scheduler = cycle_scheduler
+
+    def active(self):
+        return [strategy for strategy in self.strategies if not strategy.done]
+
+    def tick(self):
+        """获取一次快照并交给所有未结束的策略，返回 (snapshot, 是否有策略报告目标变化)"""
+        strategies = self.active()
+        addresses = {}
+        for strategy in strategies:
+            for address, role in strategy.addresses().items():
+                addresses.setdefault(address, role)
+        with metrics.span("fetch"):
+            for strategy in strategies:
+                strategy.before_fetch()
+            snapshot = self.hub.fetch(addresses)
+        if len(strategies) == 1:
+            results = [self._run(strategies[0], snapshot)]
+        else:
+            # 各策略的下单互不等待
+            futures = [_executor.submit(self._run, strategy, snapshot) for strategy in strategies]
+            results = [future.result() for future in futures]
+        return snapshot, any(results)
+
+    def _run(self, strategy, snapshot):
+        try:
+            return bool(strategy.on_snapshot(snapshot))
+        except Exception as e:
+            # 单个策略出错不影响其他策略，下一个 tick 照常调用
+            logging.error(f"Strategy {strategy.name} failed on tick {snapshot.tick}: {e}", exc_info=True)
+            return False
+
+    def watched_coins(self):
+        """所有策略关注的币种；任一策略关注全部币种时返回 None"""
+        coins = set()
+        for strategy in self.active():
+            if strategy.coins is None:
+                return None
+            coins.update(strategy.coins)
+        return sorted(coins)
+
+    def run(self):
+        while self.active():
+            logging.info(f"----- {time.strftime('%Y-%m-%d %H:%M:%S')} - Starting new synchronization cycle -----")
+            target_changed, all_mids = False, None
+            try:
+                with metrics.span("cycle"):
+                    snapshot, target_changed = self.tick()
+                all_mids = snapshot.all_mids
+            except Exception as e:
+                logging.error(f"An error occurred during the sync cycle: {e}", exc_info=True)
+            if not self.active():
+                break
+            self.scheduler.coins = self.watched_coins()
+            self.scheduler.observe(target_changed, all_mids)
+            self.scheduler.wait()
+        logging.info("All strategies have finished.")
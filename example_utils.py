@@ -1,15 +1,55 @@
 import getpass
 import json
 import os
+from concurrent.futures import ThreadPoolExecutor
 
 import eth_account
 from eth_account.signers.local import LocalAccount
 
+from hyperliquid.api import API
 from hyperliquid.exchange import Exchange
 from hyperliquid.info import Info
 
 
 def setup(base_url=None, skip_ws=False, perp_dexs=None):
+    address, account = load_account()
+    info = Info(base_url, skip_ws, perp_dexs=perp_dexs)
+    check_equity(info, address)
+    exchange = Exchange(account, base_url, account_address=address, perp_dexs=perp_dexs)
+    return address, info, exchange
+
+
+def fast_setup(base_url=None, skip_ws=False, meta=None, spot_meta=None, defer_equity_check=False, perp_dexs=None, transport=None):
+    # Same as setup, but the startup requests (meta, spotMeta and the two equity checks) are sent
+    # concurrently, and the resulting metadata is shared by Info and Exchange so neither fetches it again.
+    # Pass cached meta / spot_meta to skip those requests entirely. With defer_equity_check the caller is
+    # expected to call check_equity(info, address) itself, e.g. after its first sync. perp_dexs is passed to
+    # Info and Exchange as in setup; meta / spot_meta only cover the default dex, the SDK fetches the others.
+    # A transport.Transport is installed on every client before it sends anything, so the startup requests
+    # are retried and counted against the request-weight budget like the rest (the SDK's own fetches for
+    # other perp_dexs happen inside the Info constructor and still go out directly).
+    address, account = load_account()
+    api = API(base_url)
+    if transport is not None:
+        transport.install(api)
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        meta_future = pool.submit(api.post, "/info", {"type": "meta", "dex": ""}) if meta is None else None
+        spot_meta_future = pool.submit(api.post, "/info", {"type": "spotMeta"}) if spot_meta is None else None
+        equity_future = None if defer_equity_check else pool.submit(check_equity, api, address)
+        if meta_future is not None:
+            meta = meta_future.result()
+        if spot_meta_future is not None:
+            spot_meta = spot_meta_future.result()
+        if equity_future is not None:
+            equity_future.result()
+    info = Info(base_url, skip_ws, meta=meta, spot_meta=spot_meta, perp_dexs=perp_dexs)
+    exchange = Exchange(account, base_url, meta=meta, account_address=address, spot_meta=spot_meta, perp_dexs=perp_dexs)
+    if transport is not None:
+        transport.install(info, exchange, exchange.info)
+    return address, info, exchange, meta, spot_meta
+
+
+def load_account():
     config_path = os.path.join(os.path.dirname(__file__), "config.json")
     with open(config_path) as f:
         config = json.load(f)
@@ -20,17 +60,41 @@ def setup(base_url=None, skip_ws=False, perp_dexs=None):
     print("Running with account address:", address)
     if address != account.address:
         print("Running with agent address:", account.address)
-    info = Info(base_url, skip_ws, perp_dexs=perp_dexs)
-    user_state = info.user_state(address)
-    spot_user_state = info.spot_user_state(address)
+    return address, account
+
+
+def load_follower_accounts():
+    # Extra accounts listed under "followers" in config.json, used by fan-out mode. Each entry takes the same
+    # secret_key / keystore_path / account_address fields as the top level, plus an optional vault_address
+    # for a sub-account. An entry with neither key field signs with the top-level key.
+    config_path = os.path.join(os.path.dirname(__file__), "config.json")
+    with open(config_path) as f:
+        config = json.load(f)
+    followers = []
+    for entry in config.get("followers", []):
+        if entry.get("secret_key") or entry.get("keystore_path"):
+            account: LocalAccount = eth_account.Account.from_key(get_secret_key({"secret_key": "", **entry}))
+        else:
+            account = eth_account.Account.from_key(get_secret_key(config))
+        address = entry.get("account_address") or account.address
+        print("Loaded follower account:", entry.get("vault_address") or address)
+        followers.append((address, account, entry))
+    return followers
+
+
+def check_equity(api, address):
+    # api may be an Info or a bare API client; both requests are sent concurrently.
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        user_state_future = pool.submit(api.post, "/info", {"type": "clearinghouseState", "user": address, "dex": ""})
+        spot_user_state_future = pool.submit(api.post, "/info", {"type": "spotClearinghouseState", "user": address})
+        user_state = user_state_future.result()
+        spot_user_state = spot_user_state_future.result()
     margin_summary = user_state["marginSummary"]
     if float(margin_summary["accountValue"]) == 0 and len(spot_user_state["balances"]) == 0:
         print("Not running the example because the provided account has no equity.")
-        url = info.base_url.split(".", 1)[1]
+        url = api.base_url.split(".", 1)[1]
         error_string = f"No accountValue:\nIf you think this is a mistake, make sure that {address} has a balance on {url}.\nIf address shown is your API wallet address, update the config to specify the address of your account, not the address of the API wallet."
         raise Exception(error_string)
-    exchange = Exchange(account, base_url, account_address=address, perp_dexs=perp_dexs)
-    return address, info, exchange
 
 
 def get_secret_key(config):
@@ -0,0 +1,164 @@
+# 下单快速路径检查：执行阶段不产生任何 /info 请求，每个操作只发送一个签名请求。
+#
+#   python fastpath_harness.py
+#
+# 使用真实的 SDK Exchange (订单真实签名)，但 exchange.info 换成只计数的 CountingInfo，_post_action 只记录 action。
+# 依次检查：SDK 的 market_open / market_close 会额外请求多少次 /info (作为对照)；btc_follow_bot_v1 的各个分支
+# 与 ds_copier_v2.sync_coins 在执行期间的 /info 请求数必须为 0；orders.order_wire 与 SDK 构造的订单 wire 完全一致。
+# 任一检查失败时抛出 AssertionError。
+
+import io
+import random
+import logging
+import contextlib
+
+import eth_account
+from hyperliquid.exchange import Exchange
+from hyperliquid.info import Info
+from hyperliquid.utils.constants import TESTNET_API_URL
+from hyperliquid.utils.signing import order_request_to_order_wire
+
+import btc_follow_bot_v1
+import ds_copier_v2
+import engine
+import fixtures
+import orders
+import snapshot
+
+META = {"universe": [
+    {"name": "BTC", "szDecimals": 5}, {"name": "ETH", "szDecimals": 4}, {"name": "SOL", "szDecimals": 2},
+    {"name": "XRP", "szDecimals": 0}, {"name": "DOGE", "szDecimals": 0}, {"name": "BNB", "szDecimals": 3},
+]}
+SPOT_META = {"universe": [], "tokens": []}
+ASSET_INDEX = snapshot.AssetIndex(META)
+MIDS = {"BTC": "100000.5", "ETH": "3500.25", "SOL": "150.123", "XRP": "2.5123", "DOGE": "0.20011", "BNB": "650.7"}
+TARGET = btc_follow_bot_v1.TARGET_USER_ADDRESS
+
+
+class CountingInfo(Info):
+    """Info 替身：使用给定的元数据，不建立连接；每个 /info 请求都被记录，并返回 states / MIDS 中的本地数据"""
+
+    def __init__(self, states):
+        super().__init__(TESTNET_API_URL, skip_ws=True, meta=META, spot_meta=SPOT_META)
+        self.states = states
+        self.calls = []
+
+    def post(self, url_path, payload=None):
+        self.calls.append(payload["type"])
+        if payload["type"] == "allMids":
+            return dict(MIDS)
+        if payload["type"] == "clearinghouseState":
+            return self.states[payload["user"].lower()]
+        raise AssertionError(f"unexpected info request {payload}")
+
+
+class RecordingExchange(Exchange):
+    """签名后不发送，只记录 action；订单按限价全部成交"""
+
+    def __init__(self, wallet, info):
+        super().__init__(wallet, TESTNET_API_URL, meta=META, spot_meta=SPOT_META)
+        self.info = info
+        self.actions = []
+
+    def _post_action(self, action, signature, nonce):
+        self.actions.append(action)
+        if action["type"] != "order":
+            return {"status": "ok", "response": {"type": "default"}}
+        statuses = [{"filled": {"totalSz": wire["s"], "avgPx": wire["p"], "oid": i}} for i, wire in enumerate(action["orders"])]
+        return {"status": "ok", "response": {"type": "order", "data": {"statuses": statuses}}}
+
+
+def make_exchange(states):
+    info = CountingInfo(states)
+    return RecordingExchange(eth_account.Account.create(), info), info
+
+
+def check_sdk_baseline():
+    """对照：SDK 的市价开仓与平仓在发送订单之前会先请求 /info"""
+    wallet = eth_account.Account.create()
+    states = {wallet.address.lower(): fixtures.user_state({"BTC": (0.001, 5)})}
+    exchange, info = make_exchange(states)
+    exchange.wallet = wallet
+    exchange.market_open("BTC", True, 0.001, None, 0.01)
+    open_calls = list(info.calls)
+    info.calls.clear()
+    exchange.market_close("BTC")
+    return open_calls, list(info.calls)
+
+
+def check_btc_strategy():
+    """btc_follow_bot_v1 的开仓、目标平仓后平仓、止盈平仓与策略不一致平仓四个分支"""
+    my_address = "0x" + "22" * 20
+    scenarios = [
+        ("open", {"BTC": (1.0, 5)}, {}, ["updateLeverage", "order"]),
+        ("target closed", {}, {"BTC": (0.00014, 5)}, ["order"]),
+        ("take profit", {"BTC": (1.0, 5)}, {"BTC": (0.00025, 5)}, ["order"]),
+        ("policy mismatch", {"BTC": (-1.0, 5)}, {"BTC": (0.00014, 5)}, ["order"]),
+    ]
+    results = []
+    for name, target_positions, my_positions, expected in scenarios:
+        states = {TARGET.lower(): fixtures.user_state(target_positions), my_address: fixtures.user_state(my_positions)}
+        exchange, info = make_exchange(states)
+        strategy = btc_follow_bot_v1.BtcFollowStrategy(exchange, my_address, ASSET_INDEX)
+        # 策略的 print 输出与检查无关
+        with contextlib.redirect_stdout(io.StringIO()):
+            strategy.on_snapshot(engine.Snapshot(1, 0.0, dict(MIDS), states))
+        sent = [action["type"] for action in exchange.actions]
+        assert info.calls == [], f"btc_follow {name}: unexpected info requests {info.calls}"
+        assert sent == expected, f"btc_follow {name}: sent {sent}, expected {expected}"
+        for action in exchange.actions:
+            if action["type"] == "order":
+                wire = action["orders"][0]
+                # 与 SDK 用同一个中间价计算出的限价一致
+                slippage = btc_follow_bot_v1.CLOSE_SLIPPAGE if wire["r"] else btc_follow_bot_v1.OPEN_SLIPPAGE
+                assert float(wire["p"]) == exchange._slippage_price("BTC", wire["b"], slippage, float(MIDS["BTC"])), wire
+        results.append((f"btc_follow: {name}", len(info.calls), len(exchange.actions)))
+    return results
+
+
+def check_copier():
+    """ds_copier_v2.sync_coins：开仓 (含杠杆更新)、加仓、减仓与平仓混合的一轮"""
+    my_address = "0x" + "33" * 20
+    target_positions = {"BTC": (10.0, 5), "ETH": (200.0, 3), "SOL": (-5000.0, 10), "XRP": (400000.0, 5)}
+    my_positions = {"ETH": (0.9, 3), "SOL": (-4.0, 10), "DOGE": (500.0, 5), "XRP": (500.0, 3)}
+    states = {my_address: fixtures.user_state(my_positions)}
+    exchange, info = make_exchange(states)
+    ds_copier_v2.sync_coins(exchange, MIDS, fixtures.user_state(target_positions), states[my_address], list(MIDS), ASSET_INDEX)
+    sent = [action["type"] for action in exchange.actions]
+    assert info.calls == [], f"ds_copier: unexpected info requests {info.calls}"
+    assert sent.count("order") == 1, f"ds_copier: expected one bulk order request, sent {sent}"
+    return [("ds_copier: one cycle", len(info.calls), len(exchange.actions))]
+
+
+def check_wire_equivalence(samples=20000):
+    """orders.order_wire 与 SDK 的 order_request_to_order_wire 对同样取整后的价格与数量给出相同的 wire"""
+    rng = random.Random(0)
+    for _ in range(samples):
+        coin = rng.choice(list(ASSET_INDEX.by_coin))
+        asset_info = ASSET_INDEX.get(coin)
+        mid = 10 ** rng.uniform(-4, 5)
+        is_buy = rng.random() < 0.5
+        limit_px = orders.slippage_price(mid, is_buy, rng.choice((0.01, 0.05)), asset_info.sz_decimals)
+        sz = round(10 ** rng.uniform(-3, 4), asset_info.sz_decimals) or 1.0
+        reduce_only = rng.random() < 0.5
+        request = {"coin": coin, "is_buy": is_buy, "sz": sz, "limit_px": limit_px, "order_type": orders.IOC_ORDER_TYPE, "reduce_only": reduce_only}
+        expected = order_request_to_order_wire(request, asset_info.asset)
+        actual = orders.order_wire(asset_info, is_buy, sz, limit_px, reduce_only)
+        assert actual == expected, f"{coin} px={limit_px} sz={sz}: {actual} != {expected}"
+    return samples
+
+
+def main():
+    logging.basicConfig(level=logging.ERROR)
+    ds_copier_v2.DRY_RUN = False
+    open_calls, close_calls = check_sdk_baseline()
+    print(f"SDK market_open sends {len(open_calls)} extra info request(s) {open_calls}, market_close sends {len(close_calls)} {close_calls}")
+    print(f"{'path':<30}{'info requests':>15}{'signed requests':>17}")
+    for name, info_calls, signed in check_btc_strategy() + check_copier():
+        print(f"{name:<30}{info_calls:>15}{signed:>17}")
+    print(f"order_wire matches the SDK wire for {check_wire_equivalence()} random orders")
+    print("OK: no info requests during execution")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,11 @@
+# 基准与检查脚本共用的测试数据。
+
+
+def user_state(positions):
+    """按 clearinghouseState 的格式构造 user_state。positions 为 {coin: (szi, 杠杆)}，均为逐仓"""
+    return {
+        "assetPositions": [
+            {"position": {"coin": coin, "szi": str(szi), "leverage": {"type": "isolated", "value": leverage}}}
+            for coin, (szi, leverage) in positions.items()
+        ]
+    }
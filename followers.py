@@ -0,0 +1,40 @@
+# 一个目标、多个跟随账户 (扇出模式)：每轮只获取一次目标状态与中间价，各跟随账户按自己的比例规划并同时下单。
+#
+# 跟随账户在 config.json 的 "followers" 中配置，字段与顶层相同，另有可选的 vault_address (子账户) 与 copy_ratio：
+#
+#   "followers": [
+#       {"secret_key": "0x...", "account_address": "", "copy_ratio": 0.001},
+#       {"vault_address": "0x...", "copy_ratio": 0.0005}
+#   ]
+#
+# 没有 secret_key / keystore_path 的条目使用顶层私钥签名。顶层账户本身总是第一个跟随账户。
+
+from hyperliquid.exchange import Exchange
+
+import example_utils
+
+
+class Follower:
+    """一个跟随账户及其独立的同步状态 (跟单比例、崩溃恢复日志)。策略引擎中一个跟单配置也用它表示"""
+
+    def __init__(self, address, exchange, copy_ratio, journal=None, name=None):
+        self.address = address
+        self.exchange = exchange
+        self.copy_ratio = copy_ratio
+        self.journal = journal
+        self.name = name
+
+    @property
+    def label(self):
+        """日志前缀：有名称时用名称 (同一账户上运行多个策略配置)，否则用地址前缀"""
+        return self.name or self.address[:10]
+
+
+def load_followers(base_url, meta, spot_meta, default_ratio):
+    """读取 config.json 中的跟随账户，返回 Follower 列表。Exchange 共享已获取的元数据，不会发送任何请求"""
+    followers = []
+    for address, account, entry in example_utils.load_follower_accounts():
+        vault_address = entry.get("vault_address")
+        exchange = Exchange(account, base_url, meta=meta, vault_address=vault_address, account_address=address, spot_meta=spot_meta)
+        followers.append(Follower(vault_address or address, exchange, float(entry.get("copy_ratio", default_ratio))))
+    return followers
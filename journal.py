@@ -0,0 +1,183 @@
+# 崩溃安全的追加写日志 (write-ahead journal)。
+#
+# 每行一条 JSON 记录：
+#
+#   {"t": "snapshot", "target": {coin: [szi, leverage]}}    最近一次目标仓位快照
+#   {"t": "intent", "seq": n, "cloid": ..., "coin": ..., ...} 即将发送的订单 / 杠杆更新
+#   {"t": "ack", "cloid": ..., "status": ...}                 交易所对订单的确认，或重启后查询到的结果
+#
+# intent 在发送请求之前写入并 fsync；snapshot 与 ack 只追加到缓冲区，最多每 SYNC_INTERVAL_SECONDS 秒 fsync 一次。
+# 进程被 kill -9 时最多丢失最近的 snapshot / ack，它们在重启后可以通过一次 orderStatus 查询补回。
+# 每个订单的 cloid 由账户地址、批次序号和订单内容确定性地生成，重启后可以按 cloid 查询订单是否已经成交。
+
+import os
+import json
+import time
+import signal
+import hashlib
+import logging
+
+from hyperliquid.utils.types import Cloid
+
+JOURNAL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ds_copier.journal")
+
+SYNC_INTERVAL_SECONDS = 1.0
+
+# 日志超过该大小时在下一次 fsync 后压缩为只包含最新快照与未确认订单
+COMPACT_BYTES = 4 * 1024 * 1024
+
+# 崩溃测试钩子 (bench_recovery.py)：环境变量为 "intent" 时进程在 intent 持久化之后、订单发出之前对自己 kill -9，
+# 为 "sent" 时在交易所返回结果之后、写入 ack 之前 kill -9
+CRASH_AT = os.environ.get("DS_COPIER_CRASH_AT")
+
+
+def account_path(path, account_address):
+    """扇出模式下每个跟随账户使用各自的日志文件：ds_copier.journal -> ds_copier.0x....journal"""
+    root, ext = os.path.splitext(path)
+    return f"{root}.{account_address.lower()}{ext}"
+
+
+def crash_point(name):
+    if name == CRASH_AT:
+        os.kill(os.getpid(), signal.SIGKILL)
+
+
+def make_cloid(account_address, seq, coin, is_buy, sz, reduce_only):
+    """同一账户、同一批次、同样内容的订单总是得到同一个 cloid"""
+    key = f"{account_address.lower()}:{seq}:{coin}:{'B' if is_buy else 'A'}:{sz}:{int(reduce_only)}"
+    return Cloid("0x" + hashlib.sha256(key.encode()).hexdigest()[:32])
+
+
+class Journal:
+    """打开 (或创建) 日志文件并回放已有记录：恢复批次序号、最近的目标快照与尚未确认的订单"""
+
+    def __init__(self, path, account_address):
+        self.path = path
+        self.account_address = account_address
+        self.seq = 0
+        self.last_target = None
+        self.pending = {}
+        # 最近一次查询后仍无法确定结果的订单所属币种
+        self.unresolved_coins = set()
+        self._buffer = []
+        self._last_sync = time.monotonic()
+        if os.path.exists(path):
+            self._replay()
+        self._compact()
+        self._file = open(path, "a")
+
+    def _replay(self):
+        with open(self.path) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # 崩溃时写了一半的最后一行
+                    logging.warning(f"Ignoring torn journal record: {line[:80]!r}")
+                    continue
+                kind = record.get("t")
+                if kind == "snapshot":
+                    self.last_target = {coin: tuple(v) for coin, v in record["target"].items()}
+                elif kind == "intent":
+                    self.seq = max(self.seq, record["seq"])
+                    if record.get("cloid"):
+                        self.pending[record["cloid"]] = record
+                elif kind == "ack":
+                    self.pending.pop(record["cloid"], None)
+
+    def _compact(self):
+        """把日志重写为只包含最新快照与未确认订单，再原子替换"""
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            if self.last_target is not None:
+                f.write(json.dumps({"t": "snapshot", "target": self.last_target}) + "\n")
+            for record in self.pending.values():
+                f.write(json.dumps(record) + "\n")
+            # 即使没有未确认订单也保留批次序号，避免重启后生成重复的 cloid
+            f.write(json.dumps({"t": "intent", "seq": self.seq, "cloid": None}) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def _append(self, record):
+        self._buffer.append(json.dumps(record) + "\n")
+
+    def sync(self, force=False):
+        """写出缓冲区；force 或距离上次 fsync 超过 SYNC_INTERVAL_SECONDS 时 fsync"""
+        if self._buffer:
+            self._file.write("".join(self._buffer))
+            self._buffer.clear()
+            self._file.flush()
+        if force or time.monotonic() - self._last_sync >= SYNC_INTERVAL_SECONDS:
+            os.fsync(self._file.fileno())
+            self._last_sync = time.monotonic()
+            if self._file.tell() > COMPACT_BYTES:
+                self._file.close()
+                self._compact()
+                self._file = open(self.path, "a")
+
+    def record_snapshot(self, target_signature):
+        self.last_target = target_signature
+        self._append({"t": "snapshot", "target": target_signature})
+        self.sync()
+
+    def record_intents(self, actions):
+        """为本批次的订单分配 cloid (写入 action["cloid"])，并在发送前把整批 intent 持久化"""
+        self.seq += 1
+        for action in actions:
+            record = {"t": "intent", "seq": self.seq, "type": action["type"], "coin": action["coin"]}
+            if action["type"] == "order":
+                action["cloid"] = make_cloid(self.account_address, self.seq, action["coin"], action["is_buy"], action["sz"], action["reduce_only"])
+                record.update(cloid=action["cloid"].to_raw(), is_buy=action["is_buy"], sz=action["sz"], reduce_only=action["reduce_only"])
+                self.pending[record["cloid"]] = record
+            else:
+                record.update(cloid=None, leverage=action["leverage"])
+            self._append(record)
+        self.sync(force=True)
+
+    def record_acks(self, order_actions, result):
+        """按 bulk order 返回的 statuses 记录每个订单的结果；请求失败 (result 为 None) 时订单保持未确认"""
+        if result is None or result.get("status") != "ok":
+            return
+        statuses = result.get("response", {}).get("data", {}).get("statuses", [])
+        for action, status in zip(order_actions, statuses):
+            cloid = action["cloid"].to_raw()
+            self.pending.pop(cloid, None)
+            self._append({"t": "ack", "cloid": cloid, "status": next(iter(status), "unknown") if isinstance(status, dict) else str(status)})
+        self.sync()
+
+    def record_skipped(self, order_actions):
+        """杠杆更新失败而没有发送的订单"""
+        for action in order_actions:
+            cloid = action["cloid"].to_raw()
+            self.pending.pop(cloid, None)
+            self._append({"t": "ack", "cloid": cloid, "status": "skipped"})
+
+    def submit_pending_queries(self, info, submit):
+        """为每个未确认订单提交一次 orderStatus 查询，返回 {cloid: future}。与本轮状态获取并发执行"""
+        self.unresolved_coins = set()
+        return {cloid: submit(info.query_order_by_cloid, self.account_address, Cloid(cloid)) for cloid in self.pending}
+
+    def resolve_pending(self, futures):
+        """处理 orderStatus 查询结果，记录仍无法确定结果的订单所属币种 (本轮不应对这些币种重新下单)"""
+        for cloid, future in futures.items():
+            record = self.pending[cloid]
+            try:
+                response = future.result()
+            except Exception as e:
+                logging.error(f"Failed to query journaled order {cloid} ({record['coin']}): {e}")
+                self.unresolved_coins.add(record["coin"])
+                continue
+            if response.get("status") == "order":
+                status = response["order"]["status"]
+                logging.info(f"Journaled order {cloid} ({record['coin']} {'BUY' if record['is_buy'] else 'SELL'} {record['sz']}) landed: {status}")
+            else:
+                status = "lost"
+                logging.info(f"Journaled order {cloid} ({record['coin']}) never reached the exchange, it will be re-planned from fresh state")
+            self.pending.pop(cloid)
+            self._append({"t": "ack", "cloid": cloid, "status": status, "recovered": True})
+        self.sync(force=True)
+
+    def close(self):
+        self.sync(force=True)
+        self._file.close()
@@ -0,0 +1,397 @@
+# 本地替身服务器：模拟 Hyperliquid 的 /info、/exchange 与 /ws 接口，用于在不连接主网的情况下测试机器人。
+#
+#   python local_server.py --port 8765 --fill-every 5
+#   python ds_copier_v2.py --stream --base-url http://127.0.0.1:8765
+#
+# 目标地址的仓位每隔 --fill-every 秒随机变化一次，并通过 WebSocket 推送 userFills / user 事件。
+# l2Book 返回围绕当前中间价随机生成的 20 档盘口。
+# /exchange 收到的订单按签名恢复出的地址 (或子账户的 vaultAddress) 记账，IOC 订单按中间价立即成交；GET /stats 返回订单计数、重复的 cloid 数与各账户仓位；
+# POST /target 直接设置目标仓位。
+
+import json
+import time
+import base64
+import random
+import hashlib
+import logging
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from hyperliquid.utils.signing import recover_agent_or_user_from_l1_action
+
+WS_MAGIC = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+UNIVERSE = [
+    {"name": "BTC", "szDecimals": 5, "maxLeverage": 40},
+    {"name": "ETH", "szDecimals": 4, "maxLeverage": 25},
+    {"name": "SOL", "szDecimals": 2, "maxLeverage": 20},
+    {"name": "XRP", "szDecimals": 0, "maxLeverage": 20},
+    {"name": "DOGE", "szDecimals": 0, "maxLeverage": 10},
+    {"name": "BNB", "szDecimals": 3, "maxLeverage": 10},
+]
+
+MIDS = {"BTC": 100000.0, "ETH": 3500.0, "SOL": 150.0, "XRP": 2.5, "DOGE": 0.2, "BNB": 650.0}
+
+SPOT_META = {"universe": [], "tokens": []}
+
+
+def make_user_state(positions, account_value="1000.0"):
+    """按 clearinghouseState 的格式构造用户状态"""
+    return {
+        "assetPositions": [
+            {
+                "type": "oneWay",
+                "position": {
+                    "coin": coin,
+                    "szi": str(p["szi"]),
+                    "leverage": {"type": "isolated", "value": p["leverage"]},
+                },
+            }
+            for coin, p in positions.items()
+            if p["szi"] != 0
+        ],
+        "marginSummary": {"accountValue": account_value},
+    }
+
+
+class MarketState:
+    """替身服务器的全部可变状态：中间价、目标仓位与 WebSocket 订阅者"""
+
+    def __init__(self, target_address):
+        self.target_address = target_address.lower()
+        self.lock = threading.Lock()
+        self.mids = dict(MIDS)
+        self.target_positions = {}
+        self.clients = []
+        # 其他地址的账户：{address: {"positions": {...}, "leverage": {coin: int}, "orders": {cloid: 订单状态}}}
+        self.accounts = {}
+        self.next_oid = 1
+        self.order_count = 0
+        self.duplicate_cloids = 0
+
+    def _account(self, address):
+        return self.accounts.setdefault(address.lower(), {"positions": {}, "leverage": {}, "orders": {}})
+
+    def user_state(self, address):
+        with self.lock:
+            if address.lower() == self.target_address:
+                return make_user_state(self.target_positions, "1000000.0")
+            return make_user_state(self._account(address)["positions"])
+
+    def update_leverage(self, address, action):
+        with self.lock:
+            self._account(address)["leverage"][UNIVERSE[action["asset"]]["name"]] = action["leverage"]
+        return {"status": "ok", "response": {"type": "default"}}
+
+    def place_orders(self, address, action):
+        """IOC 订单：限价穿过中间价即按中间价全部成交 (reduce-only 订单不超过现有仓位)，否则取消"""
+        statuses = []
+        with self.lock:
+            account = self._account(address)
+            for wire in action["orders"]:
+                coin = UNIVERSE[wire["a"]]["name"]
+                mid, px, sz = self.mids[coin], float(wire["p"]), float(wire["s"])
+                cloid = wire.get("c")
+                self.order_count += 1
+                if cloid is not None and cloid in account["orders"]:
+                    self.duplicate_cloids += 1
+                    logging.warning(f"Duplicate cloid {cloid} for {address}")
+                    statuses.append({"error": "Duplicate cloid."})
+                    continue
+                position = account["positions"].setdefault(coin, {"szi": 0.0, "leverage": account["leverage"].get(coin, 20)})
+                if wire["r"]:
+                    sz = min(sz, abs(position["szi"])) if (position["szi"] > 0) != wire["b"] else 0.0
+                if sz <= 0 or (px < mid if wire["b"] else px > mid):
+                    status = {"error": "Order could not immediately match against any resting orders."}
+                else:
+                    oid = self.next_oid
+                    self.next_oid += 1
+                    if position["szi"] == 0:
+                        position["leverage"] = account["leverage"].get(coin, 20)
+                    position["szi"] = round(position["szi"] + (sz if wire["b"] else -sz), 8)
+                    status = {"filled": {"totalSz": str(sz), "avgPx": str(mid), "oid": oid}}
+                if cloid is not None:
+                    account["orders"][cloid] = {"coin": coin, "side": "B" if wire["b"] else "A", "sz": str(sz), "cloid": cloid,
+                                                "status": "filled" if "filled" in status else "canceled"}
+                statuses.append(status)
+        return {"status": "ok", "response": {"type": "order", "data": {"statuses": statuses}}}
+
+    def order_status(self, address, oid):
+        with self.lock:
+            order = self._account(address)["orders"].get(oid)
+        if order is None:
+            return {"status": "unknownOid"}
+        return {"status": "order", "order": {"order": order, "status": order["status"], "statusTimestamp": int(time.time() * 1000)}}
+
+    def set_target(self, coin, szi, leverage):
+        with self.lock:
+            self.target_positions[coin] = {"szi": szi, "leverage": leverage}
+
+    def stats(self):
+        with self.lock:
+            positions = {address: {coin: p["szi"] for coin, p in account["positions"].items() if p["szi"]} for address, account in self.accounts.items()}
+            return {"orders": self.order_count, "duplicate_cloids": self.duplicate_cloids, "positions": positions}
+
+    def random_trade(self):
+        """随机改变目标在某个币种上的仓位，并返回对应的成交记录"""
+        coin = random.choice(list(self.mids))
+        with self.lock:
+            mid = self.mids[coin]
+            position = self.target_positions.setdefault(coin, {"szi": 0.0, "leverage": random.choice([3, 5, 10])})
+            notional = random.uniform(5000, 50000)
+            sz = round(notional / mid, 4)
+            is_buy = random.random() < 0.5
+            start_position = position["szi"]
+            position["szi"] = round(start_position + (sz if is_buy else -sz), 4)
+            fill = {
+                "coin": coin,
+                "px": str(mid),
+                "sz": str(sz),
+                "side": "B" if is_buy else "A",
+                "time": int(time.time() * 1000),
+                "startPosition": str(start_position),
+                "tid": random.getrandbits(48),
+            }
+        return fill
+
+    def l2_book(self, coin):
+        """围绕中间价生成 20 档盘口，档位间隔 1 个基点，每档名义价值随机"""
+        sz_decimals = next(asset["szDecimals"] for asset in UNIVERSE if asset["name"] == coin)
+        with self.lock:
+            mid = self.mids[coin]
+        levels = []
+        for sign in (-1, 1):
+            levels.append([
+                {
+                    "px": f"{float(f'{mid * (1 + sign * 0.0001 * i):.5g}'):g}",
+                    "sz": str(round(random.uniform(2000, 20000) / mid, sz_decimals) or 10 ** -sz_decimals),
+                    "n": random.randint(1, 5),
+                }
+                for i in range(1, 21)
+            ])
+        return {"coin": coin, "time": int(time.time() * 1000), "levels": levels}
+
+    def drift_mids(self):
+        with self.lock:
+            for coin in self.mids:
+                self.mids[coin] *= 1 + random.uniform(-0.0005, 0.0005)
+            return {coin: str(mid) for coin, mid in self.mids.items()}
+
+
+def ws_frame(text):
+    """构造一个服务端发往客户端的文本帧 (不加掩码)"""
+    payload = text.encode()
+    header = bytearray([0x81])
+    if len(payload) < 126:
+        header.append(len(payload))
+    elif len(payload) < 65536:
+        header.append(126)
+        header += len(payload).to_bytes(2, "big")
+    else:
+        header.append(127)
+        header += len(payload).to_bytes(8, "big")
+    return bytes(header) + payload
+
+
+def ws_read_frame(rfile):
+    """读取一个客户端帧，返回 (opcode, payload)；连接关闭时返回 (None, None)"""
+    head = rfile.read(2)
+    if len(head) < 2:
+        return None, None
+    opcode = head[0] & 0x0F
+    length = head[1] & 0x7F
+    if length == 126:
+        length = int.from_bytes(rfile.read(2), "big")
+    elif length == 127:
+        length = int.from_bytes(rfile.read(8), "big")
+    mask = rfile.read(4) if head[1] & 0x80 else b"\x00\x00\x00\x00"
+    data = rfile.read(length)
+    return opcode, bytes(b ^ mask[i % 4] for i, b in enumerate(data))
+
+
+class WsClient:
+    def __init__(self, handler):
+        self.handler = handler
+        self.subscriptions = []
+        self.send_lock = threading.Lock()
+
+    def send(self, msg):
+        with self.send_lock:
+            self.handler.wfile.write(ws_frame(json.dumps(msg)))
+            self.handler.wfile.flush()
+
+    def wants(self, sub_type, user=None):
+        for sub in self.subscriptions:
+            if sub["type"] == sub_type and (user is None or sub.get("user", "").lower() == user):
+                return True
+        return False
+
+
+class Handler(BaseHTTPRequestHandler):
+    market: MarketState = None
+    latency_seconds = 0.0
+    latency_jitter_seconds = 0.0
+    error_rate = 0.0
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        logging.debug(format % args)
+
+    def _send_json(self, obj, status=200):
+        body = json.dumps(obj).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        if self.latency_seconds or self.latency_jitter_seconds:
+            time.sleep(self.latency_seconds + random.uniform(0, self.latency_jitter_seconds))
+        if self.path == "/target":
+            # 测试控制接口：直接设置目标在某个币种上的仓位 (不推送成交)，供 bench_recovery.py 制造确定的目标变化
+            self.market.set_target(body["coin"], float(body["szi"]), int(body["leverage"]))
+            self._send_json({"status": "ok"})
+            return
+        if self.path == "/exchange":
+            action = body["action"]
+            # 子账户 (vaultAddress) 的订单记在子账户上，其余按签名恢复出的地址记账
+            address = body.get("vaultAddress") or recover_agent_or_user_from_l1_action(
+                action, body["signature"], body.get("vaultAddress"), body["nonce"], body.get("expiresAfter"), False
+            )
+            if action["type"] == "order":
+                self._send_json(self.market.place_orders(address, action))
+            elif action["type"] == "updateLeverage":
+                self._send_json(self.market.update_leverage(address, action))
+            else:
+                self._send_json({"status": "ok", "response": {"type": "default"}})
+            return
+        # 按 --error-rate 随机返回限流或服务端错误，用于测试 transport.py 的重试
+        if self.error_rate and random.random() < self.error_rate:
+            if random.random() < 0.5:
+                self._send_json({"code": 429, "msg": "rate limited"}, status=429)
+            else:
+                self._send_json({"error": "internal error"}, status=random.choice((500, 502, 503)))
+            return
+        req_type = body.get("type")
+        if req_type == "meta":
+            self._send_json({"universe": UNIVERSE})
+        elif req_type == "spotMeta":
+            self._send_json(SPOT_META)
+        elif req_type == "allMids":
+            with self.market.lock:
+                self._send_json({coin: str(mid) for coin, mid in self.market.mids.items()})
+        elif req_type == "clearinghouseState":
+            self._send_json(self.market.user_state(body["user"]))
+        elif req_type == "spotClearinghouseState":
+            self._send_json({"balances": []})
+        elif req_type == "l2Book":
+            self._send_json(self.market.l2_book(body["coin"]))
+        elif req_type == "orderStatus":
+            self._send_json(self.market.order_status(body["user"], body["oid"]))
+        else:
+            self._send_json({"error": f"unsupported info type {req_type}"}, status=400)
+
+    def do_GET(self):
+        if self.path == "/stats":
+            self._send_json(self.market.stats())
+            return
+        if self.path != "/ws" or self.headers.get("Upgrade", "").lower() != "websocket":
+            self._send_json({"error": "not found"}, status=404)
+            return
+        accept = base64.b64encode(hashlib.sha1((self.headers["Sec-WebSocket-Key"] + WS_MAGIC).encode()).digest()).decode()
+        self.send_response(101)
+        self.send_header("Upgrade", "websocket")
+        self.send_header("Connection", "Upgrade")
+        self.send_header("Sec-WebSocket-Accept", accept)
+        self.end_headers()
+        self.wfile.flush()
+
+        client = WsClient(self)
+        with self.market.lock:
+            self.market.clients.append(client)
+        try:
+            while True:
+                opcode, payload = ws_read_frame(self.rfile)
+                if opcode is None or opcode == 0x8:
+                    break
+                if opcode != 0x1:
+                    continue
+                msg = json.loads(payload)
+                if msg.get("method") == "ping":
+                    client.send({"channel": "pong"})
+                elif msg.get("method") == "subscribe":
+                    client.subscriptions.append(msg["subscription"])
+                    client.send({"channel": "subscriptionResponse", "data": msg})
+                    if msg["subscription"]["type"] == "userFills":
+                        client.send({"channel": "userFills", "data": {"isSnapshot": True, "user": msg["subscription"]["user"], "fills": []}})
+        finally:
+            with self.market.lock:
+                self.market.clients.remove(client)
+        self.close_connection = True
+
+
+def broadcast(market, build_messages):
+    with market.lock:
+        clients = list(market.clients)
+    for client in clients:
+        for msg in build_messages(client):
+            try:
+                client.send(msg)
+            except OSError:
+                pass
+
+
+def run_feed(market, fill_every, mids_every=1.0):
+    """后台推送：每秒推送中间价，每隔 fill_every 秒让目标随机成交一次"""
+    next_fill = time.time() + fill_every
+    while True:
+        time.sleep(mids_every)
+        mids = market.drift_mids()
+        broadcast(market, lambda c: [{"channel": "allMids", "data": {"mids": mids}}] if c.wants("allMids") else [])
+        if fill_every > 0 and time.time() >= next_fill:
+            next_fill = time.time() + fill_every
+            fill = market.random_trade()
+            target = market.target_address
+            logging.info(f"Target fill: {fill['side']} {fill['sz']} {fill['coin']} @ {fill['px']}")
+
+            def fill_messages(client):
+                msgs = []
+                if client.wants("userFills", target):
+                    msgs.append({"channel": "userFills", "data": {"user": target, "fills": [fill]}})
+                if client.wants("userEvents", target):
+                    msgs.append({"channel": "user", "data": {"fills": [fill]}})
+                return msgs
+
+            broadcast(market, fill_messages)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the Hyperliquid REST and WebSocket API.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--target", default="0xc20ac4dc4188660cbf555448af52694ca62b0734")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Delay added to every REST response.")
+    parser.add_argument("--latency-jitter-ms", type=float, default=0.0, help="Extra random delay (uniform 0..N ms) added to every REST response.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of /info requests answered with a random 429/5xx error.")
+    parser.add_argument("--fill-every", type=float, default=5.0, help="Seconds between random target fills (0 disables).")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s", datefmt="%Y-%m-%d %H:%M:%S")
+
+    Handler.market = MarketState(args.target)
+    Handler.latency_seconds = args.latency_ms / 1000
+    Handler.latency_jitter_seconds = args.latency_jitter_ms / 1000
+    Handler.error_rate = args.error_rate
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), Handler)
+    threading.Thread(target=run_feed, args=(Handler.market, args.fill_every), daemon=True).start()
+    logging.info(f"Local stand-in API listening on http://127.0.0.1:{args.port} (ws: ws://127.0.0.1:{args.port}/ws)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
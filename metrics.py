@@ -0,0 +1,138 @@
+import json
+import time
+import threading
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Prometheus 直方图的桶上界 (毫秒)
+BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+# 滚动分位数使用的最近样本数
+ROLLING_WINDOW = 1024
+
+QUANTILES = (0.5, 0.9, 0.99)
+
+
+class LatencyHistogram:
+    """累计桶计数 (用于 Prometheus) + 最近 ROLLING_WINDOW 个样本 (用于滚动分位数)"""
+
+    def __init__(self):
+        self.bucket_counts = [0] * (len(BUCKETS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.recent = deque(maxlen=ROLLING_WINDOW)
+
+    def observe(self, ms):
+        self.bucket_counts[bisect_left(BUCKETS_MS, ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+        self.recent.append(ms)
+
+    def quantiles(self):
+        samples = sorted(self.recent)
+        if not samples:
+            return {}
+        return {q: samples[min(len(samples) - 1, int(q * len(samples)))] for q in QUANTILES}
+
+
+_lock = threading.Lock()
+_histograms = {}
+
+
+def observe(name, ms):
+    """记录一个耗时样本 (毫秒)"""
+    with _lock:
+        histogram = _histograms.get(name)
+        if histogram is None:
+            histogram = _histograms[name] = LatencyHistogram()
+        histogram.observe(ms)
+
+
+@contextmanager
+def span(name):
+    """测量 with 块的耗时并记录到名为 name 的直方图"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, (time.perf_counter() - started) * 1000)
+
+
+def timed(name, function):
+    """返回一个包装函数，每次调用都记录到名为 name 的直方图"""
+    def wrapper(*args, **kwargs):
+        with span(name):
+            return function(*args, **kwargs)
+    return wrapper
+
+
+def snapshot():
+    """返回所有直方图的当前统计：{name: {count, sum_ms, p50, p90, p99}}"""
+    with _lock:
+        result = {}
+        for name, histogram in _histograms.items():
+            entry = {"count": histogram.count, "sum_ms": round(histogram.total_ms, 3)}
+            for q, value in histogram.quantiles().items():
+                entry[f"p{int(q * 100)}"] = round(value, 3)
+            result[name] = entry
+        return result
+
+
+def render_prometheus():
+    """按 Prometheus 文本格式输出：每个阶段一个 phase 标签，包含直方图桶与滚动分位数"""
+    lines = [
+        "# HELP ds_copier_latency_ms Latency of copier phases in milliseconds.",
+        "# TYPE ds_copier_latency_ms histogram",
+    ]
+    quantile_lines = [
+        "# HELP ds_copier_latency_rolling_ms Rolling latency quantiles over the most recent samples.",
+        "# TYPE ds_copier_latency_rolling_ms gauge",
+    ]
+    with _lock:
+        for name, histogram in sorted(_histograms.items()):
+            cumulative = 0
+            for upper, count in zip(BUCKETS_MS + ("+Inf",), histogram.bucket_counts):
+                cumulative += count
+                lines.append(f'ds_copier_latency_ms_bucket{{phase="{name}",le="{upper}"}} {cumulative}')
+            lines.append(f'ds_copier_latency_ms_sum{{phase="{name}"}} {histogram.total_ms:.3f}')
+            lines.append(f'ds_copier_latency_ms_count{{phase="{name}"}} {histogram.count}')
+            for q, value in histogram.quantiles().items():
+                quantile_lines.append(f'ds_copier_latency_rolling_ms{{phase="{name}",quantile="{q}"}} {value:.3f}')
+    return "\n".join(lines + quantile_lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path not in ("/", "/metrics"):
+            self.send_response(404)
+            self.end_headers()
+            return
+        body = render_prometheus().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_http_server(port, host="127.0.0.1"):
+    """在后台线程中启动 /metrics 端点"""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
+
+
+def start_jsonl_writer(path, interval_seconds):
+    """每隔 interval_seconds 秒把 snapshot() 追加写入 JSONL 文件"""
+    def run():
+        while True:
+            time.sleep(interval_seconds)
+            with open(path, "a") as f:
+                f.write(json.dumps({"ts": time.time(), "latency_ms": snapshot()}) + "\n")
+
+    threading.Thread(target=run, name="metrics-jsonl", daemon=True).start()
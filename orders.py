@@ -0,0 +1,175 @@
+import os
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import eth_account
+from hyperliquid.utils.constants import MAINNET_API_URL
+from hyperliquid.utils.signing import (
+    get_timestamp_ms,
+    order_request_to_order_wire,
+    order_type_to_wire,
+    order_wires_to_order_action,
+    sign_l1_action,
+)
+
+import metrics
+
+# IOC 市价单：以带滑点的限价立即成交或取消
+IOC_ORDER_TYPE = {"limit": {"tif": "Ioc"}}
+
+_nonce_lock = threading.Lock()
+_last_nonce = 0
+
+# 设置后 post_l1_action 在子进程中签名 (见 SigningPool)
+_signing_pool = None
+
+# 子进程中的 {地址: LocalAccount}，由 _init_signing_worker 设置
+_worker_wallets = {}
+
+
+def next_nonce():
+    """分配严格递增的 nonce。SDK 直接使用毫秒时间戳，并发签名时可能重复而被交易所拒绝"""
+    global _last_nonce
+    with _nonce_lock:
+        _last_nonce = max(get_timestamp_ms(), _last_nonce + 1)
+        return _last_nonce
+
+
+def slippage_price(mid_price, is_buy, slippage, sz_decimals):
+    """按 SDK 的规则计算带滑点的限价：5 位有效数字，永续合约最多 6 - szDecimals 位小数"""
+    px = mid_price * (1 + slippage) if is_buy else mid_price * (1 - slippage)
+    return round(float(f"{px:.5g}"), 6 - sz_decimals)
+
+
+def _wire_number(x, decimals):
+    """按 decimals 位小数格式化并去掉末尾的 0，与 SDK 的 float_to_wire 结果相同，但不经过 Decimal"""
+    text = f"{x:.{decimals}f}"
+    if "." in text:
+        text = text.rstrip("0").rstrip(".")
+    return "0" if text == "-0" else text
+
+
+def order_wire(asset_info, is_buy, sz, limit_px, reduce_only, order_type=IOC_ORDER_TYPE, cloid=None):
+    """用 snapshot.AssetIndex 中预先计算的资产编号与小数位数构造订单的 wire 格式，价格与数量按交易所规则取整"""
+    wire = {
+        "a": asset_info.asset,
+        "b": is_buy,
+        "p": _wire_number(round(limit_px, asset_info.px_decimals), asset_info.px_decimals),
+        "s": _wire_number(round(sz, asset_info.sz_decimals), asset_info.sz_decimals),
+        "r": reduce_only,
+        "t": order_type_to_wire(order_type),
+    }
+    if cloid is not None:
+        wire["c"] = cloid.to_raw()
+    return wire
+
+
+def _init_signing_worker(keys):
+    global _worker_wallets
+    _worker_wallets = {address: eth_account.Account.from_key(key) for address, key in keys.items()}
+
+
+def _sign_in_worker(address, action, vault_address, nonce, expires_after, is_mainnet):
+    return sign_l1_action(_worker_wallets[address], action, vault_address, nonce, expires_after, is_mainnet)
+
+
+def _ping():
+    return os.getpid()
+
+
+class SigningPool:
+    """在进程池中做 eth_account 签名
+
+    签名是纯 Python 的椭圆曲线计算 (每个 action 数毫秒)，多个账户在线程中同时签名会被 GIL 串行化，
+    子进程签名只在多核机器上有收益 (单核上反而更慢)，因此只在指定 --sign-workers 时使用。
+    私钥只在创建进程池时传给子进程一次；不在池中的钱包仍在当前线程签名。
+    子进程由 forkserver 创建，不会 fork 已经启动了日志、WebSocket 与线程池的主进程，并在构造时全部启动，
+    第一笔订单不承担启动子进程的延迟。
+    """
+
+    def __init__(self, wallets, max_workers=None):
+        keys = {wallet.address: wallet.key for wallet in wallets}
+        self.addresses = set(keys)
+        max_workers = max_workers or os.cpu_count() or 1
+        self._pool = ProcessPoolExecutor(
+            max_workers=max_workers, mp_context=multiprocessing.get_context("forkserver"),
+            initializer=_init_signing_worker, initargs=(keys,),
+        )
+        # 同时提交 max_workers 个空任务，使所有子进程都在这里启动并完成初始化
+        for future in [self._pool.submit(_ping) for _ in range(max_workers)]:
+            future.result()
+
+    def sign(self, wallet, action, vault_address, nonce, expires_after, is_mainnet):
+        if wallet.address not in self.addresses:
+            return sign_l1_action(wallet, action, vault_address, nonce, expires_after, is_mainnet)
+        return self._pool.submit(_sign_in_worker, wallet.address, action, vault_address, nonce, expires_after, is_mainnet).result()
+
+    def shutdown(self):
+        self._pool.shutdown()
+
+
+def set_signing_pool(pool):
+    global _signing_pool
+    _signing_pool = pool
+
+
+def post_l1_action(exchange, action):
+    """签名并发送一个 L1 action，只产生一次 HTTP 请求"""
+    nonce = next_nonce()
+    if exchange.wallet is None:
+        # 进程内的模拟交易所 (paper_exchange.PaperExchange) 没有钱包，也不校验签名
+        return exchange._post_action(action, None, nonce)
+    sign = _signing_pool.sign if _signing_pool is not None else sign_l1_action
+    with metrics.span("sign"):
+        signature = sign(
+            exchange.wallet,
+            action,
+            exchange.vault_address,
+            nonce,
+            exchange.expires_after,
+            exchange.base_url == MAINNET_API_URL,
+        )
+    with metrics.span("post_exchange"):
+        return exchange._post_action(action, signature, nonce)
+
+
+def update_leverage(exchange, coin, leverage, is_cross=False, asset_index=None):
+    """与 Exchange.update_leverage 相同，但使用 next_nonce 以便并发发送。传入 asset_index 时不查询 exchange.info"""
+    action = {
+        "type": "updateLeverage",
+        "asset": asset_index.get(coin).asset if asset_index is not None else exchange.info.name_to_asset(coin),
+        "isCross": is_cross,
+        "leverage": leverage,
+    }
+    return post_l1_action(exchange, action)
+
+
+def bulk_orders(exchange, order_requests, asset_index=None):
+    """把多个币种的订单放进同一个 order action 中一次性发送。传入 asset_index 时用预先计算的资产表构造订单"""
+    if asset_index is None:
+        order_wires = [order_request_to_order_wire(order, exchange.info.name_to_asset(order["coin"])) for order in order_requests]
+    else:
+        order_wires = [
+            order_wire(
+                asset_index.get(order["coin"]), order["is_buy"], order["sz"], order["limit_px"], order["reduce_only"],
+                order["order_type"], order.get("cloid"),
+            )
+            for order in order_requests
+        ]
+    return post_l1_action(exchange, order_wires_to_order_action(order_wires))
+
+
+def market_order(exchange, asset_info, is_buy, sz, mid_price, slippage, reduce_only=False, cloid=None):
+    """市价单快速路径：用本轮已有的中间价在本地计算滑点限价，只发送一个签名请求
+
+    Exchange.market_open / market_close 会先请求 allMids (平仓还要请求 user_state) 再下单。
+    """
+    limit_px = slippage_price(mid_price, is_buy, slippage, asset_info.sz_decimals)
+    wire = order_wire(asset_info, is_buy, sz, limit_px, reduce_only, cloid=cloid)
+    return post_l1_action(exchange, order_wires_to_order_action([wire]))
+
+
+def market_close(exchange, asset_info, szi, mid_price, slippage, cloid=None):
+    """按本轮快照中的仓位 szi 全部平仓 (reduce-only IOC)，只发送一个签名请求"""
+    return market_order(exchange, asset_info, szi < 0, abs(szi), mid_price, slippage, reduce_only=True, cloid=cloid)
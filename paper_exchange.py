@@ -0,0 +1,357 @@
+import time
+import logging
+import threading
+
+import eth_account
+
+from hyperliquid.utils.constants import TESTNET_API_URL
+
+import engine
+import portfolio
+
+# 模拟撮合的吃单费率
+TAKER_FEE_RATE = 0.00045
+
+# 没有收到杠杆更新的币种使用交易所的默认设置 (全仓 20x)
+DEFAULT_LEVERAGE = 20
+
+
+class NameToAsset:
+    """只实现 Exchange 下单路径用到的 info.name_to_asset"""
+
+    def __init__(self, asset_index):
+        self.asset_index = asset_index
+
+    def name_to_asset(self, name):
+        return self.asset_index.get(name).asset
+
+
+class CountingExchange:
+    """替身 Exchange：订单经过真实签名但不发送，按当前中间价立即成交，统计订单数与成交名义价值
+
+    可以直接传给 orders.update_leverage / orders.bulk_orders，持仓通过 user_state() 以
+    clearinghouseState 的格式返回，作为下一轮 sync_coins 的 my_user_state。latency_seconds 模拟每个请求的往返时间。
+    """
+
+    def __init__(self, asset_index, latency_seconds=0.0):
+        self.wallet = eth_account.Account.create()
+        self.vault_address = None
+        self.expires_after = None
+        self.base_url = TESTNET_API_URL
+        self.info = NameToAsset(asset_index)
+        self.asset_to_coin = {asset_info.asset: coin for coin, asset_info in asset_index.by_coin.items()}
+        self.mids = {}
+        self.positions = {}
+        self.leverages = {}
+        self.order_count = 0
+        self.leverage_update_count = 0
+        self.request_count = 0
+        self.notional_traded = 0.0
+        self.latency_seconds = latency_seconds
+
+    def set_mids(self, all_mids):
+        self.mids = {coin: float(mid) for coin, mid in all_mids.items()}
+
+    def user_state(self):
+        return {
+            "assetPositions": [
+                {
+                    "type": "oneWay",
+                    "position": {
+                        "coin": coin,
+                        "szi": str(szi),
+                        "leverage": {"type": "isolated", "value": self.leverages.get(coin, 1)},
+                    },
+                }
+                for coin, szi in self.positions.items()
+                if szi != 0
+            ],
+        }
+
+    def _post_action(self, action, signature, nonce):
+        self.request_count += 1
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+        if action["type"] == "updateLeverage":
+            self.leverage_update_count += 1
+            self.leverages[self.asset_to_coin[action["asset"]]] = action["leverage"]
+            return {"status": "ok", "response": {"type": "default"}}
+        if action["type"] != "order":
+            raise NotImplementedError(f"CountingExchange does not support {action['type']}")
+
+        statuses = []
+        for wire in action["orders"]:
+            coin = self.asset_to_coin[wire["a"]]
+            sz = float(wire["s"])
+            szi = self.positions.get(coin, 0.0)
+            if wire["r"]:
+                # reduce-only 订单最多只能把仓位减到 0
+                if szi == 0 or (szi > 0) == wire["b"]:
+                    statuses.append({"error": "Reduce only order would increase position."})
+                    continue
+                sz = min(sz, abs(szi))
+            px = self.mids[coin]
+            self.positions[coin] = round(szi + (sz if wire["b"] else -sz), 10)
+            self.order_count += 1
+            self.notional_traded += sz * px
+            statuses.append({"filled": {"totalSz": str(sz), "avgPx": str(px), "oid": self.order_count}})
+        return {"status": "ok", "response": {"type": "order", "data": {"statuses": statuses}}}
+
+
+def parse_l2_book(l2_book):
+    """把 l2Book 响应 ({"levels": [买盘, 卖盘]}) 转成撮合用的 ([买价], [买量], [卖价], [卖量])，买盘从高到低、卖盘从低到高"""
+    bids, asks = l2_book["levels"]
+    return (
+        [float(level["px"]) for level in bids], [float(level["sz"]) for level in bids],
+        [float(level["px"]) for level in asks], [float(level["sz"]) for level in asks],
+    )
+
+
+class PaperExchange:
+    """进程内的模拟交易所：保存纸面仓位、杠杆、保证金与资金，IOC 订单逐档吃掉 L2 盘口
+
+    与 CountingExchange 一样可以直接传给 orders.update_leverage / orders.bulk_orders，但没有钱包，
+    orders.post_l1_action 不为它签名，因此每秒可以撮合数千个订单。每轮先用 set_market 更新中间价 (作为标记价格)
+    与盘口；同一轮内被吃掉的档位不会恢复。没有盘口的币种在有 book_fetcher 时于下单前并发获取 (book_fetcher(coin) 返回
+    l2Book 响应)，否则按中间价成交并计入 mid_fills。user_state() 以 clearinghouseState 的格式返回纸面账户，
+    可以作为下一轮的 my_user_state。
+
+    保证金按 |szi| * 标记价格 / 杠杆 计算；加仓所需的保证金超过可用资金时订单被拒绝。不模拟资金费率与强平。
+    """
+
+    def __init__(self, asset_index, equity, book_fetcher=None, fee_rate=TAKER_FEE_RATE):
+        self.wallet = None
+        self.vault_address = None
+        self.expires_after = None
+        self.base_url = TESTNET_API_URL
+        self.info = NameToAsset(asset_index)
+        self.asset_index = asset_index
+        self.asset_to_coin = {asset_info.asset: coin for coin, asset_info in asset_index.by_coin.items()}
+        self.book_fetcher = book_fetcher
+        self.fee_rate = fee_rate
+        self.lock = threading.Lock()
+        self.cash = float(equity)
+        self.starting_equity = float(equity)
+        self.mids = {}
+        self.raw_books = {}
+        self.books = {}
+        # {coin: [szi, 开仓均价]}
+        self.positions = {}
+        # {coin: (杠杆, 是否全仓)}
+        self.leverages = {}
+        self.request_count = 0
+        self.leverage_update_count = 0
+        self.order_count = 0
+        self.fill_count = 0
+        self.reject_count = 0
+        self.mid_fills = 0
+        self.notional_traded = 0.0
+        self.fees_paid = 0.0
+        self.slippage_cost = 0.0
+        self.realized_pnl = 0.0
+
+    def set_market(self, all_mids, books=None):
+        """开始新的一轮：books 为 {coin: l2Book 响应}；未提供的币种在下单时由 book_fetcher 获取"""
+        with self.lock:
+            self.mids = {coin: float(mid) for coin, mid in all_mids.items()}
+            # 盘口在该币种第一次下单时才解析，大多数币种每轮没有订单
+            self.raw_books = books or {}
+            self.books = {}
+
+    def set_mids(self, all_mids):
+        self.set_market(all_mids)
+
+    def _leverage(self, coin):
+        return self.leverages.get(coin, (DEFAULT_LEVERAGE, True))
+
+    def margin_used(self):
+        return sum(abs(szi) * self.mids.get(coin, entry_px) / self._leverage(coin)[0] for coin, (szi, entry_px) in self.positions.items())
+
+    def account_value(self):
+        return self.cash + sum(szi * (self.mids.get(coin, entry_px) - entry_px) for coin, (szi, entry_px) in self.positions.items())
+
+    def user_state(self):
+        with self.lock:
+            asset_positions = []
+            total_ntl = 0.0
+            for coin, (szi, entry_px) in self.positions.items():
+                leverage, is_cross = self._leverage(coin)
+                mark = self.mids.get(coin, entry_px)
+                position_value = abs(szi) * mark
+                total_ntl += position_value
+                asset_positions.append({
+                    "type": "oneWay",
+                    "position": {
+                        "coin": coin,
+                        "szi": f"{szi:.{self.asset_index.get(coin).sz_decimals}f}",
+                        "entryPx": str(entry_px),
+                        "positionValue": str(position_value),
+                        "unrealizedPnl": str(szi * (mark - entry_px)),
+                        "marginUsed": str(position_value / leverage),
+                        "leverage": {"type": "cross" if is_cross else "isolated", "value": leverage},
+                    },
+                })
+            account_value = self.account_value()
+            margin_used = self.margin_used()
+            summary = {
+                "accountValue": str(account_value),
+                "totalNtlPos": str(total_ntl),
+                "totalRawUsd": str(self.cash),
+                "totalMarginUsed": str(margin_used),
+            }
+            return {
+                "assetPositions": asset_positions,
+                "marginSummary": summary,
+                "crossMarginSummary": summary,
+                "withdrawable": str(max(account_value - margin_used, 0.0)),
+            }
+
+    def stats(self):
+        """纸面账户的累计统计，用于日志与基准"""
+        with self.lock:
+            account_value = self.account_value()
+            return {
+                "account_value": account_value,
+                "pnl": account_value - self.starting_equity,
+                "realized_pnl": self.realized_pnl,
+                "margin_used": self.margin_used(),
+                "positions": len(self.positions),
+                "orders": self.order_count,
+                "fills": self.fill_count,
+                "rejected": self.reject_count,
+                "mid_fills": self.mid_fills,
+                "notional": self.notional_traded,
+                "fees": self.fees_paid,
+                "slippage": self.slippage_cost,
+            }
+
+    def _fetch_books(self, coins):
+        """并发获取本轮还没有盘口的币种"""
+        futures = {coin: portfolio.submit(self.book_fetcher, coin) for coin in coins if coin not in self.raw_books}
+        for coin, future in futures.items():
+            self.raw_books[coin] = future.result()
+
+    def _match(self, coin, is_buy, sz, limit_px):
+        """按价格优先吃掉盘口，返回 (成交数量, 成交金额)；剩余数量按 IOC 取消"""
+        book = self.books.get(coin)
+        if book is None and coin in self.raw_books:
+            book = self.books[coin] = parse_l2_book(self.raw_books[coin])
+        if book is None:
+            mid = self.mids[coin]
+            if (mid > limit_px) if is_buy else (mid < limit_px):
+                return 0.0, 0.0
+            self.mid_fills += 1
+            return sz, sz * mid
+        pxs, szs = (book[2], book[3]) if is_buy else (book[0], book[1])
+        filled = cost = 0.0
+        while pxs and filled < sz:
+            px = pxs[0]
+            if (px > limit_px) if is_buy else (px < limit_px):
+                break
+            take = min(szs[0], sz - filled)
+            filled += take
+            cost += take * px
+            if take >= szs[0]:
+                del pxs[0], szs[0]
+            else:
+                szs[0] -= take
+        return filled, cost
+
+    def _apply_fill(self, coin, signed_sz, px):
+        """把一笔成交计入仓位：同向加仓更新开仓均价，反向减仓实现盈亏，越过 0 时剩余部分按成交价开新仓"""
+        szi, entry_px = self.positions.get(coin, (0.0, px))
+        new_szi = round(szi + signed_sz, 10)
+        if szi == 0 or (szi > 0) == (signed_sz > 0):
+            entry_px = (szi * entry_px + signed_sz * px) / new_szi
+        else:
+            closed = min(abs(signed_sz), abs(szi))
+            self.realized_pnl += closed * (px - entry_px) * (1 if szi > 0 else -1)
+            self.cash += closed * (px - entry_px) * (1 if szi > 0 else -1)
+            if abs(signed_sz) > abs(szi):
+                entry_px = px
+        if new_szi == 0:
+            self.positions.pop(coin, None)
+        else:
+            self.positions[coin] = (new_szi, entry_px)
+
+    def _place(self, wire):
+        coin = self.asset_to_coin[wire["a"]]
+        is_buy = wire["b"]
+        sz = float(wire["s"])
+        limit_px = float(wire["p"])
+        szi = self.positions.get(coin, (0.0, 0.0))[0]
+        self.order_count += 1
+        reducing = szi != 0 and (szi > 0) != is_buy
+        if wire["r"]:
+            # reduce-only 订单最多只能把仓位减到 0
+            if not reducing:
+                self.reject_count += 1
+                return {"error": "Reduce only order would increase position."}
+            sz = min(sz, abs(szi))
+        mid = self.mids.get(coin)
+        if mid is None:
+            self.reject_count += 1
+            return {"error": f"No mark price for asset={wire['a']}."}
+        increase = sz - abs(szi) if reducing else sz
+        if increase > 0:
+            leverage = self._leverage(coin)[0]
+            if increase * mid / leverage > self.account_value() - self.margin_used():
+                self.reject_count += 1
+                return {"error": f"Insufficient margin to place order. asset={wire['a']}"}
+        filled, cost = self._match(coin, is_buy, sz, limit_px)
+        filled = round(filled, self.asset_index.get(coin).sz_decimals)
+        if filled <= 0:
+            self.reject_count += 1
+            return {"error": f"Order could not immediately match against any resting orders. asset={wire['a']}"}
+        avg_px = cost / filled
+        fee = cost * self.fee_rate
+        self._apply_fill(coin, filled if is_buy else -filled, avg_px)
+        self.cash -= fee
+        self.fill_count += 1
+        self.notional_traded += cost
+        self.fees_paid += fee
+        self.slippage_cost += (avg_px - mid) * filled if is_buy else (mid - avg_px) * filled
+        return {"filled": {"totalSz": str(filled), "avgPx": str(round(avg_px, 8)), "oid": self.order_count}}
+
+    def _post_action(self, action, signature, nonce):
+        with self.lock:
+            self.request_count += 1
+            if action["type"] == "updateLeverage":
+                self.leverage_update_count += 1
+                self.leverages[self.asset_to_coin[action["asset"]]] = (action["leverage"], action["isCross"])
+                return {"status": "ok", "response": {"type": "default"}}
+            if action["type"] != "order":
+                raise NotImplementedError(f"PaperExchange does not support {action['type']}")
+            if self.book_fetcher is not None:
+                self._fetch_books({self.asset_to_coin[wire["a"]] for wire in action["orders"]})
+            statuses = [self._place(wire) for wire in action["orders"]]
+            return {"status": "ok", "response": {"type": "order", "data": {"statuses": statuses}}}
+
+
+class PaperHub(engine.MarketDataHub):
+    """纸面交易用的数据中心：目标地址与中间价照常请求，纸面账户的 user_state 直接取自对应的 PaperExchange
+
+    accounts 为 {地址: PaperExchange}。每个 tick 把新的中间价交给各纸面账户 (盘口在下单时按需获取)，
+    并记录纸面账户的累计统计。
+    """
+
+    def __init__(self, info, accounts):
+        super().__init__(info)
+        self.accounts = {address.lower(): exchange for address, exchange in accounts.items()}
+
+    def fetch(self, addresses):
+        snapshot = super().fetch({address: role for address, role in addresses.items() if address.lower() not in self.accounts})
+        for address, exchange in self.accounts.items():
+            exchange.set_market(snapshot.all_mids)
+            snapshot.set_user_state(address, exchange.user_state())
+            log_stats(exchange, address)
+        return snapshot
+
+
+def log_stats(exchange, label):
+    stats = exchange.stats()
+    logging.info(
+        f"[PAPER] {label}: equity ${stats['account_value']:,.2f} (pnl ${stats['pnl']:+,.2f}), margin used ${stats['margin_used']:,.2f}, "
+        f"{stats['positions']} positions, {stats['fills']}/{stats['orders']} orders filled ({stats['rejected']} rejected), "
+        f"traded ${stats['notional']:,.2f}, fees ${stats['fees']:,.2f}, slippage ${stats['slippage']:,.2f}"
+    )
@@ -0,0 +1,71 @@
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# 共享线程池的初始线程数。每轮同时提交的请求更多时 (例如 50 个目标地址加上自己的账户与 allMids)，
+# 由 reserve_workers 扩大线程池，使所有请求都能并发发出，一轮的耗时不随目标数量线性增长
+MAX_FETCH_WORKERS = 32
+
+_executor = ThreadPoolExecutor(max_workers=MAX_FETCH_WORKERS, thread_name_prefix="state-fetch")
+_executor_workers = MAX_FETCH_WORKERS
+_executor_lock = threading.Lock()
+
+
+def load_target_weights(path):
+    """从 JSON 文件读取 {地址: 权重}"""
+    with open(path) as f:
+        weights = json.load(f)
+    if not isinstance(weights, dict) or not weights:
+        raise ValueError(f"Targets file must contain a non-empty {{address: weight}} object: {path}")
+    return {address: float(weight) for address, weight in weights.items()}
+
+
+def reserve_workers(count):
+    """确保共享线程池至少有 count 个线程；在提交一轮的全部请求之前调用"""
+    global _executor, _executor_workers
+    if count <= _executor_workers:
+        return
+    with _executor_lock:
+        if count > _executor_workers:
+            # 旧线程池中已提交的请求照常完成；submit 也持有该锁，替换之后不会再有请求提交到旧线程池
+            old_executor = _executor
+            _executor = ThreadPoolExecutor(max_workers=count, thread_name_prefix="state-fetch")
+            _executor_workers = count
+            old_executor.shutdown(wait=False)
+
+
+def submit(fn, *args):
+    """在共享线程池中提交一个请求，返回 Future"""
+    with _executor_lock:
+        return _executor.submit(fn, *args)
+
+
+def blend_target_states(states, weights):
+    """把多个目标地址的仓位按权重净额合并成一个与 user_state 格式相同的目标状态
+
+    每个币种的 szi 为各目标 szi 的加权和；杠杆取对净仓位方向贡献最大的那个目标的杠杆。
+    """
+    net_szi = {}
+    leader = {}
+    for state, weight in zip(states, weights):
+        for asset_position in state.get("assetPositions", []):
+            position = asset_position.get("position", {})
+            szi = float(position.get("szi", 0)) * weight
+            if szi == 0:
+                continue
+            coin = position["coin"]
+            net_szi[coin] = net_szi.get(coin, 0.0) + szi
+            leader.setdefault(coin, []).append((szi, int(position["leverage"]["value"])))
+
+    asset_positions = []
+    for coin, szi in net_szi.items():
+        # 多空对冲后的浮点残差视为无仓位
+        if abs(szi) < 1e-12:
+            continue
+        same_side = [item for item in leader[coin] if (item[0] > 0) == (szi > 0)]
+        leverage = max(same_side, key=lambda item: abs(item[0]))[1]
+        asset_positions.append({
+            "type": "oneWay",
+            "position": {"coin": coin, "szi": str(szi), "leverage": {"type": "isolated", "value": leverage}},
+        })
+    return {"assetPositions": asset_positions}
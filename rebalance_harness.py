@@ -0,0 +1,107 @@
+# 比较两种仓位再平衡方式在典型场景下的订单数、成交名义价值和空仓轮数。
+#
+#   python rebalance_harness.py
+#
+# 每个场景中目标仓位按给定序列逐轮变化，我方账户由 paper_exchange.CountingExchange 模拟，
+# 订单按当轮中间价立即成交，不会发送任何网络请求。每个场景发出的杠杆更新与订单 (方向、数量、reduce-only)
+# 必须与 EXPECTED 完全一致，否则抛出 AssertionError。
+
+import logging
+
+import ds_copier_v2
+import fixtures
+import snapshot
+from paper_exchange import CountingExchange
+
+ASSET_INDEX = snapshot.AssetIndex({"universe": [{"name": "BTC", "szDecimals": 5}, {"name": "ETH", "szDecimals": 4}]})
+MIDS = {"BTC": "100000", "ETH": "3500"}
+
+# 每个场景是一组逐轮的目标仓位 {coin: (szi, leverage)}
+SCENARIOS = {
+    "steady": [{"BTC": (10.0, 5)}] * 4,
+    "grow 20%": [{"BTC": (10.0, 5)}, {"BTC": (12.0, 5)}, {"BTC": (12.0, 5)}, {"BTC": (12.0, 5)}],
+    "shrink 30%": [{"BTC": (10.0, 5)}, {"BTC": (7.0, 5)}, {"BTC": (7.0, 5)}, {"BTC": (7.0, 5)}],
+    "scale in x4": [{"ETH": (100.0, 3)}, {"ETH": (150.0, 3)}, {"ETH": (200.0, 3)}, {"ETH": (250.0, 3)}, {"ETH": (250.0, 3)}],
+    "flip direction": [{"BTC": (10.0, 5)}, {"BTC": (-10.0, 5)}, {"BTC": (-10.0, 5)}],
+    "change leverage": [{"BTC": (10.0, 5)}, {"BTC": (10.0, 10)}, {"BTC": (10.0, 10)}],
+}
+
+# 以 COPY_NOTIONAL_RATIO = 0.0018、SZI_TOLERANCE_RATIO = 0.05 计算的预期操作序列：
+# ("leverage", coin, 杠杆) 或 (coin, "B"/"A", 数量, reduce_only)
+_OPEN_BTC = [("leverage", "BTC", 5), ("BTC", "B", 0.018, False)]
+_CLOSE_BTC = [("BTC", "A", 0.018, True)]
+EXPECTED = {
+    ("steady", "close"): _OPEN_BTC,
+    ("steady", "delta"): _OPEN_BTC,
+    ("grow 20%", "close"): _OPEN_BTC + _CLOSE_BTC + [("leverage", "BTC", 5), ("BTC", "B", 0.0216, False)],
+    ("grow 20%", "delta"): _OPEN_BTC + [("BTC", "B", 0.0036, False)],
+    ("shrink 30%", "close"): _OPEN_BTC + _CLOSE_BTC + [("leverage", "BTC", 5), ("BTC", "B", 0.0126, False)],
+    ("shrink 30%", "delta"): _OPEN_BTC + [("BTC", "A", 0.0054, True)],
+    ("scale in x4", "close"): [
+        ("leverage", "ETH", 3), ("ETH", "B", 0.18, False), ("ETH", "A", 0.18, True),
+        ("leverage", "ETH", 3), ("ETH", "B", 0.36, False), ("ETH", "A", 0.36, True),
+        ("leverage", "ETH", 3), ("ETH", "B", 0.45, False),
+    ],
+    ("scale in x4", "delta"): [("leverage", "ETH", 3), ("ETH", "B", 0.18, False)] + [("ETH", "B", 0.09, False)] * 3,
+    # 反向与改杠杆在两种方式下都先全部平仓，下一轮再按新方向 / 新杠杆开仓
+    ("flip direction", "close"): _OPEN_BTC + _CLOSE_BTC + [("leverage", "BTC", 5), ("BTC", "A", 0.018, False)],
+    ("flip direction", "delta"): _OPEN_BTC + _CLOSE_BTC + [("leverage", "BTC", 5), ("BTC", "A", 0.018, False)],
+    ("change leverage", "close"): _OPEN_BTC + _CLOSE_BTC + [("leverage", "BTC", 10), ("BTC", "B", 0.018, False)],
+    ("change leverage", "delta"): _OPEN_BTC + _CLOSE_BTC + [("leverage", "BTC", 10), ("BTC", "B", 0.018, False)],
+}
+
+
+class RecordingExchange(CountingExchange):
+    """在 CountingExchange 的基础上按顺序记录每个杠杆更新与订单"""
+
+    def __init__(self, asset_index):
+        super().__init__(asset_index)
+        self.actions = []
+
+    def _post_action(self, action, signature, nonce):
+        if action["type"] == "updateLeverage":
+            self.actions.append(("leverage", self.asset_to_coin[action["asset"]], action["leverage"]))
+        elif action["type"] == "order":
+            for wire in action["orders"]:
+                self.actions.append((self.asset_to_coin[wire["a"]], "B" if wire["b"] else "A", float(wire["s"]), wire["r"]))
+        return super()._post_action(action, signature, nonce)
+
+
+def run_scenario(steps, mode):
+    """按指定再平衡方式运行一个场景，返回统计结果"""
+    ds_copier_v2.REBALANCE_MODE = mode
+    exchange = RecordingExchange(ASSET_INDEX)
+    exchange.set_mids(MIDS)
+    flat_cycles = 0
+    for positions in steps:
+        ds_copier_v2.sync_coins(exchange, MIDS, fixtures.user_state(positions), exchange.user_state(), list(positions), ASSET_INDEX)
+        # 目标有仓位而我方在本轮结束时空仓，说明这一轮没有跟上
+        flat_cycles += sum(1 for coin in positions if exchange.positions.get(coin, 0) == 0)
+    return {
+        "orders": exchange.order_count,
+        "requests": exchange.request_count,
+        "notional": exchange.notional_traded,
+        "flat_cycles": flat_cycles,
+        "actions": exchange.actions,
+    }
+
+
+def main():
+    logging.basicConfig(level=logging.ERROR)
+    ds_copier_v2.DRY_RUN = False
+    # EXPECTED 按这组参数计算
+    ds_copier_v2.COPY_NOTIONAL_RATIO = 0.0018
+    ds_copier_v2.SZI_TOLERANCE_RATIO = 0.05
+    ds_copier_v2.MIN_NOTIONAL_VALUE = 10
+    print(f"{'scenario':<18}{'mode':<8}{'orders':>8}{'requests':>10}{'notional $':>14}{'flat cycles':>13}")
+    for name, steps in SCENARIOS.items():
+        for mode in ("close", "delta"):
+            result = run_scenario(steps, mode)
+            expected = EXPECTED[(name, mode)]
+            assert result["actions"] == expected, f"{name} / {mode}: sent {result['actions']}, expected {expected}"
+            print(f"{name:<18}{mode:<8}{result['orders']:>8}{result['requests']:>10}{result['notional']:>14,.2f}{result['flat_cycles']:>13}")
+    print("OK: every scenario sent the expected leverage updates and orders")
+
+
+if __name__ == "__main__":
+    main()
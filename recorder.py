@@ -0,0 +1,266 @@
+# 行情与仓位快照的列式记录器。
+#
+# 每个记录目录包含若干按列追加写入的原始二进制文件 (小端序)，可以直接用 numpy.memmap 映射：
+#
+#   cycles_ts.f8                 每一轮同步的时间戳 (秒)，单调递增，可用 searchsorted 按时间定位
+#   mids_cycle.u4 / mids_coin.u2 / mids_px.f8
+#                                每轮每个币种一行中间价
+#   pos_cycle.u4 / pos_addr.u2 / pos_coin.u2 / pos_szi.f8 / pos_lev.u2
+#                                每轮每个地址每个非零仓位一行
+#   states_cycle.u4 / states_addr.u2
+#                                每轮记录了哪些地址的 user_state (空仓地址也会有一行)
+#   book_cycle.u4 / book_coin.u2 / book_side.u1 / book_px.f8 / book_sz.f8
+#                                每轮每个币种的 L2 盘口，每档一行 (side 0 为买盘、1 为卖盘，按盘口顺序)；只在 --record-books 时写入
+#   symbols.json                 币种与地址的编号表
+#   session.json                 记录时使用的 universe 元数据与目标权重，供离线回放使用
+
+import os
+import json
+import time
+
+import numpy as np
+
+COLUMNS = {
+    "cycles_ts": np.float64,
+    "mids_cycle": np.uint32,
+    "mids_coin": np.uint16,
+    "mids_px": np.float64,
+    "pos_cycle": np.uint32,
+    "pos_addr": np.uint16,
+    "pos_coin": np.uint16,
+    "pos_szi": np.float64,
+    "pos_lev": np.uint16,
+    "states_cycle": np.uint32,
+    "states_addr": np.uint16,
+    "book_cycle": np.uint32,
+    "book_coin": np.uint16,
+    "book_side": np.uint8,
+    "book_px": np.float64,
+    "book_sz": np.float64,
+}
+
+_EXTENSIONS = {np.float64: "f8", np.uint32: "u4", np.uint16: "u2", np.uint8: "u1"}
+
+
+def _column_path(directory, name):
+    return os.path.join(directory, f"{name}.{_EXTENSIONS[COLUMNS[name]]}")
+
+
+class SnapshotRecorder:
+    """把每一轮获取到的 all_mids 与各地址 user_state 追加写入列式文件"""
+
+    def __init__(self, directory, meta_data=None, target_weights=None):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        if meta_data is not None or target_weights is not None:
+            with open(os.path.join(directory, "session.json"), "w") as f:
+                json.dump({"meta": meta_data, "target_weights": target_weights}, f)
+        self.symbols_path = os.path.join(directory, "symbols.json")
+        if os.path.exists(self.symbols_path):
+            with open(self.symbols_path) as f:
+                symbols = json.load(f)
+        else:
+            symbols = {"coins": [], "addresses": []}
+        self.coins = symbols["coins"]
+        self.addresses = symbols["addresses"]
+        self.coin_ids = {coin: i for i, coin in enumerate(self.coins)}
+        self.address_ids = {address: i for i, address in enumerate(self.addresses)}
+        self.files = {name: open(_column_path(directory, name), "ab") for name in COLUMNS}
+        self.cycle = os.path.getsize(_column_path(directory, "cycles_ts")) // 8
+        self._symbols_dirty = False
+
+    def _id(self, table, ids, key):
+        if key not in ids:
+            ids[key] = len(table)
+            table.append(key)
+            self._symbols_dirty = True
+        return ids[key]
+
+    def _append(self, name, values):
+        np.asarray(values, dtype=COLUMNS[name]).tofile(self.files[name])
+
+    def record_cycle(self, all_mids, user_states, ts=None, books=None):
+        """记录一轮快照。user_states 为 {地址: user_state}，books 为可选的 {coin: l2Book 响应}"""
+        self._symbols_dirty = False
+        cycle = self.cycle
+        self._append("cycles_ts", [time.time() if ts is None else ts])
+
+        coin_ids = [self._id(self.coins, self.coin_ids, coin) for coin in all_mids]
+        self._append("mids_cycle", [cycle] * len(coin_ids))
+        self._append("mids_coin", coin_ids)
+        self._append("mids_px", [float(px) for px in all_mids.values()])
+
+        pos_addr, pos_coin, pos_szi, pos_lev, states_addr = [], [], [], [], []
+        for address, user_state in user_states.items():
+            address_id = self._id(self.addresses, self.address_ids, address)
+            states_addr.append(address_id)
+            for asset_position in user_state.get("assetPositions", []):
+                position = asset_position["position"]
+                szi = float(position["szi"])
+                if szi == 0:
+                    continue
+                pos_addr.append(address_id)
+                pos_coin.append(self._id(self.coins, self.coin_ids, position["coin"]))
+                pos_szi.append(szi)
+                pos_lev.append(int(position["leverage"]["value"]))
+        self._append("pos_cycle", [cycle] * len(pos_addr))
+        self._append("pos_addr", pos_addr)
+        self._append("pos_coin", pos_coin)
+        self._append("pos_szi", pos_szi)
+        self._append("pos_lev", pos_lev)
+        self._append("states_cycle", [cycle] * len(states_addr))
+        self._append("states_addr", states_addr)
+
+        book_coin, book_side, book_px, book_sz = [], [], [], []
+        for coin, book in (books or {}).items():
+            coin_id = self._id(self.coins, self.coin_ids, coin)
+            for side, levels in enumerate(book["levels"]):
+                for level in levels:
+                    book_coin.append(coin_id)
+                    book_side.append(side)
+                    book_px.append(float(level["px"]))
+                    book_sz.append(float(level["sz"]))
+        self._append("book_cycle", [cycle] * len(book_coin))
+        self._append("book_coin", book_coin)
+        self._append("book_side", book_side)
+        self._append("book_px", book_px)
+        self._append("book_sz", book_sz)
+
+        if self._symbols_dirty:
+            tmp_path = self.symbols_path + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump({"coins": self.coins, "addresses": self.addresses}, f)
+            os.replace(tmp_path, self.symbols_path)
+        for f in self.files.values():
+            f.flush()
+        self.cycle += 1
+
+    def close(self):
+        for f in self.files.values():
+            f.close()
+
+
+class Recording:
+    """以内存映射方式打开一个记录目录"""
+
+    def __init__(self, directory):
+        with open(os.path.join(directory, "symbols.json")) as f:
+            symbols = json.load(f)
+        self.coins = symbols["coins"]
+        self.addresses = symbols["addresses"]
+        session_path = os.path.join(directory, "session.json")
+        self.session = {}
+        if os.path.exists(session_path):
+            with open(session_path) as f:
+                self.session = json.load(f)
+        self.columns = {}
+        # 进程在写入过程中被终止时，各列长度可能不一致，以最后一个完整的轮次为准
+        cycle_count = os.path.getsize(_column_path(directory, "cycles_ts")) // 8
+        for name, dtype in COLUMNS.items():
+            path = _column_path(directory, name)
+            # 早期的记录没有盘口列
+            count = os.path.getsize(path) // np.dtype(dtype).itemsize if os.path.exists(path) else 0
+            self.columns[name] = np.memmap(path, dtype=dtype, mode="r", shape=(count,)) if count else np.zeros(0, dtype=dtype)
+        for prefix in ("mids", "pos", "states", "book"):
+            cycles = self.columns[f"{prefix}_cycle"]
+            complete = int(np.searchsorted(cycles, cycle_count - 1, side="right"))
+            for name in COLUMNS:
+                if name.startswith(prefix + "_"):
+                    self.columns[name] = self.columns[name][:complete]
+        self.timestamps = self.columns["cycles_ts"][:cycle_count]
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def cycle_range(self, start_ts=None, end_ts=None):
+        """返回时间范围 [start_ts, end_ts) 对应的轮次区间"""
+        start = 0 if start_ts is None else int(np.searchsorted(self.timestamps, start_ts))
+        end = len(self) if end_ts is None else int(np.searchsorted(self.timestamps, end_ts))
+        return start, end
+
+    def _rows(self, prefix, cycle):
+        cycles = self.columns[f"{prefix}_cycle"]
+        return int(np.searchsorted(cycles, cycle)), int(np.searchsorted(cycles, cycle, side="right"))
+
+    def all_mids(self, cycle):
+        """按 info.all_mids() 的格式还原某一轮的中间价"""
+        lo, hi = self._rows("mids", cycle)
+        coins = self.columns["mids_coin"][lo:hi]
+        pxs = self.columns["mids_px"][lo:hi]
+        return {self.coins[c]: str(px) for c, px in zip(coins.tolist(), pxs.tolist())}
+
+    def user_state(self, cycle, address):
+        """按 info.user_state() 的格式还原某一轮某个地址的仓位；该轮未记录此地址时返回 None"""
+        address_id = self.addresses.index(address) if address in self.addresses else -1
+        lo, hi = self._rows("states", cycle)
+        if address_id not in self.columns["states_addr"][lo:hi]:
+            return None
+        lo, hi = self._rows("pos", cycle)
+        mask = self.columns["pos_addr"][lo:hi] == address_id
+        return {
+            "assetPositions": [
+                {"type": "oneWay", "position": {"coin": self.coins[c], "szi": str(szi), "leverage": {"type": "isolated", "value": lev}}}
+                for c, szi, lev in zip(
+                    self.columns["pos_coin"][lo:hi][mask].tolist(),
+                    self.columns["pos_szi"][lo:hi][mask].tolist(),
+                    self.columns["pos_lev"][lo:hi][mask].tolist(),
+                )
+            ]
+        }
+
+    def l2_books(self, cycle):
+        """按 info.l2_snapshot() 的格式还原某一轮记录的盘口 {coin: l2Book 响应}；没有记录盘口时返回空字典"""
+        lo, hi = self._rows("book", cycle)
+        books = {}
+        for c, side, px, sz in zip(
+            self.columns["book_coin"][lo:hi].tolist(),
+            self.columns["book_side"][lo:hi].tolist(),
+            self.columns["book_px"][lo:hi].tolist(),
+            self.columns["book_sz"][lo:hi].tolist(),
+        ):
+            coin = self.coins[c]
+            if coin not in books:
+                books[coin] = {"coin": coin, "levels": [[], []]}
+            books[coin]["levels"][side].append({"px": str(px), "sz": str(sz), "n": 1})
+        return books
+
+    def dense(self, coins, address, start=0, end=None):
+        """把一段轮次展开为稠密数组：(mids[T, C], szi[T, C], leverage[T, C], recorded[T])
+
+        recorded[t] 表示该轮是否记录了此地址的状态；未记录的轮次沿用上一轮的仓位。
+        """
+        end = len(self) if end is None else end
+        T, C = end - start, len(coins)
+        coin_col = np.full(len(self.coins), -1, dtype=np.int64)
+        for j, coin in enumerate(coins):
+            if coin in self.coins:
+                coin_col[self.coins.index(coin)] = j
+
+        mids = np.full((T, C), np.nan)
+        lo, hi = int(np.searchsorted(self.columns["mids_cycle"], start)), int(np.searchsorted(self.columns["mids_cycle"], end))
+        cols = coin_col[self.columns["mids_coin"][lo:hi]]
+        keep = cols >= 0
+        mids[self.columns["mids_cycle"][lo:hi][keep].astype(np.int64) - start, cols[keep]] = self.columns["mids_px"][lo:hi][keep]
+
+        szi = np.zeros((T, C))
+        lev = np.zeros((T, C), dtype=np.int64)
+        recorded = np.zeros(T, dtype=bool)
+        if address in self.addresses:
+            address_id = self.addresses.index(address)
+            lo, hi = int(np.searchsorted(self.columns["states_cycle"], start)), int(np.searchsorted(self.columns["states_cycle"], end))
+            states_mask = self.columns["states_addr"][lo:hi] == address_id
+            recorded[self.columns["states_cycle"][lo:hi][states_mask].astype(np.int64) - start] = True
+
+            lo, hi = int(np.searchsorted(self.columns["pos_cycle"], start)), int(np.searchsorted(self.columns["pos_cycle"], end))
+            cols = coin_col[self.columns["pos_coin"][lo:hi]]
+            keep = (self.columns["pos_addr"][lo:hi] == address_id) & (cols >= 0)
+            rows = self.columns["pos_cycle"][lo:hi][keep].astype(np.int64) - start
+            szi[rows, cols[keep]] = self.columns["pos_szi"][lo:hi][keep]
+            lev[rows, cols[keep]] = self.columns["pos_lev"][lo:hi][keep]
+
+        # 缺失的中间价与未记录的轮次向前填充
+        steps = np.arange(T)
+        last_mid = np.maximum.accumulate(np.where(np.isnan(mids), 0, steps[:, None]), axis=0)
+        mids = mids[last_mid, np.arange(C)]
+        last_state = np.maximum.accumulate(np.where(recorded, steps, 0))
+        return mids, szi[last_state], lev[last_state], recorded
@@ -0,0 +1,278 @@
+# 离线回放与参数扫描。
+#
+#   python replay.py records/ --replay
+#       把记录的每一轮快照依次送入 ds_copier_v2.sync_coins，在 paper_exchange.CountingExchange 上模拟成交。
+#
+#   python replay.py records/ --ratios 0.001,0.0018,0.003 --tolerances 0.02,0.05,0.1 --min-notionals 10,20
+#       对参数网格做向量化扫描：所有参数组合与币种在同一个 NumPy 数组上逐轮推进。
+#       加上 --verify 会用 --replay 的逐轮逻辑复核第一个参数组合的订单数与成交额。
+#
+#   python replay.py records/ --paper 10000
+#       与 --replay 相同，但在 paper_exchange.PaperExchange 上模拟：订单逐档吃掉记录的 L2 盘口 (--record-books)，
+#       仓位、杠杆与保证金在纸面账户中逐轮延续，输出累计手续费、滑点与盈亏。
+#
+# 记录由 ds_copier_v2.py --record records/ 生成。
+
+import time
+import logging
+import argparse
+import itertools
+import contextlib
+
+import numpy as np
+
+import ds_copier_v2
+import portfolio
+import snapshot
+from paper_exchange import TAKER_FEE_RATE, CountingExchange, PaperExchange
+from recorder import Recording
+
+
+@contextlib.contextmanager
+def copier_parameters(**values):
+    """临时设置 ds_copier_v2 的模块级参数，退出时恢复原值，同一进程中的后续回放或调用方不受影响"""
+    saved = {name: getattr(ds_copier_v2, name) for name in values}
+    for name, value in values.items():
+        setattr(ds_copier_v2, name, value)
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            setattr(ds_copier_v2, name, value)
+
+
+def replay(recording, asset_index, target_weights, coins, ratio, tolerance, min_notional, mode="delta", start=0, end=None, paper_equity=None):
+    """逐轮回放：与实盘相同的 sync_coins 逻辑，订单在 CountingExchange 上按中间价成交
+
+    paper_equity 不为 None 时改用以此为初始资金的 PaperExchange，订单按记录的盘口成交 (没有记录盘口时按中间价)，
+    返回 PaperExchange.stats()。
+    """
+    end = len(recording) if end is None else end
+    exchange = CountingExchange(asset_index) if paper_equity is None else PaperExchange(asset_index, paper_equity)
+    addresses = list(target_weights)
+    weights = [target_weights[a] for a in addresses]
+    last_states = {address: {"assetPositions": []} for address in addresses}
+    with copier_parameters(
+        DRY_RUN=False, COPY_NOTIONAL_RATIO=ratio, SZI_TOLERANCE_RATIO=tolerance, MIN_NOTIONAL_VALUE=min_notional, REBALANCE_MODE=mode,
+    ):
+        for cycle in range(start, end):
+            all_mids = recording.all_mids(cycle)
+            if paper_equity is None:
+                exchange.set_mids(all_mids)
+            else:
+                exchange.set_market(all_mids, recording.l2_books(cycle))
+            for address in addresses:
+                state = recording.user_state(cycle, address)
+                if state is not None:
+                    last_states[address] = state
+            target_user_state = portfolio.blend_target_states([last_states[a] for a in addresses], weights)
+            ds_copier_v2.sync_coins(exchange, all_mids, target_user_state, exchange.user_state(), coins, asset_index)
+    if paper_equity is not None:
+        return exchange.stats()
+    return {"orders": exchange.order_count, "notional": exchange.notional_traded}
+
+
+def blended_dense(recording, coins, target_weights, start, end):
+    """把各目标的稠密仓位按权重净额合并，杠杆取净方向上贡献最大的目标 (与 portfolio.blend_target_states 一致)"""
+    contributions, leverages = [], []
+    for address, weight in target_weights.items():
+        mids, szi, lev, _ = recording.dense(coins, address, start, end)
+        contributions.append(szi * weight)
+        leverages.append(lev)
+    contribution = np.stack(contributions)
+    leverage = np.stack(leverages)
+    net = contribution.sum(axis=0)
+    net[np.abs(net) < 1e-12] = 0.0
+    same_side = np.sign(contribution) == np.sign(net)[None]
+    leader = np.argmax(np.where(same_side, np.abs(contribution), -1.0), axis=0)
+    net_leverage = np.take_along_axis(leverage, leader[None], axis=0)[0]
+    return mids, net, net_leverage
+
+
+def sweep(mids, target_szi, target_leverage, sz_decimals, ratios, tolerances, min_notionals, mode="delta"):
+    """对 P 个参数组合 × C 个币种做向量化模拟，按时间逐轮推进。
+
+    判断顺序与 ds_copier_v2.plan_coin 相同。只有目标仓位/杠杆变化、某个参数下 MIN_NOTIONAL 判断翻转、
+    上一轮有成交，或因金额不足而搁置的加仓随中间价上涨变得足够大时才需要重新计算；其余轮次仓位不变，
+    盈亏与跟踪误差通过中间价的差分与前缀和按区间累加。返回每个参数组合的订单数、成交额、手续费、盈亏与平均跟踪误差。
+    """
+    T, C = target_szi.shape
+    ratios = np.asarray(ratios, dtype=float)[:, None]
+    tolerances = np.asarray(tolerances, dtype=float)[:, None]
+    min_notionals = np.asarray(min_notionals, dtype=float)[:, None]
+    P = len(ratios)
+    scale = 10.0 ** np.asarray(sz_decimals, dtype=float)
+
+    priced_all = ~np.isnan(mids) & (mids > 0)
+    mids0 = np.where(priced_all, mids, 0.0)
+    mid_cumsum = np.vstack([np.zeros(C), np.cumsum(mids0, axis=0)])
+
+    events = np.zeros(T, dtype=bool)
+    if T:
+        events[0] = True
+        events[1:] |= (target_szi[1:] != target_szi[:-1]).any(axis=1)
+        events[1:] |= (target_leverage[1:] != target_leverage[:-1]).any(axis=1)
+        events[1:] |= (priced_all[1:] != priced_all[:-1]).any(axis=1)
+        target_notional = np.abs(target_szi) * mids0
+        for p in range(P):
+            large_enough = target_notional * ratios[p, 0] >= min_notionals[p, 0]
+            events[1:] |= (large_enough[1:] != large_enough[:-1]).any(axis=1)
+
+    my_szi = np.zeros((P, C))
+    my_lev = np.zeros((P, C), dtype=np.int64)
+    ideal = np.zeros((P, C))
+    orders = np.zeros(P, dtype=np.int64)
+    notional = np.zeros(P)
+    pnl = np.zeros(P)
+    tracking = np.zeros(P)
+    last = 0
+    event_steps = np.flatnonzero(events)
+
+    t = 0
+    while t < T:
+        # 结算上一个区间 [last, t) 内不变仓位的盈亏与跟踪误差
+        pnl += (my_szi * (mids0[t] - mids0[last])).sum(axis=1)
+        tracking += (np.abs(my_szi - ideal) * (mid_cumsum[t] - mid_cumsum[last])).sum(axis=1)
+        last = t
+
+        mid0 = mids0[t]
+        priced = priced_all[t]
+        tszi = target_szi[t]
+        tdir = np.sign(tszi)
+        tlev = target_leverage[t]
+        desired = np.abs(tszi) * ratios
+        rounded = np.round(desired * scale) / scale
+        has_target = (tszi != 0) & priced
+        large_enough = desired * mid0 >= min_notionals
+        active = has_target & large_enough & (rounded > 0)
+
+        holding = my_szi != 0
+        my_abs = np.abs(my_szi)
+        matches = holding & (np.sign(my_szi) == tdir) & (my_lev == tlev)
+
+        new_szi = my_szi.copy()
+        close = priced & holding & ((~has_target) | (has_target & ~large_enough) | (active & ~matches))
+        new_szi[close] = 0.0
+
+        opening = active & ~holding
+        new_szi = np.where(opening, tdir * rounded, new_szi)
+        my_lev = np.where(opening, tlev, my_lev)
+
+        drift = active & matches & (np.abs(my_abs - rounded) > rounded * tolerances)
+        unblock_price = None
+        if mode == "close":
+            new_szi[drift] = 0.0
+        else:
+            delta = np.round((rounded - my_abs) * scale) / scale
+            increase_too_small = drift & (delta > 0) & (delta * mid0 < min_notionals)
+            resize = drift & (delta != 0) & ~increase_too_small
+            new_szi = np.where(resize, tdir * (my_abs + delta), new_szi)
+            if increase_too_small.any():
+                # 被搁置的加仓在中间价涨到 min_notional / delta 时变得足够大
+                with np.errstate(divide="ignore"):
+                    unblock_price = np.where(increase_too_small, min_notionals / delta, np.inf).min(axis=0)
+
+        traded = np.abs(new_szi - my_szi)
+        traded_any = traded > 0
+        orders += traded_any.sum(axis=1)
+        notional += (traded * mid0).sum(axis=1)
+        my_szi = new_szi
+        ideal = np.where(has_target & large_enough, tszi * ratios, 0.0)
+
+        if traded_any.any():
+            t += 1
+            continue
+        next_event = event_steps[np.searchsorted(event_steps, t, side="right"):][:1]
+        next_t = int(next_event[0]) if len(next_event) else T
+        if unblock_price is not None:
+            unblocked = (mids0[t + 1:next_t] >= unblock_price).any(axis=1)
+            if unblocked.any():
+                next_t = t + 1 + int(np.argmax(unblocked))
+        t = next_t
+
+    if T:
+        pnl += (my_szi * (mids0[T - 1] - mids0[last])).sum(axis=1)
+        tracking += (np.abs(my_szi - ideal) * (mid_cumsum[T] - mid_cumsum[last])).sum(axis=1)
+
+    fees = notional * TAKER_FEE_RATE
+    return {
+        "orders": orders,
+        "notional": notional,
+        "fees": fees,
+        "pnl": pnl - fees,
+        "tracking": tracking / max(T, 1),
+    }
+
+
+def _floats(text):
+    return [float(x) for x in text.split(",") if x]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded snapshots and sweep copier parameters offline.")
+    parser.add_argument("directory", help="Recording directory created with ds_copier_v2.py --record.")
+    parser.add_argument("--coins", default=",".join(ds_copier_v2.TARGET_COINS))
+    parser.add_argument("--mode", choices=["delta", "close"], default=ds_copier_v2.REBALANCE_MODE)
+    parser.add_argument("--ratios", default=str(ds_copier_v2.COPY_NOTIONAL_RATIO))
+    parser.add_argument("--tolerances", default=str(ds_copier_v2.SZI_TOLERANCE_RATIO))
+    parser.add_argument("--min-notionals", default=str(ds_copier_v2.MIN_NOTIONAL_VALUE))
+    parser.add_argument("--start", type=float, help="Start timestamp (seconds).")
+    parser.add_argument("--end", type=float, help="End timestamp (seconds).")
+    parser.add_argument("--replay", action="store_true", help="Run the cycle-by-cycle replay through sync_coins for the first parameter set.")
+    parser.add_argument("--paper", type=float, metavar="EQUITY", help="Replay the first parameter set on a paper account with this starting equity, filling against recorded L2 books.")
+    parser.add_argument("--verify", action="store_true", help="Cross-check the vectorized sweep against --replay for the first parameter set.")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.CRITICAL)
+    recording = Recording(args.directory)
+    if not recording.session.get("meta"):
+        raise SystemExit(f"{args.directory} has no session.json with universe metadata.")
+    asset_index = snapshot.AssetIndex(recording.session["meta"])
+    target_weights = recording.session.get("target_weights") or {ds_copier_v2.TARGET_USER_ADDRESS: 1.0}
+    coins = [coin for coin in args.coins.split(",") if coin in asset_index]
+    start, end = recording.cycle_range(args.start, args.end)
+    print(f"Recording: {end - start} cycles, {len(coins)} coins, {len(target_weights)} target(s)")
+
+    grid = list(itertools.product(_floats(args.ratios), _floats(args.tolerances), _floats(args.min_notionals)))
+
+    if args.paper is not None:
+        ratio, tolerance, min_notional = grid[0]
+        started = time.perf_counter()
+        stats = replay(recording, asset_index, target_weights, coins, ratio, tolerance, min_notional, args.mode, start, end, args.paper)
+        elapsed = time.perf_counter() - started
+        span = float(recording.timestamps[end - 1] - recording.timestamps[start]) if end - start > 1 else 0.0
+        print(f"Paper (ratio={ratio}, tol={tolerance}, min=${min_notional}, equity=${args.paper:,.2f}): "
+              f"{stats['fills']}/{stats['orders']} orders filled ({stats['rejected']} rejected, {stats['mid_fills']} at mid without a book)")
+        print(f"  traded ${stats['notional']:,.2f}, fees ${stats['fees']:,.2f}, slippage ${stats['slippage']:,.2f}, "
+              f"realized ${stats['realized_pnl']:,.2f}, pnl ${stats['pnl']:+,.2f}, final margin used ${stats['margin_used']:,.2f}")
+        print(f"  {elapsed:.2f}s for {span / 3600:.1f}h of recorded time ({stats['orders'] / max(elapsed, 1e-9):,.0f} orders/s)")
+        return
+
+    if args.replay or args.verify:
+        ratio, tolerance, min_notional = grid[0]
+        started = time.perf_counter()
+        result = replay(recording, asset_index, target_weights, coins, ratio, tolerance, min_notional, args.mode, start, end)
+        elapsed = time.perf_counter() - started
+        span = float(recording.timestamps[end - 1] - recording.timestamps[start]) if end - start > 1 else 0.0
+        print(f"Replay (ratio={ratio}, tol={tolerance}, min=${min_notional}): {result['orders']} orders, ${result['notional']:,.2f} traded, "
+              f"{elapsed:.2f}s for {span / 3600:.1f}h of recorded time")
+
+    started = time.perf_counter()
+    mids, target_szi, target_leverage = blended_dense(recording, coins, target_weights, start, end)
+    sz_decimals = [asset_index.get(coin).sz_decimals for coin in coins]
+    results = sweep(mids, target_szi, target_leverage, sz_decimals, *zip(*grid), mode=args.mode)
+    elapsed = time.perf_counter() - started
+    print(f"Sweep of {len(grid)} parameter sets finished in {elapsed:.2f}s")
+    print(f"{'ratio':>10}{'tol':>8}{'min $':>8}{'orders':>9}{'traded $':>14}{'fees $':>10}{'pnl $':>12}{'avg tracking $':>16}")
+    for i, (ratio, tolerance, min_notional) in enumerate(grid):
+        print(f"{ratio:>10g}{tolerance:>8g}{min_notional:>8g}{results['orders'][i]:>9}{results['notional'][i]:>14,.2f}"
+              f"{results['fees'][i]:>10,.2f}{results['pnl'][i]:>12,.2f}{results['tracking'][i]:>16,.2f}")
+
+    if args.verify:
+        matches = result["orders"] == results["orders"][0] and abs(result["notional"] - results["notional"][0]) <= 1e-6 * max(1.0, result["notional"])
+        print(f"Verify: replay {result['orders']} orders / ${result['notional']:,.2f}, sweep {results['orders'][0]} orders / "
+              f"${results['notional'][0]:,.2f} -> {'OK' if matches else 'MISMATCH'}")
+
+
+if __name__ == "__main__":
+    main()
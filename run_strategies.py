@@ -0,0 +1,150 @@
+# 在一个进程中运行多个策略插件，共享一个行情数据中心与请求预算 (见 engine.py)。
+#
+#   python run_strategies.py --strategies strategies.json            # 模拟运行一轮
+#   python run_strategies.py --strategies strategies.json --live
+#
+# strategies.json 是策略配置列表 (格式见 strategies.json.example)，所有策略使用 config.json 中的账户：
+#
+#   {"type": "ds_copier", "name": "alts", "coins": ["ETH", "SOL"], "copy_ratio": 0.0018, "targets": {"0x...": 1.0}}
+#   {"type": "btc_follow", "name": "btc", "target": "0x...", "coin": "BTC", "investment_usd": 14, "take_profit_usd": 21}
+#
+# 同一账户上的策略不能交易相同的币种 (coins 为 null 表示全部币种)。btc_follow 没有模拟模式，只能与 --live 一起使用。
+
+import json
+import time
+import logging
+import argparse
+
+from hyperliquid.utils import constants
+
+import btc_follow_bot_v1
+import ds_copier_v2
+import engine
+import example_utils
+import followers
+import journal
+import scheduler
+import snapshot
+import tradelog
+import transport
+
+LOG_PATH = "strategies.log"
+
+
+def load_strategy_configs(path):
+    with open(path) as f:
+        configs = json.load(f)
+    if not isinstance(configs, list) or not configs:
+        raise ValueError(f"Strategies file must contain a non-empty list of strategy objects: {path}")
+    for i, config in enumerate(configs):
+        if config.get("type") not in ("ds_copier", "btc_follow"):
+            raise ValueError(f"Unknown strategy type {config.get('type')!r} in entry {i}")
+        config.setdefault("name", f"{config['type']}-{i}")
+    return configs
+
+
+def check_coin_overlap(configs):
+    """同一账户上两个策略交易同一币种时会互相平仓"""
+    claimed = {}
+    for config in configs:
+        coins = [config.get("coin", btc_follow_bot_v1.COIN)] if config["type"] == "btc_follow" else config.get("coins", ds_copier_v2.TARGET_COINS)
+        for coin in ["*"] if coins is None else coins:
+            for other_coin, other in claimed.items():
+                if "*" in (coin, other_coin) or coin == other_coin:
+                    raise ValueError(f"Strategies {other} and {config['name']} both trade {coin if coin != '*' else other_coin}")
+            claimed[coin] = config["name"]
+
+
+def build_strategies(configs, info, exchange, my_address, asset_index, live, journal_path):
+    strategies = []
+    for config in configs:
+        if config["type"] == "btc_follow":
+            strategy = btc_follow_bot_v1.BtcFollowStrategy(
+                exchange, my_address, asset_index,
+                target_address=config.get("target", btc_follow_bot_v1.TARGET_USER_ADDRESS),
+                coin=config.get("coin", btc_follow_bot_v1.COIN),
+                investment_usd=float(config.get("investment_usd", btc_follow_bot_v1.MY_INVESTMENT_USD)),
+                take_profit_usd=float(config.get("take_profit_usd", btc_follow_bot_v1.TAKE_PROFIT_USD)),
+            )
+        else:
+            # 每个跟单配置有自己的比例与日志文件 (ds_copier.<name>.journal)
+            follower = followers.Follower(
+                my_address, exchange, float(config.get("copy_ratio", ds_copier_v2.COPY_NOTIONAL_RATIO)),
+                journal.Journal(journal.account_path(journal_path, config["name"]), my_address) if live else None,
+                name=config["name"],
+            )
+            targets = config.get("targets")
+            strategy = ds_copier_v2.CopierStrategy(
+                info, exchange, my_address, config.get("coins", ds_copier_v2.TARGET_COINS), asset_index, [follower],
+                target_weights={address: float(weight) for address, weight in targets.items()} if targets else None,
+                last_signature=follower.journal.last_target if follower.journal is not None else None,
+            )
+        strategy.name = config["name"]
+        strategies.append(strategy)
+    return strategies
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run several strategy plugins on one shared market-data hub.")
+    parser.add_argument("--strategies", required=True, help="JSON list of strategy configurations, see strategies.json.example.")
+    parser.add_argument("--live", action="store_true", help="Trade for real. Without it, copier strategies run one simulated pass.")
+    parser.add_argument("--floor", type=float, default=ds_copier_v2.LOOP_FLOOR_SECONDS)
+    parser.add_argument("--ceiling", type=float, default=ds_copier_v2.LOOP_CEILING_SECONDS)
+    parser.add_argument("--journal", default=journal.JOURNAL_PATH, help="Base path of the per-strategy crash recovery journals (live mode only).")
+    parser.add_argument("--trade-log", default=ds_copier_v2.TRADE_LOG_PATH)
+    parser.add_argument("--debug", action="store_true")
+    parser.add_argument("--base-url", default=constants.MAINNET_API_URL)
+    args = parser.parse_args()
+
+    try:
+        configs = load_strategy_configs(args.strategies)
+        check_coin_overlap(configs)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+    if not args.live and any(config["type"] == "btc_follow" for config in configs):
+        parser.error("btc_follow strategies have no dry-run mode, pass --live")
+
+    tradelog.setup_logging(LOG_PATH, args.trade_log, level=logging.DEBUG if args.debug else logging.INFO)
+    ds_copier_v2.DRY_RUN = not args.live
+    logging.info(f"--- Strategy engine initializing ({'LIVE' if args.live else 'DRY RUN'}) ---")
+
+    shared_transport = transport.Transport()
+    cached_meta, cached_spot_meta = snapshot.read_meta_cache(args.base_url)
+    my_address, info, exchange, meta_data, spot_meta = example_utils.fast_setup(
+        base_url=args.base_url, skip_ws=True, meta=cached_meta, spot_meta=cached_spot_meta, transport=shared_transport,
+    )
+    if cached_meta is None:
+        snapshot.write_meta_cache(args.base_url, meta_data, spot_meta)
+    asset_index = snapshot.AssetIndex(meta_data)
+
+    strategies = build_strategies(configs, info, exchange, my_address, asset_index, args.live, args.journal)
+    addresses = {address.lower() for strategy in strategies for address in strategy.addresses()}
+    logging.info(f"{len(strategies)} strategies on {my_address}, {len(addresses)} distinct addresses fetched per tick:")
+    for strategy in strategies:
+        logging.info(f"  - {strategy.name}: coins {'all' if strategy.coins is None else strategy.coins}")
+
+    strategy_engine = engine.StrategyEngine(
+        engine.MarketDataHub(info), strategies,
+        scheduler.AdaptiveScheduler(
+            args.floor, args.ceiling, ds_copier_v2.LOOP_SLEEP_SECONDS,
+            mid_move_threshold=ds_copier_v2.MID_MOVE_THRESHOLD, transport=shared_transport,
+        ),
+    )
+    try:
+        if args.live:
+            strategy_engine.run()
+        else:
+            logging.info(f"----- {time.strftime('%Y-%m-%d %H:%M:%S')} - Starting single simulation run -----")
+            strategy_engine.tick()
+    except KeyboardInterrupt:
+        logging.info("KeyboardInterrupt detected. Shutting down.")
+    finally:
+        for strategy in strategies:
+            for follower in getattr(strategy, "follower_list", None) or []:
+                if follower.journal is not None:
+                    follower.journal.close()
+        logging.info("--- Strategy engine stopped. ---")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+import time
+import logging
+
+import metrics
+
+# 请求权重使用率超过该比例时不再缩短轮询间隔，并把间隔加倍
+RATE_BUDGET_HIGH = 0.8
+
+
+class AdaptiveScheduler:
+    """固定速率 + 截止时间跟踪的轮询调度器。
+
+    下一轮的截止时间从上一轮的截止时间推算，而不是从本轮结束时刻开始 sleep，因此周期不会随处理耗时漂移。
+    目标仓位变化或中间价剧烈波动后间隔回到 floor_seconds；行情平静时每轮按 backoff 倍数延长，最长 ceiling_seconds。
+    """
+
+    def __init__(self, floor_seconds, ceiling_seconds, initial_seconds=None, backoff=2.0, mid_move_threshold=0.005, coins=None, transport=None):
+        self.floor_seconds = floor_seconds
+        self.ceiling_seconds = ceiling_seconds
+        self.interval = min(ceiling_seconds, max(floor_seconds, initial_seconds or floor_seconds))
+        self.backoff = backoff
+        self.mid_move_threshold = mid_move_threshold
+        self.coins = coins
+        self.transport = transport
+        self.missed_deadlines = 0
+        self._deadline = time.monotonic()
+        self._last_mids = None
+        self._observed = False
+
+    def _max_mid_move(self, all_mids):
+        """与上一次观察相比，关注币种中间价的最大相对变化"""
+        if not all_mids:
+            return 0.0
+        coins = self.coins if self.coins is not None else all_mids.keys()
+        mids = {coin: float(all_mids[coin]) for coin in coins if coin in all_mids}
+        last_mids, self._last_mids = self._last_mids, mids
+        if last_mids is None:
+            return 0.0
+        return max((abs(px / last_mids[coin] - 1) for coin, px in mids.items() if last_mids.get(coin)), default=0.0)
+
+    def observe(self, target_changed, all_mids=None):
+        """根据本轮结果调整下一轮的间隔"""
+        mid_move = self._max_mid_move(all_mids)
+        if not self._observed:
+            # 第一轮没有可比较的基准，保持初始间隔
+            self._observed = True
+            reason = "first cycle"
+        elif target_changed:
+            self.interval = self.floor_seconds
+            reason = "target positions changed"
+        elif mid_move >= self.mid_move_threshold:
+            self.interval = self.floor_seconds
+            reason = f"mids moved {mid_move * 100:.2f}%"
+        else:
+            self.interval = min(self.ceiling_seconds, self.interval * self.backoff)
+            reason = "quiet"
+        if self.transport is not None:
+            utilization = self.transport.utilization()
+            if utilization >= RATE_BUDGET_HIGH:
+                self.interval = min(self.ceiling_seconds, max(self.interval, self.floor_seconds) * 2)
+                reason += f", request weight at {utilization * 100:.0f}% of budget"
+        logging.info(f"Next cycle in {self.interval:.1f}s ({reason})")
+
+    def wait(self):
+        """sleep 到下一轮的截止时间。已经错过截止时间时立即返回，并从当前时刻重新对齐而不是连续补跑"""
+        self._deadline += self.interval
+        now = time.monotonic()
+        if now > self._deadline:
+            lateness_ms = (now - self._deadline) * 1000
+            self.missed_deadlines += 1
+            metrics.observe("deadline_lateness", lateness_ms)
+            logging.warning(f"Missed cycle deadline by {lateness_ms:.0f} ms ({self.missed_deadlines} missed so far, interval {self.interval:.1f}s)")
+            self._deadline = now
+            return
+        time.sleep(self._deadline - now)
@@ -0,0 +1,81 @@
+import os
+import json
+import time
+import logging
+from collections import namedtuple
+
+# 永续合约 universe 与现货元数据的本地缓存，重启时在 TTL 内直接使用，省去 meta / spotMeta 请求。
+# 环境变量 DS_COPIER_META_CACHE 可以指定其他路径 (bench_startup.py 用它把缓存放在临时目录中)
+META_CACHE_PATH = os.environ.get("DS_COPIER_META_CACHE") or os.path.join(os.path.dirname(os.path.abspath(__file__)), "meta_cache.json")
+META_CACHE_TTL_SECONDS = 6 * 3600
+
+# 永续合约价格最多 MAX_PERP_PX_DECIMALS - szDecimals 位小数
+MAX_PERP_PX_DECIMALS = 6
+
+AssetInfo = namedtuple("AssetInfo", ["asset", "sz_decimals", "px_decimals"])
+
+
+class AssetIndex:
+    """由 meta()["universe"] 一次性构建的 coin -> (资产编号, szDecimals, 价格小数位数) 索引，下单时不再查询 exchange.info"""
+
+    def __init__(self, meta_data):
+        self.meta = meta_data
+        self.by_coin = {
+            asset_info["name"]: AssetInfo(asset, asset_info["szDecimals"], MAX_PERP_PX_DECIMALS - asset_info["szDecimals"])
+            for asset, asset_info in enumerate(meta_data["universe"])
+        }
+
+    def get(self, coin):
+        return self.by_coin.get(coin)
+
+    def __contains__(self, coin):
+        return coin in self.by_coin
+
+    def __len__(self):
+        return len(self.by_coin)
+
+
+def index_positions(user_state):
+    """把 user_state 的 assetPositions 转成 {coin: position}，只保留 szi 不为 0 的仓位"""
+    positions = {}
+    for asset_position in user_state.get("assetPositions", []):
+        position = asset_position.get("position", {})
+        if float(position.get("szi", 0)) != 0:
+            positions[position["coin"]] = position
+    return positions
+
+
+def position_signature(user_state, coins=None):
+    """返回 {coin: (szi, leverage)}，用于判断两次快照之间仓位是否发生变化；coins 为 None 时包含所有仓位"""
+    return {
+        coin: (position["szi"], position["leverage"]["value"])
+        for coin, position in index_positions(user_state).items()
+        if coins is None or coin in coins
+    }
+
+
+def read_meta_cache(base_url, required_coins=(), ttl_seconds=META_CACHE_TTL_SECONDS):
+    """读取磁盘缓存，返回 (meta, spot_meta)；缓存过期、属于其他 base_url 或缺少所需币种时返回 (None, None)"""
+    try:
+        with open(META_CACHE_PATH) as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return None, None
+    if cached.get("base_url") != base_url or time.time() - cached.get("fetched_at", 0) > ttl_seconds:
+        return None, None
+    cached_coins = {asset_info["name"] for asset_info in cached["meta"]["universe"]}
+    missing = [coin for coin in required_coins if coin not in cached_coins]
+    if missing:
+        logging.info(f"Metadata cache is missing {missing}, ignoring it.")
+        return None, None
+    return cached["meta"], cached["spot_meta"]
+
+
+def write_meta_cache(base_url, meta_data, spot_meta):
+    tmp_path = META_CACHE_PATH + ".tmp"
+    try:
+        with open(tmp_path, "w") as f:
+            json.dump({"base_url": base_url, "fetched_at": time.time(), "meta": meta_data, "spot_meta": spot_meta}, f)
+        os.replace(tmp_path, META_CACHE_PATH)
+    except OSError as e:
+        logging.warning(f"Could not write metadata cache {META_CACHE_PATH}: {e}")
@@ -0,0 +1,116 @@
+# 非阻塞日志：交易线程只把 LogRecord 放进队列，格式化、写盘与日志轮转都在后台 QueueListener 线程中完成。
+#
+# 除了给人看的 ds_copier.log 之外，还有一个字段固定的紧凑 JSONL 交易日志 (默认 trades.jsonl)，每行一个事件：
+#
+#   {"ts":毫秒时间戳,"event":"plan|leverage|order","coin":...,"side":"B|A","sz":...,"px":...,
+#    "reduce_only":...,"status":...,"cloid":...,"msg":...,"account":...}
+#
+# 未使用的字段为 null；account 只在扇出模式 (多个跟随账户) 下记录。两个文件都按 LOG_MAX_BYTES 轮转，保留 LOG_BACKUP_COUNT 个旧文件。
+
+import sys
+import json
+import queue
+import atexit
+import logging
+import threading
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+LOG_MAX_BYTES = 10 * 1024 * 1024
+LOG_BACKUP_COUNT = 5
+
+TRADE_LOG_FIELDS = ("ts", "event", "coin", "side", "sz", "px", "reduce_only", "status", "cloid", "msg", "account")
+
+LOG_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
+LOG_DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+_trade_logger = logging.getLogger("trades")
+_trade_logger.propagate = False
+# setup_logging 之前 (例如回放与基准脚本中) 不记录交易事件
+_trade_logger.disabled = True
+
+# 当前线程正在同步的账户 (扇出模式下每个跟随账户在各自的线程中同步)
+_context = threading.local()
+
+
+# 入队后不会再被修改的参数类型，可以放心留给后台线程格式化
+_IMMUTABLE_ARG_TYPES = (str, int, float, bool, bytes, type(None))
+
+
+def _is_immutable(arg):
+    if isinstance(arg, tuple):
+        return all(_is_immutable(item) for item in arg)
+    return isinstance(arg, _IMMUTABLE_ARG_TYPES)
+
+
+class DeferredQueueHandler(QueueHandler):
+    """QueueHandler 默认会在调用线程上格式化消息；参数都是不可变标量时原样入队，把 % 格式化也留给后台线程
+
+    参数中有 dict、list 等可变对象 (例如下单结果、仓位) 时，调用方可能在写盘之前修改它们，这时仍在当前线程格式化。
+    """
+
+    def prepare(self, record):
+        if record.args and not _is_immutable(record.args):
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+
+class TradeFormatter(logging.Formatter):
+    def format(self, record):
+        return json.dumps(dict(zip(TRADE_LOG_FIELDS, (round(record.created * 1000),) + record.args)), separators=(",", ":"))
+
+
+def setup_logging(log_path, trade_log_path, level=logging.INFO, stream=sys.stderr):
+    """把根 logger 与交易日志都接到同一个队列上，启动后台写入线程，进程退出时自动刷新并停止。stream 为 None 时不输出到控制台
+
+    副作用：关闭整个进程中所有 logger 的调用位置 (logging._srcfile)、线程与进程信息采集，
+    之后任何日志格式中的 %(pathname)s / %(lineno)d / %(funcName)s / %(thread)d / %(process)d 等字段都不再有意义。
+    只应在机器人的入口调用一次。
+    """
+    # 日志格式不使用调用位置、线程与进程信息，跳过这些字段的采集 (见 logging 文档的 Optimization 一节)
+    logging._srcfile = None
+    logging.logThreads = False
+    logging.logProcesses = False
+    logging.logMultiprocessing = False
+
+    log_queue = queue.SimpleQueue()
+    formatter = logging.Formatter(LOG_FORMAT, datefmt=LOG_DATE_FORMAT)
+
+    file_handler = RotatingFileHandler(log_path, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT)
+    file_handler.setFormatter(formatter)
+    handlers = [file_handler]
+    if stream is not None:
+        console_handler = logging.StreamHandler(stream)
+        console_handler.setFormatter(formatter)
+        handlers.append(console_handler)
+    # 交易事件与普通日志共用一个队列，按 logger 名称分发到各自的文件
+    for handler in handlers:
+        handler.addFilter(lambda record: record.name != _trade_logger.name)
+    trade_handler = RotatingFileHandler(trade_log_path, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT)
+    trade_handler.setFormatter(TradeFormatter())
+    trade_handler.addFilter(lambda record: record.name == _trade_logger.name)
+
+    root = logging.getLogger()
+    root.handlers.clear()
+    root.setLevel(level)
+    root.addHandler(DeferredQueueHandler(log_queue))
+    _trade_logger.handlers.clear()
+    _trade_logger.addHandler(DeferredQueueHandler(log_queue))
+    _trade_logger.setLevel(logging.INFO)
+    _trade_logger.disabled = False
+
+    listener = QueueListener(log_queue, *handlers, trade_handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
+
+
+def event(event, coin, side=None, sz=None, px=None, reduce_only=None, status=None, cloid=None, msg=None):
+    """记录一条交易事件。JSON 编码在后台线程完成，未启用交易日志时几乎没有开销"""
+    if _trade_logger.isEnabledFor(logging.INFO):
+        _trade_logger.info("trade", event, coin, side, sz, px, reduce_only, status, cloid, msg, getattr(_context, "account", None))
+
+
+def set_account(address):
+    """之后当前线程记录的交易事件都带上该账户地址；传入 None 清除"""
+    _context.account = address
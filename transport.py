@@ -0,0 +1,121 @@
+import time
+import random
+import logging
+import threading
+from collections import deque
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from hyperliquid.utils.error import ClientError, ServerError
+
+import metrics
+
+# 交易所按 IP 统计的请求权重上限 (每分钟)
+WEIGHT_LIMIT_PER_MINUTE = 1200
+WEIGHT_WINDOW_SECONDS = 60
+
+# 这些 info 请求的权重为 2，userRole 为 60，其余 info 请求为 20
+LIGHT_INFO_TYPES = {"l2Book", "allMids", "clearinghouseState", "orderStatus", "spotClearinghouseState", "exchangeStatus"}
+HEAVY_INFO_TYPES = {"userRole": 60}
+
+POOL_SIZE = 32
+DEFAULT_TIMEOUT_SECONDS = 10
+
+# info 请求失败后的重试次数与指数退避 (full jitter) 参数
+MAX_RETRIES = 3
+BACKOFF_BASE_SECONDS = 0.2
+BACKOFF_CAP_SECONDS = 2.0
+
+
+def request_weight(url_path, payload):
+    """按交易所文档估算一次请求消耗的权重"""
+    payload = payload or {}
+    if url_path == "/info":
+        info_type = payload.get("type")
+        if info_type in LIGHT_INFO_TYPES:
+            return 2
+        return HEAVY_INFO_TYPES.get(info_type, 20)
+    action = payload.get("action", {})
+    # 批量下单 / 撤单每 40 个订单额外加 1
+    batch_length = len(action.get("orders", action.get("cancels", [])))
+    return 1 + batch_length // 40
+
+
+def is_retryable(error):
+    if isinstance(error, (requests.ConnectionError, requests.Timeout, ServerError)):
+        return True
+    return isinstance(error, ClientError) and error.status_code == 429
+
+
+class Transport:
+    """Info 与 Exchange 共用的 HTTP 传输层：keep-alive 连接池、info 请求的重试与请求权重预算"""
+
+    def __init__(self, weight_limit=WEIGHT_LIMIT_PER_MINUTE, max_retries=MAX_RETRIES, pool_size=POOL_SIZE):
+        self.session = requests.Session()
+        self.session.headers.update({"Content-Type": "application/json"})
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.weight_limit = weight_limit
+        self.max_retries = max_retries
+        self._lock = threading.Lock()
+        self._spent = deque()
+        self._spent_total = 0
+
+    def install(self, *clients):
+        """让 SDK 的 API 客户端 (Info、Exchange 以及 Exchange 内部的 Info) 改用本传输层发送请求"""
+        for client in clients:
+            client.session = self.session
+            if client.timeout is None:
+                client.timeout = DEFAULT_TIMEOUT_SECONDS
+            original_post = client.post
+
+            def post(url_path, payload=None, _original_post=original_post):
+                return self._post(_original_post, url_path, payload)
+
+            client.post = post
+
+    def _expire(self, now):
+        while self._spent and now - self._spent[0][0] >= WEIGHT_WINDOW_SECONDS:
+            self._spent_total -= self._spent.popleft()[1]
+
+    def utilization(self):
+        """最近一个窗口内已使用的权重占上限的比例"""
+        with self._lock:
+            self._expire(time.monotonic())
+            return self._spent_total / self.weight_limit
+
+    def acquire(self, weight):
+        """预留权重；窗口内剩余额度不足时阻塞，直到足够的旧请求滑出窗口，避免被交易所限流"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._expire(now)
+                if self._spent_total + weight <= self.weight_limit or not self._spent:
+                    self._spent.append((now, weight))
+                    self._spent_total += weight
+                    return
+                wait = WEIGHT_WINDOW_SECONDS - (now - self._spent[0][0])
+            logging.warning(f"Request weight budget exhausted ({self._spent_total}/{self.weight_limit} per minute), waiting {wait:.1f}s")
+            with metrics.span("weight_budget_wait"):
+                time.sleep(wait)
+
+    def _post(self, original_post, url_path, payload):
+        weight = request_weight(url_path, payload)
+        self.acquire(weight)
+        # 下单等 /exchange 请求不是幂等的，失败时交给调用方处理，避免重复下单
+        if url_path != "/info":
+            return original_post(url_path, payload)
+        attempt = 0
+        while True:
+            try:
+                return original_post(url_path, payload)
+            except Exception as e:
+                if not is_retryable(e) or attempt >= self.max_retries:
+                    raise
+                delay = random.uniform(0, min(BACKOFF_CAP_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt))
+                attempt += 1
+                logging.warning(f"Info request {payload.get('type') if payload else ''} failed ({type(e).__name__} {getattr(e, 'status_code', '')}), retry {attempt}/{self.max_retries} in {delay * 1000:.0f} ms")
+                time.sleep(delay)
+                self.acquire(weight)